@@ -1 +1,4 @@
 from .analyzer import DataAnalyzer
+from .report_cache import ReportCache
+from .pool import AnalysisPool
+from .prerender import ReportPrerenderer
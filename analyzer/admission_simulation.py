@@ -0,0 +1,164 @@
+from operator import itemgetter
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from database import AdmissionCategory
+
+# Особые категории заполняются до общего конкурса в этом порядке
+SPECIAL_CATEGORIES = (
+    AdmissionCategory.WITHOUT_EXAMS,
+    AdmissionCategory.SPECIAL_QUOTA,
+    AdmissionCategory.SEPARATE_QUOTA,
+    AdmissionCategory.TARGET_QUOTA,
+)
+# Колонок в матрице мест: по одной на код AdmissionCategory
+CATEGORY_SLOTS = max(AdmissionCategory) + 1
+
+
+class SimulationResult(NamedTuple):
+    """
+    Итог симуляции, массивы по комбинациям в порядке combo_ids
+    - places: Всего мест
+    - special_admitted: Зачислено по особым категориям
+    - general_places: Мест на общий конкурс после особых категорий
+    - general_admitted: Зачислено по общему конкурсу
+    - cutoffs: Прогноз проходного балла (NaN - недобор)
+    """
+    combo_ids: np.ndarray
+    places: np.ndarray
+    special_admitted: np.ndarray
+    general_places: np.ndarray
+    general_admitted: np.ndarray
+    cutoffs: np.ndarray
+
+
+class AdmissionSimulation:
+    """
+    Симуляция зачисления по всем направлениям уровня и университета
+
+    Учитываются только заявления конкурсантов с согласием. Сначала
+    заполняются особые категории (SPECIAL_CATEGORIES), затем общий конкурс:
+    заявления рассматриваются по убыванию балла, и абитуриент зачисляется
+    на первое рассмотренное направление, где остались места. Приоритеты
+    парсер не собирает, поэтому абитуриент с согласиями на несколько
+    направлений попадает туда, где у него больше балл. Места особых
+    категорий, оставшиеся свободными, переходят в общий конкурс.
+    """
+    __slots__ = ('combo_ids', 'places', 'combos', 'applicants', 'categories', 'scores')
+
+    def __init__(
+        self,
+        combo_ids: np.ndarray,
+        places: np.ndarray,
+        combos: np.ndarray,
+        applicants: np.ndarray,
+        categories: np.ndarray,
+        scores: np.ndarray
+    ):
+        """
+        Args:
+            combo_ids: id комбинаций по возрастанию
+            places: Места, матрица (комбинация, категория)
+            combos: Номер комбинации в combo_ids для каждого заявления
+            applicants: Номер абитуриента (0..N-1) для каждого заявления
+            categories: Категория конкурса заявления
+            scores: Балл заявления (NaN - не указан)
+        """
+        self.combo_ids = combo_ids
+        self.places = places
+        self.combos = combos
+        self.applicants = applicants
+        self.categories = categories
+        self.scores = scores
+
+    @classmethod
+    def from_rows(cls, places: Sequence, applications: Sequence) -> 'AdmissionSimulation':
+        """
+        Построить по строкам запросов
+
+        Args:
+            places: Строки queries.simulation_places
+            applications: Строки queries.simulation_applications
+        """
+        combo_ids = np.unique(np.fromiter(
+            (row.id for row in places), dtype=np.int64, count=len(places)))
+        matrix = np.zeros((len(combo_ids), CATEGORY_SLOTS), dtype=np.int64)
+        for row in places:
+            matrix[np.searchsorted(combo_ids, row.id), row.admission_category] = \
+                row.available_places or 0
+
+        count = len(applications)
+        combos = np.fromiter(map(itemgetter(0), applications), dtype=np.int64, count=count)
+        # None в массиве float становится NaN
+        keys = np.array(list(map(itemgetter(1), applications)), dtype=np.float64)
+        categories = np.fromiter(map(itemgetter(2), applications), dtype=np.int64, count=count)
+        scores = np.array(list(map(itemgetter(3), applications)), dtype=np.float64)
+
+        # Заявления комбинаций без мест не участвуют в симуляции
+        positions = np.searchsorted(combo_ids, combos)
+        known = positions < len(combo_ids)
+        known[known] = combo_ids[positions[known]] == combos[known]
+
+        # Заявления без абитуриента считаются заявлениями разных людей
+        unknown = np.isnan(keys)
+        keys[unknown] = -1 - np.arange(unknown.sum())
+        applicants = np.unique(keys[known], return_inverse=True)[1].reshape(-1)
+
+        return cls(combo_ids, matrix, positions[known], applicants,
+                   categories[known], scores[known])
+
+    def run(self) -> SimulationResult:
+        """Распределить абитуриентов и посчитать проходные баллы"""
+        size = len(self.combo_ids)
+        taken = bytearray(int(self.applicants.max()) + 1 if len(self.applicants) else 0)
+
+        special_admitted = np.zeros(size, dtype=np.int64)
+        for category in SPECIAL_CATEGORIES:
+            selected = self._allocate(
+                np.flatnonzero(self.categories == category),
+                self.places[:, category], taken)
+            special_admitted += np.bincount(self.combos[selected], minlength=size)
+
+        general_places = np.maximum(
+            self.places[:, AdmissionCategory.GENERAL] - special_admitted, 0)
+        selected = self._allocate(
+            np.flatnonzero((self.categories == AdmissionCategory.GENERAL)
+                           & ~np.isnan(self.scores)),
+            general_places, taken)
+        general_admitted = np.bincount(self.combos[selected], minlength=size)
+
+        # Проходной балл - минимальный балл зачисленных, если места заполнены
+        lowest = np.full(size, np.inf)
+        np.minimum.at(lowest, self.combos[selected], self.scores[selected])
+        filled = (general_places > 0) & (general_admitted == general_places)
+        cutoffs = np.where(filled, lowest, np.nan)
+
+        return SimulationResult(
+            self.combo_ids, self.places[:, AdmissionCategory.GENERAL],
+            special_admitted, general_places, general_admitted, cutoffs)
+
+    def _allocate(self, candidates: np.ndarray, places: np.ndarray, taken: bytearray) -> np.ndarray:
+        """
+        Зачислить заявления по убыванию балла в пределах мест
+
+        Args:
+            candidates: Номера заявлений
+            places: Места по комбинациям
+            taken: Отметки уже зачисленных абитуриентов (изменяется)
+
+        Returns:
+            Номера зачисленных заявлений
+        """
+        # Балл по убыванию (NaN в конце), при равенстве - по номеру абитуриента
+        order = candidates[np.lexsort(
+            (self.applicants[candidates], -self.scores[candidates]))]
+        free = places.tolist()
+        selected = []
+        for entry, combo, applicant in zip(
+                order.tolist(), self.combos[order].tolist(), self.applicants[order].tolist()):
+            if free[combo] > 0 and not taken[applicant]:
+                free[combo] -= 1
+                taken[applicant] = 1
+                selected.append(entry)
+        return np.array(selected, dtype=np.int64)
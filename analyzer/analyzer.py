@@ -1,134 +1,272 @@
+import asyncio
 import logging
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
+import numpy as np
+import pandas as pd
 from io import BytesIO
-from sqlalchemy import and_, case, func, or_
-from sqlalchemy.orm import Session
 from typing import Union
 
-from database import Database, FilterCombination, Statistics
+from database import Database, AdmissionCategory
+from database import queries
+from database.bitmap import ApplicantBitmap
+from database.hyperloglog import HyperLogLog
+from .admission_simulation import AdmissionSimulation
+from .overlap import overlap_matrix, top_pairs
+from .report_cache import ReportCache
+from .report_formats import Report, ReportTable, render_report
+from .score_distribution import ScoreDistribution
 
 logger = logging.getLogger(__name__)
 
 
+def report_kind(kind: str, fmt: str) -> str:
+    """Тип отчета для кэша и хранилища: у Excel без суффикса формата"""
+    return kind if fmt == 'xlsx' else f"{kind}.{fmt}"
+
+
 class DataAnalyzer:
     """Анализатор данных поступления в КФУ"""
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, archive=None, cache: ReportCache | None = None, pool=None):
+        """
+        Args:
+            db: Экземпляр Database
+            archive: HistoryArchive для исторических запросов (необязательно)
+            cache: Кэш готовых отчетов (необязательно)
+            pool: AnalysisPool для построения отчетов (None - потоки asyncio.to_thread)
+        """
         self.db = db
-
-    def _create_excel_workbook(self) -> openpyxl.Workbook:
-        """Создает новый Excel файл"""
-        return openpyxl.Workbook()
-
-    def _style_header(self, ws, row_num):
-        """Стилизует заголовочную строку"""
-        for cell in ws[row_num]:
-            if cell.value is not None:
-                cell.fill = PatternFill(
-                    start_color="4472C4", end_color="4472C4", fill_type="solid")
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.alignment = Alignment(
-                    horizontal="center", vertical="center", wrap_text=True)
-
-    def _get_bytes_io(self, wb: openpyxl.Workbook) -> BytesIO:
-        """Преобразует Excel в BytesIO (для отправки)"""
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer
-
-    def _auto_adjust_column(self, ws, column_letter):
-        column = ws[column_letter]
-        max_length = 0
-
-        for cell in column:
-            try:
-                cell_length = len(str(cell.value))
-                if cell_length > max_length:
-                    max_length = cell_length
-            except:
-                pass
-
-        adjusted_width = max(10, max_length + 2)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    def _analyze_categoties(self, session: Session, filter_id, filter_note) -> tuple[dict[str, dict[str, int]], int]:
-        category_stats = session.query(
-            Statistics.admission_category,
-            Statistics.available_places,
-            func.count(Statistics.id).label('total_count'),
-            func.count(
-                case(
-                    (and_(
-                        Statistics.agreement == 'да',
-                        filter_note
-                    ), 1)
-                )
-            ).label('agreed_count')
-        ).filter(
-            filter_id
-        ).group_by(
-            Statistics.admission_category,
-            Statistics.available_places
-        ).all()
-
+        self.archive = archive
+        self.cache = cache
+        self.pool = pool
+        self._in_flight: dict[tuple, asyncio.Task] = {}
+        self._analyses = {
+            'speciality': self.analyze_speciality,
+            'institute': self.analyze_institute,
+            'university': self.analyze_university,
+            'simulation': self.analyze_simulation,
+            'overlap': self.analyze_overlap,
+        }
+        self._reports = {
+            'speciality': self._speciality_report,
+            'institute': self._institute_report,
+            'university': self._university_report,
+            'simulation': self._simulation_report,
+            'overlap': self._overlap_report,
+        }
+
+    async def run(self, kind: str, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """
+        Построить отчет вне цикла событий, объединяя одинаковые запросы
+
+        Отчет строится в пуле self.pool (или в потоке, если пул не задан),
+        поэтому бот продолжает отвечать другим пользователям. Если такой
+        же отчет (тип, фильтры и формат) уже строится, запрос ждет его
+        результата вместо повторного выполнения запросов и сборки файла.
+
+        Args:
+            kind: Тип анализа ('speciality', 'institute', 'university', 'simulation', 'overlap')
+            filters: Фильтры анализа
+            fmt: Формат отчета (см. report_formats.FORMATS)
+
+        Returns:
+            Отдельный BytesIO для каждого вызывающего или dict с ошибкой
+        """
+        key = ReportCache.make_key(report_kind(kind, fmt), filters, 0)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._execute(kind, filters, fmt))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            logger.debug(f"⏳ Отчет {kind} уже строится, ожидаем результат")
+
+        # shield: отмена одного ожидающего не отменяет общий расчет
+        result = await asyncio.shield(task)
+        if isinstance(result, BytesIO):
+            return BytesIO(result.getvalue())
+        return result
+
+    def render(self, kind: str, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """Построить отчет по текущим данным, минуя кэш и хранилище готовых отчетов"""
+        report = self._reports[kind](filters)
+        if isinstance(report, dict):
+            return report
+        return render_report(report, fmt)
+
+    async def _execute(self, kind: str, filters: dict, fmt: str) -> Union[BytesIO, dict]:
+        """Построить отчет в пуле потоков или процессов"""
+        if self.pool is None:
+            return await asyncio.to_thread(self._analyses[kind], filters, fmt)
+        if not self.pool.processes:
+            return await self.pool.submit(self._analyses[kind], filters, fmt)
+
+        # У процесса-исполнителя нет кэша этого процесса: отчет ищется
+        # здесь, а в процесс уходит только построение
+        key, data = await asyncio.to_thread(self._lookup, report_kind(kind, fmt), filters)
+        if data is None:
+            result = await self.pool.render(kind, filters, fmt)
+            if key is None or not isinstance(result, BytesIO):
+                return result
+            data = result.getvalue()
+        self._remember(key, data)
+        return BytesIO(data)
+
+    def _cached(self, kind: str, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """
+        Вернуть отчет из кэша или хранилища готовых отчетов, иначе построить
+
+        Ошибки (dict) не кэшируются. Ключ включает текущее поколение,
+        поэтому после нового парсинга отчет строится заново, пока
+        предварительное построение (analyzer.prerender) не сохранит его.
+        """
+        key, data = self._lookup(report_kind(kind, fmt), filters)
+        if data is None:
+            result = self.render(kind, filters, fmt)
+            if key is None or not isinstance(result, BytesIO):
+                return result
+            data = result.getvalue()
+        self._remember(key, data)
+        return BytesIO(data)
+
+    def _lookup(self, kind: str, filters: dict) -> tuple[tuple | None, bytes | None]:
+        """
+        Найти готовый отчет в кэше или в хранилище
+
+        Args:
+            kind: Тип отчета с форматом (см. report_kind)
+
+        Returns:
+            (ключ ReportCache или None, если нет текущего поколения,
+            содержимое файла или None)
+        """
+        generation_id = self.db.get_current_generation()
+        if generation_id is None:
+            return None, None
+
+        key = ReportCache.make_key(kind, filters, generation_id)
+        if self.cache is not None:
+            data = self.cache.get(key)
+            if data is not None:
+                logger.debug(f"📦 Отчет {kind} из кэша")
+                return key, data
+
+        data = self.db.get_rendered_report(generation_id, kind, key[2])
+        if data is not None:
+            logger.debug(f"📦 Отчет {kind} из хранилища готовых отчетов")
+        return key, data
+
+    def _remember(self, key: tuple, data: bytes):
+        """Сохранить отчет в кэше, если он задан"""
+        if self.cache is not None:
+            self.cache.put(key, data)
+
+    def _merge_sketches(self, rows: list):
+        """
+        Объединить скетчи уникальных абитуриентов комбинаций по факультетам
+
+        Args:
+            rows: Строки queries.university_sketches
+
+        Returns:
+            Кортеж ({faculty_name: (applicants, participants)},
+            applicants, participants) со скетчами HyperLogLog
+            факультетов и всего набора комбинаций
+        """
+        faculties = {}
+        total_applicants, total_participants = HyperLogLog(), HyperLogLog()
+        for row in rows:
+            if row.applicants is None:
+                continue
+            applicants = HyperLogLog.from_bytes(row.applicants)
+            participants = HyperLogLog.from_bytes(row.participants)
+            faculty = faculties.setdefault(
+                row.faculty_name, (HyperLogLog(), HyperLogLog()))
+            faculty[0].merge(applicants)
+            faculty[1].merge(participants)
+            total_applicants.merge(applicants)
+            total_participants.merge(participants)
+        return faculties, total_applicants, total_participants
+
+    def _analyze_categoties(self, summaries: list) -> tuple[dict[str, dict[str, int]], int]:
         admitted_by_category = {}
         occupied_places = 0
-        for stat_row in category_stats:
-            cat_name = stat_row.admission_category
-            if not cat_name or cat_name == 'общий конкурс':
+        for summary in summaries:
+            category = AdmissionCategory(summary.admission_category)
+            if category == AdmissionCategory.GENERAL:
                 continue
-            agreed_count = stat_row.agreed_count or 0
-            available_places = stat_row.available_places or 0
-            if cat_name == 'без вступительных испытаний':
-                available_places = agreed_count
+            cat_name = category.label
             admitted_by_category[cat_name] = {
-                'available_places': available_places,
-                'agreed_count': agreed_count,
-                'total': min(available_places, agreed_count)
+                'available_places': summary.available_places,
+                'agreed_count': summary.agreed_count,
+                'total': summary.admitted_count
             }
-            occupied_places += admitted_by_category[cat_name]['total']
+            occupied_places += summary.admitted_count
             logger.debug(
-                f"✅ Категория '{cat_name}': согласились {agreed_count}, мест {available_places}, заняли {admitted_by_category[cat_name]['total']}")
+                f"✅ Категория '{cat_name}': согласились {summary.agreed_count}, мест {summary.available_places}, заняли {summary.admitted_count}")
         return admitted_by_category, occupied_places
 
-    def analyze_speciality(self, filters: dict) -> Union[BytesIO, dict]:
-        """Анализ конкретного направления"""
-        session = self.db.get_session()
+    def _add_score_distribution(
+        self,
+        report: Report,
+        distribution: ScoreDistribution,
+        places: int
+    ):
+        """Добавить в отчет по направлению перцентили, гистограмму и прогноз проходного балла"""
+        percentiles = distribution.percentiles()
+        if not percentiles:
+            return
+
+        cutoff = distribution.projected_cutoff(places)
+        report.summary.append(("Медианный балл конкурсантов:", percentiles[50]))
+        report.summary.append(("Прогноз проходного балла:",
+                               cutoff if cutoff is not None else "недобор"))
+
+        scores = np.array(list(percentiles.values()))
+        ranks = distribution.rank_for_score(scores)
+        report.tables.append(ReportTable(
+            ('Перцентиль', 'Балл', 'Место в рейтинге'),
+            [(f"P{q}", score, int(rank))
+             for q, score, rank in zip(percentiles, scores.tolist(), ranks)],
+            title="Распределение баллов конкурсантов"))
+
+        # Интервалы гистограммы [low, high) с целыми границами: в подписи
+        # включительные границы
+        counts, edges = distribution.histogram()
+        report.tables.append(ReportTable(
+            ('Баллы', 'Конкурсантов'),
+            [(f"{low}–{high - 1}" if high - low > 1 else f"{low}", int(count))
+             for low, high, count in zip(edges[:-1].tolist(), edges[1:].tolist(), counts)],
+            title="Гистограмма баллов"))
+
+    def analyze_speciality(self, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """Анализ конкретного направления (через кэш и хранилище готовых отчетов)"""
+        return self._cached('speciality', filters, fmt)
+
+    def _speciality_report(self, filters: dict) -> Union[Report, dict]:
+        session = self.db.get_read_session()
         try:
-            combo = session.query(FilterCombination).filter(
-                FilterCombination.level_value == filters['level'],
-                FilterCombination.inst_value == filters['inst'],
-                FilterCombination.faculty_value == filters['faculty'],
-                FilterCombination.speciality_value == filters['speciality'],
-                FilterCombination.typeofstudy_value == filters['typeofstudy'],
-                FilterCombination.category_value == filters['category'],
-            ).first()
-
-            if not combo:
+            rows = session.execute(queries.speciality_report(filters)).all()
+
+            if not rows:
                 logger.warning("⚠️ Комбинация не найдена")
                 return {'error': '❌ Не существует такого сочетания параметров'}
 
-            filter_id = Statistics.filter_combination_id == combo.id
-            filter_note = or_(Statistics.note.is_(None),
-                              ~Statistics.note.contains("не сданы один или несколько экзаменов"))
+            combo = rows[0]
+            summaries = [row for row in rows
+                         if row.admission_category is not None]
 
-            total_apps = session.query(func.count(Statistics.id)).filter(
-                filter_id
-            ).scalar() or 0
+            total_apps = sum(summary.total_count for summary in summaries)
 
             if not total_apps:
                 logger.warning(f"⚠️ Нет статистики для комбинации {combo.id}")
                 return {'error': '❌ Не существует данных для такого сочетания параметров'}
 
-            total_participants = session.query(func.count(Statistics.id)).filter(
-                filter_id, filter_note).scalar() or 0
+            total_participants = sum(
+                summary.participants_count for summary in summaries)
 
-            total_available_places = session.query(Statistics.available_places).filter(
-                filter_id,
-                Statistics.admission_category == 'общий конкурс',
-            ).limit(1).scalar()
+            general = next((summary for summary in summaries
+                            if summary.admission_category == AdmissionCategory.GENERAL), None)
+            total_available_places = general.available_places if general else 0
 
             if not total_available_places:
                 logger.warning(
@@ -136,87 +274,45 @@ class DataAnalyzer:
                 return {'error': '❌ Не найдены доступные места по этому направлению'}
 
             admitted_by_category, occupied_places = self._analyze_categoties(
-                session, filter_id, filter_note)
+                summaries)
 
             remaining_places = total_available_places - occupied_places
 
             logger.debug(
                 f"Всего мест: {total_available_places}, занято: {occupied_places}, осталось: {remaining_places}")
 
-            general_participants = session.query(Statistics).filter(
-                filter_id, filter_note,
-                Statistics.admission_category == 'общий конкурс',
-                Statistics.agreement == 'да',
-            ).order_by(Statistics.score.desc()).limit(remaining_places).all()
-
-            scores: list = [
-                s.score for s in general_participants if s.score is not None]
-
-            wb = self._create_excel_workbook()
-            ws = wb.active
-            if not ws:
-                return {'error': 'Ошибка создания файла'}
-            ws.title = "Анализ направления"
-
-            ws['A1'] = "АНАЛИЗ НАПРАВЛЕНИЯ"
-            ws['A1'].font = Font(bold=True, size=14)
-            ws.merge_cells('A1:D1')
-
-            ws['A2'] = "Название специальности:"
-            ws['B2'] = str(combo.speciality_name)
-
-            ws['A3'] = "Всего заявлений:"
-            ws['B3'] = total_apps
-
-            ws['A4'] = "Всего конкурсантов:"
-            ws['B4'] = total_participants
-
-            ws['A5'] = "Всего мест:"
-            ws['B5'] = total_available_places
-
-            ws['A6'] = "Мест на общий конкурс:"
-            ws['B6'] = remaining_places
-
-            ws['A7'] = "Заявлений на место:"
-            ws['B7'] = round(total_participants / remaining_places,
-                             2) if remaining_places > 0 else 0
-
-            ws['A8'] = "Средний балл:"
-            ws['B8'] = round(sum(scores) / len(scores), 1) if scores else None
-
-            ws['A9'] = "Минимальный балл:"
-            ws['B9'] = min(scores) if scores else None
-
-            ws['A10'] = "Максимальный балл:"
-            ws['B10'] = max(scores) if scores else None
-
+            summary = [
+                ("Название специальности:", str(combo.speciality_name)),
+                ("Всего заявлений:", total_apps),
+                ("Всего конкурсантов:", total_participants),
+                ("Всего мест:", total_available_places),
+                ("Мест на общий конкурс:", remaining_places),
+                ("Заявлений на место:", round(
+                    total_participants / remaining_places, 2) if remaining_places > 0 else 0),
+                ("Средний балл:", general.score_avg),
+                ("Минимальный балл:", general.score_min),
+                ("Максимальный балл:", general.score_max),
+            ]
+            report = Report("Анализ направления", "АНАЛИЗ НАПРАВЛЕНИЯ", summary,
+                            widths={'B': 15, 'C': 15, 'D': 15})
             if admitted_by_category:
-                ws['A12'] = "Специальные категории"
-                ws['A12'].font = Font(bold=True, size=12)
-
-                headers: list = ['Категория', 'Доступно мест',
-                                 'Согласились', 'Занято мест']
-                for col_num, header in enumerate(headers, 1):
-                    cell = ws.cell(row=13, column=col_num)
-                    cell.value = header
-
-                self._style_header(ws, 13)
-                row = 14
-                for cat_name, cat_data in admitted_by_category.items():
-                    ws.cell(row=row, column=1).value = cat_name
-                    ws.cell(
-                        row=row, column=2).value = cat_data['available_places']
-                    ws.cell(row=row, column=3).value = cat_data['agreed_count']
-                    ws.cell(row=row, column=4).value = cat_data['total']
-                    row += 1
-
-            self._auto_adjust_column(ws, 'A')
-            for col in ['B', 'C', 'D']:
-                ws.column_dimensions[col].width = 15
+                report.tables.append(ReportTable(
+                    ('Категория', 'Доступно мест', 'Согласились', 'Занято мест'),
+                    [(cat_name, cat_data['available_places'],
+                      cat_data['agreed_count'], cat_data['total'])
+                     for cat_name, cat_data in admitted_by_category.items()],
+                    title="Специальные категории"))
+
+            # Баллы читаются из поколения агрегатов выше, а не из текущего:
+            # новое поколение могло быть опубликовано между запросами
+            distribution = ScoreDistribution.from_rows(session.execute(
+                queries.combination_scores(
+                    combo.id, general.generation_id, general.crawl_date)).all())
+            self._add_score_distribution(report, distribution, remaining_places)
 
             logger.info(
                 f"✅ Анализ направления {combo.speciality_name}: {total_apps} заявлений")
-            return self._get_bytes_io(wb)
+            return report
 
         except Exception as e:
             logger.error(f"❌ Ошибка анализа направления: {e}")
@@ -224,201 +320,90 @@ class DataAnalyzer:
         finally:
             session.close()
 
-    def analyze_institute(self, filters: dict) -> Union[BytesIO, dict]:
-        """Анализ популярности направлений в институте"""
-        session = self.db.get_session()
+    def analyze_institute(self, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """Анализ популярности направлений в институте (через кэш и хранилище готовых отчетов)"""
+        return self._cached('institute', filters, fmt)
+
+    def _institute_report(self, filters: dict) -> Union[Report, dict]:
+        session = self.db.get_read_session()
         try:
-            base_filter = [
-                FilterCombination.level_value == filters.get('level'),
-                FilterCombination.inst_value == filters.get('inst'),
-                FilterCombination.faculty_value == filters.get('faculty'),
-                FilterCombination.category_value == filters.get('category'),
-            ]
-            combos = session.query(FilterCombination).filter(
-                *base_filter,).all()
+            rows = session.execute(queries.institute_report(filters)).all()
 
-            if not combos:
+            if not rows:
                 logger.warning(
                     f"⚠️ Нет такого сочетания параметров для института {filters['inst']}")
                 return {
                     'error': '❌ Не существует данных для такого сочетания параметров'
                 }
 
-            faculty_name = combos[0].faculty_name
-            combo_ids = [c.id for c in combos]
-
-            filter_id = Statistics.filter_combination_id.in_(combo_ids)
-            filter_applicant_id = or_(Statistics.epgu_id.isnot(None),
-                                      Statistics.applicant_id.isnot(None))
-            filter_note = or_(~Statistics.note.contains(
-                "не сданы один или несколько экзаменов"),
-                Statistics.note.is_(None))
-
-            unique_applicant_count = session.query(func.count(Statistics.id.distinct())).filter(
-                filter_id, filter_applicant_id).scalar() or 0
-
-            unique_participants_count = session.query(func.count(Statistics.id.distinct())).filter(
-                filter_id, filter_applicant_id, filter_note).scalar() or 0
-
-            logger.debug(
-                f"Уникальных заявлений: {unique_applicant_count}, уникальных конкурсантов: {unique_participants_count}")
+            faculty_name = rows[0].faculty_name
+            unique_applicant_count = rows[0].unique_applicants
+            unique_participants_count = rows[0].unique_participants
+            rows = [row for row in rows if row.summaries]
 
-            spec_category_all = session.query(
-                FilterCombination.speciality_name,
-                FilterCombination.speciality_value,
-                Statistics.available_places,
-                Statistics.admission_category,
-                func.count(Statistics.id).label('total_apps'),
-            ).join(
-                Statistics, Statistics.filter_combination_id == FilterCombination.id
-            ).filter(filter_id, filter_note,
-                     ).group_by(
-                FilterCombination.speciality_value,
-                FilterCombination.speciality_name,
-                Statistics.available_places,
-                Statistics.admission_category,
-            ).all()
-
-            spec_category_admitted = session.query(
-                FilterCombination.speciality_name,
-                FilterCombination.speciality_value,
-                Statistics.admission_category,
-                func.count(Statistics.id).label('admitted_count'),
-            ).join(
-                Statistics, Statistics.filter_combination_id == FilterCombination.id
-            ).filter(
-                *base_filter,
-                filter_note,
-                Statistics.agreement == 'да',
-            ).group_by(
-                FilterCombination.speciality_value,
-                FilterCombination.speciality_name,
-                Statistics.admission_category,
-            ).all()
-
-            if not spec_category_all:
+            if not rows:
                 logger.warning(f"⚠️ Нет статистики для специальностей")
                 return {'error': '❌ Нет статистики для специальностей'}
 
-            specialities_map = {}
-            for row in spec_category_all:
-                spec_key = row.speciality_name
-                if spec_key not in specialities_map:
-                    specialities_map[spec_key] = {
-                        'name': spec_key,
-                        'total_places': 0,
-                        'categories': {},
-                        'total_apps': 0,
-                    }
-                cat = row.admission_category or 'общий конкурс'
-                total_apps = row.total_apps or 0
-                specialities_map[spec_key]['total_apps'] += total_apps
-                max_places_for_cat = row.available_places or 0
-                specialities_map[spec_key]['categories'][cat] = {
-                    'total_applications': total_apps,
-                    'total_participants': 0,
-                    'max_places': max_places_for_cat,
-                    'admitted': 0,
-                }
-
-            for row in spec_category_admitted:
-                spec_key = row.speciality_name
-                cat = row.admission_category or 'общий конкурс'
-                if spec_key in specialities_map and cat in specialities_map[spec_key]['categories']:
-                    specialities_map[spec_key]['categories'][cat]['admitted'] = row.admitted_count or 0
-                    if cat == 'без вступительных испытаний':
-                        specialities_map[spec_key]['categories'][cat]['max_places'] = specialities_map[spec_key]['categories'][cat]['admitted']
+            logger.debug(
+                f"Уникальных заявлений: {unique_applicant_count}, уникальных конкурсантов: {unique_participants_count}")
 
             specialities_data = []
-            for spec_key, spec_info in specialities_map.items():
-                total_places = spec_info['categories'].get(
-                    'общий конкурс', {}).get('max_places', 0) or 0
-                specialities_map[spec_key]['total_places'] = total_places
-
-                occupied_by_special = 0
-                for cat, cat_info in spec_info['categories'].items():
-                    if cat == 'общий конкурс':
-                        continue
-                    max_places = cat_info.get('max_places', 0)
-                    admitted_in_cat = cat_info.get('admitted', 0)
-                    occupied = min(admitted_in_cat, max_places)
-                    occupied_by_special += occupied
-
-                remaining_places = total_places - occupied_by_special
-                total_apps = spec_info['total_apps']
+            for row in rows:
+                total_places = row.total_places
+                total_apps = row.total_applications
                 applicants_per_place = round(
                     total_apps / total_places, 2) if total_places > 0 else 0
                 specialities_data.append({
-                    'name': spec_info['name'],  # название специальности
+                    'name': row.speciality_name,  # название специальности
                     'total_applications': total_apps,  # всего заявлений
                     'total_places': total_places,  # всего мест
                     # занято мест специальными категориями
-                    'occupied_by_special_categories': occupied_by_special,
-                    'remaining_places': remaining_places,  # осталось мест на общий конкурс
+                    'occupied_by_special_categories': row.occupied_by_special,
+                    # осталось мест на общий конкурс
+                    'remaining_places': total_places - row.occupied_by_special,
                     'applicants_per_place': applicants_per_place,  # заявлений на одно место
                 })
 
             specialities_data.sort(
                 key=lambda x: x['applicants_per_place'], reverse=True)
 
-            wb = self._create_excel_workbook()
-            ws = wb.active
-            if not ws:
-                return {'error': 'Ошибка создания файла'}
-            ws.title = "Анализ института"
-
-            ws['A1'] = "АНАЛИЗ ИНСТИТУТА"
-            ws['A1'].font = Font(bold=True, size=14)
-            ws.merge_cells('A1:F1')
-
-            ws['A2'] = f"Название: {faculty_name}"
-            ws['A3'] = f"Уникальных заявителей: {unique_applicant_count}"
-            ws['A4'] = f"Уникальных конкурсантов: {unique_participants_count}"
-            ws['A5'] = f"Специальностей: {len(specialities_data)}"
-
-            headers: list = ['Специальность', 'Ранг', 'Заявления',
-                             'Мест', 'Спец. кат.', 'Осталось', 'Конкурс']
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=7, column=col_num)
-                cell.value = header
-
-            self._style_header(ws, 7)
-
-            row = 8
-            for idx, spec in enumerate(specialities_data, 1):
-                ws.cell(row=row, column=1).value = spec['name']
-                ws.cell(row=row, column=2).value = idx
-                ws.cell(row=row, column=3).value = spec['total_applications']
-                ws.cell(row=row, column=4).value = spec['total_places']
-                ws.cell(
-                    row=row, column=5).value = spec['occupied_by_special_categories']
-                ws.cell(row=row, column=6).value = spec['remaining_places']
-                ws.cell(row=row, column=7).value = spec['applicants_per_place']
-                row += 1
-
-            for col in ['B', 'C', 'D', 'E', 'F', 'G']:
-                ws.column_dimensions[col].width = 12
-            self._auto_adjust_column(ws, 'A')
+            report = Report(
+                "Анализ института", "АНАЛИЗ ИНСТИТУТА",
+                [("Название:", faculty_name),
+                 ("Уникальных заявителей:", unique_applicant_count),
+                 ("Уникальных конкурсантов:", unique_participants_count),
+                 ("Специальностей:", len(specialities_data))],
+                inline_summary=True,
+                tables=[ReportTable(
+                    ('Специальность', 'Ранг', 'Заявления',
+                     'Мест', 'Спец. кат.', 'Осталось', 'Конкурс'),
+                    [(spec['name'], idx, spec['total_applications'],
+                      spec['total_places'], spec['occupied_by_special_categories'],
+                      spec['remaining_places'], spec['applicants_per_place'])
+                     for idx, spec in enumerate(specialities_data, 1)])],
+                widths=dict.fromkeys('BCDEFG', 12),
+                merge_to='F')
 
             logger.info(
                 f"✅ Анализ института {faculty_name}: {len(specialities_data)} специальностей")
 
-            return self._get_bytes_io(wb)
+            return report
         except Exception as e:
             logger.error(f"❌ Ошибка анализа института: {e}")
             return {'error': '❌ Не удалось проанализировать институт'}
         finally:
             session.close()
 
-    def analyze_university(self, filters: dict) -> Union[BytesIO, dict]:
-        """Анализ всего университета"""
-        session = self.db.get_session()
+    def analyze_university(self, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """Анализ всего университета (через кэш и хранилище готовых отчетов)"""
+        return self._cached('university', filters, fmt)
+
+    def _university_report(self, filters: dict) -> Union[Report, dict]:
+        session = self.db.get_read_session()
         try:
-            combos = session.query(FilterCombination).filter(
-                FilterCombination.level_value == filters.get('level'),
-                FilterCombination.inst_value == filters.get('inst'),
-                FilterCombination.category_value == filters.get('category'),
-            ).all()
+            combos = session.execute(
+                queries.university_sketches(filters)).all()
 
             if not combos:
                 logger.warning(
@@ -428,56 +413,17 @@ class DataAnalyzer:
                 }
 
             inst_name = combos[0].inst_name
-            combo_ids = [c.id for c in combos]
 
-            filter_id = Statistics.filter_combination_id.in_(combo_ids)
-            filter_applicant_id = or_(Statistics.epgu_id.isnot(None),
-                                      Statistics.applicant_id.isnot(None))
-            filter_note = or_(~Statistics.note.contains(
-                "не сданы один или несколько экзаменов"),
-                Statistics.note.is_(None))
-
-            unique_applicant_count = session.query(func.count(Statistics.id.distinct())).filter(
-                filter_id, filter_applicant_id).scalar() or 0
-
-            unique_participants_count = session.query(func.count(Statistics.id.distinct())).filter(
-                filter_id, filter_applicant_id, filter_note).scalar() or 0
+            faculties_stats, total_applicants, total_participants = self._merge_sketches(
+                combos)
+            unique_applicant_count = total_applicants.count()
+            unique_participants_count = total_participants.count()
+            error = total_applicants.relative_error
 
             logger.debug(
                 f"Университет {inst_name}: {unique_applicant_count} заявок, {unique_participants_count} конкурсантов")
 
-            faculties_all_stats = session.query(
-                FilterCombination.faculty_value,
-                FilterCombination.faculty_name,
-                func.count(Statistics.id.distinct()).label('total_apps')
-            ).join(
-                Statistics, Statistics.filter_combination_id == FilterCombination.id
-            ).filter(
-                filter_id,
-                filter_applicant_id,
-            ).group_by(
-                FilterCombination.faculty_value,
-                FilterCombination.faculty_name,
-            ).all()
-
-            faculties_unique_stats = session.query(
-                FilterCombination.faculty_value,
-                FilterCombination.faculty_name,
-                func.count(Statistics.id.distinct()).label(
-                    'unique_participants'),
-
-            ).join(
-                Statistics, Statistics.filter_combination_id == FilterCombination.id
-            ).filter(
-                filter_id,
-                filter_applicant_id,
-                filter_note,
-            ).group_by(
-                FilterCombination.faculty_value,
-                FilterCombination.faculty_name,
-            ).all()
-
-            if not faculties_all_stats:
+            if not faculties_stats:
                 logger.warning(
                     f"⚠️ Нет статистики для институтов по университету {inst_name}")
                 return {
@@ -488,70 +434,254 @@ class DataAnalyzer:
                     'least_popular': None,
                 }
 
-            faculties_data = {}
-            for faculty in faculties_all_stats:
-                faculties_data[faculty.faculty_name] = {
-                    'unique_applications': faculty.total_apps or 0,
-                    'unique_participants': 0
-                }
-
-            for faculty in faculties_unique_stats:
-                if faculty.faculty_name in faculties_data:
-                    faculties_data[faculty.faculty_name]['unique_participants'] = faculty.unique_participants or 0
-
             faculty_list = []
-            for faculty_name, data in faculties_data.items():
-                if data['unique_applications'] > 0:
+            for faculty_name, (applicants, participants) in faculties_stats.items():
+                applicants_count = applicants.count()
+                if applicants_count:
                     faculty_list.append({
                         'name': faculty_name,
-                        'unique_applications': data['unique_applications'],
-                        'unique_participants': data['unique_participants'],
+                        'unique_applications': applicants_count,
+                        'unique_participants': participants.count(),
                     })
 
             faculty_list.sort(
                 key=lambda x: x['unique_participants'], reverse=True)
 
-            wb = self._create_excel_workbook()
-            ws = wb.active
-            if not ws:
-                return {}
-            ws.title = "Анализ ВУЗа"
+            report = Report(
+                "Анализ ВУЗа", "АНАЛИЗ УНИВЕРСИТЕТА",
+                [("Университет:", inst_name),
+                 ("Уникальных заявителей:", f"≈{unique_applicant_count} (±{error:.1%})"),
+                 ("Уникальных конкурсантов:", f"≈{unique_participants_count} (±{error:.1%})"),
+                 ("Факультетов:", len(faculty_list))],
+                inline_summary=True,
+                tables=[ReportTable(
+                    ('Факультет', 'Ранг', 'Заявления', 'Конкурс'),
+                    [(fac['name'], idx, fac['unique_applications'], fac['unique_participants'])
+                     for idx, fac in enumerate(faculty_list, 1)])],
+                widths=dict.fromkeys('BCD', 12))
 
-            ws['A1'] = "АНАЛИЗ УНИВЕРСИТЕТА"
-            ws['A1'].font = Font(bold=True, size=14)
-            ws.merge_cells('A1:D1')
+            logger.info(
+                f"✅ Анализ университета {inst_name}: {len(faculty_list)} институтов"
+            )
+            return report
 
-            ws['A2'] = f"Университет: {inst_name}"
-            ws['A3'] = f"Уникальных заявителей: {unique_applicant_count}"
-            ws['A4'] = f"Уникальных конкурсантов: {unique_participants_count}"
-            ws['A5'] = f"Факультетов: {len(faculty_list)}"
+        except Exception as e:
+            logger.error(f"❌ Ошибка анализа университета: {e}")
+            return {'error': '❌ Не удалось проанализировать университет'}
+        finally:
+            session.close()
 
-            headers: list = ['Факультет', 'Ранг', 'Заявления', 'Конкурс']
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=7, column=col_num)
-                cell.value = header
+    def analyze_simulation(self, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """Прогноз проходных баллов по симуляции зачисления (через кэш и хранилище готовых отчетов)"""
+        return self._cached('simulation', filters, fmt)
 
-            self._style_header(ws, 7)
+    def _simulation_report(self, filters: dict) -> Union[Report, dict]:
+        session = self.db.get_read_session()
+        try:
+            places = session.execute(queries.simulation_places(filters)).all()
 
-            row = 8
-            for idx, fac in enumerate(faculty_list, 1):
-                ws.cell(row=row, column=1).value = fac['name']
-                ws.cell(row=row, column=2).value = idx
-                ws.cell(row=row, column=3).value = fac['unique_applications']
-                ws.cell(row=row, column=4).value = fac['unique_participants']
-                row += 1
+            if not places:
+                logger.warning(
+                    f"⚠️ Нет мест для симуляции по университету {filters['inst']}")
+                return {
+                    'error': '❌ Не существует данных для такого сочетания параметров'
+                }
 
-            for col in ['B', 'C', 'D']:
-                ws.column_dimensions[col].width = 12
-            self._auto_adjust_column(ws, 'A')
+            applications = session.execute(
+                queries.simulation_applications(filters)).all()
+            result = AdmissionSimulation.from_rows(places, applications).run()
+
+            combos = {row.id: row for row in places}
+            inst_name = places[0].inst_name
+            rows = []
+            for idx, combo_id in enumerate(result.combo_ids.tolist()):
+                combo = combos[combo_id]
+                cutoff = result.cutoffs[idx]
+                rows.append((
+                    combo.faculty_name,
+                    combo.speciality_name,
+                    combo.typeofstudy_name,
+                    int(result.places[idx]),
+                    int(result.special_admitted[idx]),
+                    int(result.general_admitted[idx]),
+                    "недобор" if np.isnan(cutoff) else int(cutoff),
+                ))
+            rows.sort(key=lambda row: -1 if isinstance(row[6], str) else row[6],
+                      reverse=True)
+
+            admitted = int(result.special_admitted.sum() + result.general_admitted.sum())
+            shortfall = int(np.isnan(result.cutoffs).sum())
+
+            report = Report(
+                "Прогноз проходных баллов", "ПРОГНОЗ ПРОХОДНЫХ БАЛЛОВ",
+                [("Университет:", inst_name),
+                 ("Направлений:", len(rows)),
+                 ("Заявлений с согласием:", len(applications)),
+                 ("Зачислено в симуляции:", admitted),
+                 ("Направлений с недобором:", shortfall)],
+                inline_summary=True,
+                tables=[ReportTable(
+                    ('Институт', 'Направление', 'Форма', 'Мест',
+                     'Спец. кат.', 'Общий конкурс', 'Проходной балл'),
+                    rows)],
+                widths={'B': 40, **dict.fromkeys('CDEFG', 12)},
+                merge_to='G')
 
             logger.info(
-                f"✅ Анализ университета {inst_name}: {len(faculty_list)} институтов"
-            )
-            return self._get_bytes_io(wb)
+                f"✅ Прогноз проходных баллов {inst_name}: {len(rows)} направлений, "
+                f"{len(applications)} согласий")
+            return report
 
         except Exception as e:
-            logger.error(f"❌ Ошибка анализа университета: {e}")
-            return {'error': '❌ Не удалось проанализировать университет'}
+            logger.error(f"❌ Ошибка симуляции зачисления: {e}")
+            return {'error': '❌ Не удалось построить прогноз проходных баллов'}
+        finally:
+            session.close()
+
+    def analyze_overlap(self, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """Пересечения абитуриентов направлений института (через кэш и хранилище готовых отчетов)"""
+        return self._cached('overlap', filters, fmt)
+
+    def _overlap_report(self, filters: dict) -> Union[Report, dict]:
+        session = self.db.get_read_session()
+        try:
+            rows = session.execute(queries.institute_applicant_sets(filters)).all()
+
+            if not rows:
+                logger.warning(
+                    f"⚠️ Нет такого сочетания параметров для института {filters['faculty']}")
+                return {
+                    'error': '❌ Не существует данных для такого сочетания параметров'
+                }
+
+            faculty_name = rows[0].faculty_name
+
+            # Формы обучения одного направления объединяются в одно множество
+            specialities: dict[int, tuple[str, list[np.ndarray]]] = {}
+            for row in rows:
+                if row.applicant_set is None:
+                    continue
+                _, parts = specialities.setdefault(
+                    row.speciality_value, (row.speciality_name, []))
+                parts.append(ApplicantBitmap.from_bytes(row.applicant_set).to_array())
+
+            if len(specialities) < 2:
+                logger.warning(f"⚠️ Недостаточно направлений для пересечений в {faculty_name}")
+                return {'error': '❌ Для пересечений нужно хотя бы два направления с данными'}
+
+            names = [name for name, _ in specialities.values()]
+            overlap = overlap_matrix(
+                [np.unique(np.concatenate(parts)) for _, parts in specialities.values()])
+            matrix = overlap.matrix
+
+            pairs = []
+            for first, second, common in top_pairs(matrix):
+                smaller = min(matrix[first, first], matrix[second, second])
+                pairs.append((names[first], names[second], common,
+                              round(common / smaller * 100, 1)))
+
+            report = Report(
+                "Пересечения направлений", "ПЕРЕСЕЧЕНИЯ АБИТУРИЕНТОВ",
+                [("Название:", faculty_name),
+                 ("Направлений:", len(names)),
+                 ("Уникальных абитуриентов:", overlap.unique),
+                 ("Подали на несколько направлений:", overlap.multiple)],
+                inline_summary=True,
+                widths={'B': 40, 'C': 12, 'D': 12},
+                merge_to='D')
+            if pairs:
+                report.tables.append(ReportTable(
+                    ('Направление', 'Направление', 'Общих абитуриентов', '% от меньшего'),
+                    pairs,
+                    title="Самые частые пары"))
+            report.tables.append(ReportTable(
+                ('№', 'Направление', *map(str, range(1, len(names) + 1))),
+                [(idx, name, *matrix[idx - 1].tolist())
+                 for idx, name in enumerate(names, 1)],
+                title="Матрица пересечений (на диагонали - всего абитуриентов)"))
+
+            logger.info(
+                f"✅ Пересечения направлений {faculty_name}: {len(names)} направлений, "
+                f"{overlap.unique} абитуриентов")
+            return report
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка анализа пересечений: {e}")
+            return {'error': '❌ Не удалось посчитать пересечения направлений'}
         finally:
             session.close()
+
+    def applicant_positions(self, identifier: str) -> Union[list[dict], dict]:
+        """
+        Место абитуриента во всех списках, где он есть
+
+        Args:
+            identifier: epgu_id или applicant_id
+
+        Returns:
+            Список словарей по заявлениям или dict с ошибкой
+            - rank: Место среди согласившихся (None - экзамены не сданы)
+            - places: Мест в категории (для общего конкурса - после особых категорий)
+            - cutoff: Проходной балл (None - недобор)
+            - gap: Балл абитуриента минус проходной (None, если не посчитать)
+        """
+        rows = self.db.get_applicant_positions(identifier)
+        if not rows:
+            logger.info(f"🔎 Абитуриент {identifier} не найден")
+            return {'error': '❌ Абитуриент не найден в текущих списках'}
+
+        positions = []
+        for row in rows:
+            places = row.available_places or 0
+            if row.admission_category == AdmissionCategory.GENERAL:
+                places = max(places - row.occupied_by_special, 0)
+            filled = places > 0 and (row.admitted_count or 0) >= places
+            cutoff = row.score_min if filled else None
+            positions.append({
+                'name': f"{row.speciality_name} ({row.typeofstudy_name}, {row.category_name})",
+                'faculty': row.faculty_name,
+                'category': AdmissionCategory(row.admission_category).label,
+                'score': row.score,
+                'agreement': row.agreement,
+                'rank': row.agreed_rank,
+                'places': places,
+                'cutoff': cutoff,
+                'gap': row.score - cutoff
+                if row.score is not None and cutoff is not None else None,
+            })
+        logger.info(f"🔎 Абитуриент {identifier}: {len(positions)} заявлений")
+        return positions
+
+    def get_speciality_history(self, filters: dict) -> pd.DataFrame:
+        """
+        Динамика направления по дням: архив Parquet и поколения из БД
+
+        Returns:
+            DataFrame с колонками crawl_date, total_count,
+            participants_count, agreed_count, отсортированный по дате
+        """
+        columns = ['crawl_date', 'total_count',
+                   'participants_count', 'agreed_count']
+        frames = []
+        if self.archive is not None:
+            frames.append(self.archive.speciality_trend(filters))
+
+        session = self.db.get_read_session()
+        try:
+            combo = session.execute(queries.find_combination(filters)).first()
+        finally:
+            session.close()
+
+        if combo is not None:
+            live = pd.DataFrame(
+                [(row.crawl_date, row.total_count, row.participants_count, row.agreed_count)
+                 for row in self.db.get_combination_history(combo.id)],
+                columns=columns)
+            frames.append(live.groupby('crawl_date', as_index=False).sum())
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        history = pd.concat(frames, ignore_index=True)
+        return history.drop_duplicates('crawl_date', keep='last').sort_values(
+            'crawl_date', ignore_index=True)
@@ -0,0 +1,57 @@
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+# Сколько пар направлений показывать в отчете
+TOP_PAIRS = 20
+
+
+class Overlap(NamedTuple):
+    """
+    Пересечения множеств абитуриентов
+    - matrix: Число общих абитуриентов для каждой пары (на диагонали - размер множества)
+    - unique: Уникальных абитуриентов во всех множествах
+    - multiple: Абитуриентов, которые есть в двух и более множествах
+    """
+    matrix: np.ndarray
+    unique: int
+    multiple: int
+
+
+def overlap_matrix(sets: Sequence[np.ndarray]) -> Overlap:
+    """
+    Попарные пересечения множеств id одним матричным произведением
+
+    Множества раскладываются в матрицу принадлежности
+    (множество x абитуриент), и все пересечения считаются как M @ M.T,
+    без перебора пар.
+
+    Args:
+        sets: Массивы id абитуриентов без повторов
+    """
+    if not sets:
+        return Overlap(np.zeros((0, 0), dtype=np.int64), 0, 0)
+    keys, columns = np.unique(np.concatenate(sets), return_inverse=True)
+    rows = np.repeat(np.arange(len(sets)), [len(ids) for ids in sets])
+
+    # float32 точно представляет целые до 2^24 и считается через BLAS
+    membership = np.zeros((len(sets), len(keys)), dtype=np.float32)
+    membership[rows, columns] = 1
+    matrix = np.rint(membership @ membership.T).astype(np.int64)
+    multiple = int(np.count_nonzero(membership.sum(axis=0) >= 2))
+    return Overlap(matrix, len(keys), multiple)
+
+
+def top_pairs(matrix: np.ndarray, limit: int = TOP_PAIRS) -> list[tuple[int, int, int]]:
+    """
+    Пары с наибольшим числом общих абитуриентов
+
+    Returns:
+        Список (i, j, общих абитуриентов) с i < j по убыванию пересечения,
+        пары без общих абитуриентов не включаются
+    """
+    first, second = np.triu_indices(len(matrix), k=1)
+    counts = matrix[first, second]
+    order = np.argsort(-counts, kind='stable')[:limit]
+    return [(int(first[idx]), int(second[idx]), int(counts[idx]))
+            for idx in order if counts[idx] > 0]
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Union
+
+from database import Database
+from .analyzer import DataAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Анализатор процесса-исполнителя, создается в init_worker
+_worker_analyzer: DataAnalyzer | None = None
+
+
+def worker_initargs(db: Database) -> tuple:
+    """Аргументы init_worker: URL основного узла и узла чтения БД"""
+    read_url = None
+    if db.read_engine is not db.engine:
+        read_url = db.read_engine.url.render_as_string(hide_password=False)
+    return (db.engine.url.render_as_string(hide_password=False),
+            read_url, logging.getLogger().level)
+
+
+def init_worker(db_url: str, read_url: str | None, log_level: int):
+    """Создать подключение к БД в процессе-исполнителе"""
+    global _worker_analyzer
+    logging.basicConfig(level=log_level)
+    _worker_analyzer = DataAnalyzer(Database(db_url, read_url=read_url))
+
+
+def render_in_worker(kind: str, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+    """Построить отчет анализатором процесса-исполнителя"""
+    return _worker_analyzer.render(kind, filters, fmt)
+
+
+def spawn_pool(db: Database, workers: int) -> ProcessPoolExecutor:
+    """
+    Пул процессов с собственным подключением к БД в каждом процессе
+
+    Используется spawn: процесс бота многопоточный (планировщик, пулы
+    соединений), и fork мог бы скопировать захваченные блокировки и сокеты.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=worker_initargs(db),
+    )
+
+
+class AnalysisPool:
+    """
+    Ограниченный пул для построения отчетов вне цикла событий бота
+
+    Одновременно выполняется не больше workers отчетов, остальные ждут
+    своей очереди в asyncio, не занимая потоков. Ведется статистика
+    глубины очереди и времени ожидания.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        db: Database | None = None,
+        processes: bool = False,
+        log_every: int = 50
+    ):
+        """
+        Args:
+            workers: Максимум одновременно строящихся отчетов
+            db: Экземпляр Database (нужен для пула процессов)
+            processes: Строить отчеты в отдельных процессах вместо потоков
+            log_every: Писать статистику в лог каждые log_every отчетов
+        """
+        if processes and db is None:
+            raise ValueError("Для пула процессов нужен экземпляр Database")
+        self.workers = workers
+        self.processes = processes
+        self.log_every = log_every
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.max_queued = 0
+        self.total_wait = 0.0
+        self._executor: Executor = (
+            spawn_pool(db, workers) if processes
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis'))
+        self._slots: asyncio.Semaphore | None = None
+
+    async def submit(self, fn, *args):
+        """
+        Выполнить функцию в пуле, дождавшись свободного места
+
+        В режиме процессов fn и аргументы должны сериализоваться pickle.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        queued_at = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        if self.queued > self.workers:
+            logger.debug(f"⏳ Очередь отчетов: {self.queued}, выполняется {self.running}")
+        try:
+            await self._slots.acquire()
+        finally:
+            # Уходим из очереди и при отмене ожидания
+            self.queued -= 1
+
+        self.total_wait += time.perf_counter() - queued_at
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args)
+        finally:
+            self._slots.release()
+            self.running -= 1
+            self.completed += 1
+            if self.log_every and self.completed % self.log_every == 0:
+                self._log_stats()
+
+    async def render(self, kind: str, filters: dict, fmt: str = 'xlsx') -> Union[BytesIO, dict]:
+        """Построить отчет анализатором процесса-исполнителя (только для пула процессов)"""
+        return await self.submit(render_in_worker, kind, filters, fmt)
+
+    def stats(self) -> dict:
+        """Текущая статистика пула"""
+        return {
+            'workers': self.workers,
+            'queued': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+            'max_queued': self.max_queued,
+            'avg_wait_ms': round(self.total_wait / self.completed * 1000, 1)
+            if self.completed else 0.0,
+        }
+
+    def shutdown(self):
+        """Остановить пул, дождавшись выполняющихся отчетов"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _log_stats(self):
+        stats = self.stats()
+        logger.info(
+            f"📊 Пул отчетов: выполнено {stats['completed']}, в очереди {stats['queued']}, "
+            f"максимум очереди {stats['max_queued']}, среднее ожидание {stats['avg_wait_ms']} мс")
@@ -0,0 +1,140 @@
+import logging
+import time
+from io import BytesIO
+from typing import Iterable
+
+from database import Database
+from database.queries import CombinationKey
+from .analyzer import DataAnalyzer
+from .pool import render_in_worker, spawn_pool
+from .report_cache import ReportCache
+
+logger = logging.getLogger(__name__)
+
+
+def report_jobs(combos: Iterable[CombinationKey]) -> list[tuple[str, dict]]:
+    """
+    Все отчеты, которые можно запросить в боте для данных комбинаций
+
+    Университеты (вместе с прогнозом проходных баллов) и институты
+    (вместе с пересечениями направлений) собираются из иерархии комбинаций без повторов и идут первыми:
+    их отчеты дороже всего строить заново.
+
+    Returns:
+        Список (kind, filters) в формате фильтров DataAnalyzer
+    """
+    universities, institutes, specialities = {}, {}, []
+    for combo in combos:
+        universities.setdefault(
+            (combo.level_value, combo.inst_value, combo.category_value), None)
+        institutes.setdefault(
+            (combo.level_value, combo.inst_value, combo.faculty_value,
+             combo.category_value), None)
+        specialities.append(('speciality', {
+            'level': combo.level_value,
+            'inst': combo.inst_value,
+            'faculty': combo.faculty_value,
+            'speciality': combo.speciality_value,
+            'typeofstudy': combo.typeofstudy_value,
+            'category': combo.category_value,
+        }))
+
+    return [
+        *((kind, {'level': level, 'inst': inst, 'category': category})
+          for level, inst, category in universities
+          for kind in ('university', 'simulation')),
+        *((kind, {'level': level, 'inst': inst, 'faculty': faculty, 'category': category})
+          for level, inst, faculty, category in institutes
+          for kind in ('institute', 'overlap')),
+        *specialities,
+    ]
+
+
+def _to_stored(kind: str, filters: dict, result) -> tuple[str, str, bytes | None]:
+    """(kind, filters_key, содержимое файла или None, если отчета нет)"""
+    data = result.getvalue() if isinstance(result, BytesIO) else None
+    return kind, ReportCache.filters_key(filters), data
+
+
+class ReportPrerenderer:
+    """
+    Предварительное построение всех отчетов после загрузки поколения
+
+    Отчеты по всем направлениям, институтам, университетам, прогнозы
+    проходных баллов и пересечения направлений строятся
+    в отдельных процессах и сохраняются в rendered_reports, откуда
+    DataAnalyzer отдает их без выполнения запросов и сборки Excel.
+    """
+
+    def __init__(self, workers: int = 2, chunk_size: int = 8, batch_size: int = 100):
+        """
+        Args:
+            workers: Количество процессов (1 - строить в текущем процессе)
+            chunk_size: Количество отчетов, передаваемых процессу за раз
+            batch_size: Количество отчетов в одной вставке в БД
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+
+    def run(self, db: Database, generation_id: int) -> int:
+        """
+        Построить и сохранить отчеты поколения
+
+        Отчеты прошлых поколений удаляются: их ключи больше не запрашиваются.
+        Данные читаются с основного узла (Database.primary_reader): реплика
+        может еще не получить опубликованное поколение, и тогда под его id
+        сохранились бы отчеты по прошлым данным.
+
+        Args:
+            db: Экземпляр Database
+            generation_id: Опубликованное поколение
+
+        Returns:
+            Количество сохраненных отчетов
+        """
+        started = time.perf_counter()
+        db = db.primary_reader()
+        try:
+            jobs = report_jobs(db.iter_filter_combinations())
+        except Exception as e:
+            logger.error(f"❌ Ошибка при получении комбинаций для отчетов: {e}")
+            return 0
+        db.clear_rendered_reports()
+        logger.info(f"🚀 Построение {len(jobs)} отчетов в {self.workers} процессах...")
+
+        saved = 0
+        batch = []
+        try:
+            for kind, filters_key, data in self._render_all(db, jobs):
+                if data is None:
+                    continue
+                batch.append((kind, filters_key, data))
+                if len(batch) >= self.batch_size:
+                    saved += db.save_rendered_reports(generation_id, batch)
+                    batch = []
+            saved += db.save_rendered_reports(generation_id, batch)
+        except Exception as e:
+            logger.error(f"❌ Ошибка при построении отчетов: {e}")
+            return saved
+
+        logger.info(
+            f"✅ Построено {saved} отчетов из {len(jobs)} "
+            f"за {time.perf_counter() - started:.1f} с")
+        return saved
+
+    def _render_all(self, db: Database, jobs: list[tuple[str, dict]]):
+        """Построить отчеты в пуле процессов или в текущем процессе"""
+        if self.workers <= 1:
+            analyzer = DataAnalyzer(db)
+            for kind, filters in jobs:
+                yield _to_stored(kind, filters, analyzer.render(kind, filters))
+            return
+
+        kinds = [kind for kind, _ in jobs]
+        filters_list = [filters for _, filters in jobs]
+        with spawn_pool(db, self.workers) as pool:
+            results = pool.map(render_in_worker, kinds, filters_list,
+                               chunksize=self.chunk_size)
+            for kind, filters, result in zip(kinds, filters_list, results):
+                yield _to_stored(kind, filters, result)
@@ -0,0 +1,101 @@
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ReportCache:
+    """
+    LRU-кэш готовых отчетов с ограничением по суммарному размеру
+
+    Ключ включает id поколения данных, поэтому после публикации нового
+    парсинга старые отчеты больше не находятся и удаляются при первом
+    обращении с новым поколением.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, log_every: int = 100):
+        """
+        Args:
+            max_bytes: Максимальный суммарный размер отчетов в кэше
+            log_every: Писать долю попаданий в лог каждые log_every обращений
+        """
+        self.max_bytes = max_bytes
+        self.log_every = log_every
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._generation: int | None = None
+        self._items: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def filters_key(filters: dict) -> str:
+        """Строка фильтров, не зависящая от порядка и типа значений"""
+        return '&'.join(f'{name}={value}' for name, value in sorted(filters.items()))
+
+    @classmethod
+    def make_key(cls, kind: str, filters: dict, generation_id: int) -> tuple:
+        """Ключ отчета: тип анализа, значения фильтров и поколение данных"""
+        return (generation_id, kind, cls.filters_key(filters))
+
+    @property
+    def hit_ratio(self) -> float:
+        """Доля обращений, обслуженных из кэша"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: tuple) -> bytes | None:
+        """Получить отчет и отметить его как недавно использованный"""
+        with self._lock:
+            self._switch_generation(key[0])
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+            lookups = self.hits + self.misses
+        if self.log_every and lookups % self.log_every == 0:
+            logger.info(
+                f"📦 Кэш отчетов: попаданий {self.hit_ratio:.0%}, "
+                f"{len(self._items)} отчетов, {self.size // 1024} КБ")
+        return data
+
+    def put(self, key: tuple, data: bytes):
+        """Сохранить отчет, вытеснив давно не использованные при нехватке места"""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._switch_generation(key[0])
+            if key[0] != self._generation:
+                return
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """Удалить все отчеты"""
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def _switch_generation(self, generation_id: int):
+        """Удалить отчеты прошлых поколений при появлении нового"""
+        if generation_id == self._generation:
+            return
+        if self._generation is not None and generation_id < self._generation:
+            # Запрос успел прочитать предыдущее поколение - кэш не трогаем
+            return
+        if self._items:
+            logger.info(
+                f"🔄 Новое поколение данных {generation_id}, "
+                f"кэш отчетов очищен ({len(self._items)} отчетов)")
+        self._items.clear()
+        self.size = 0
+        self._generation = generation_id
@@ -0,0 +1,158 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from io import BytesIO, StringIO
+from itertools import islice
+
+from .report_writer import ReportWriter, fit_widths
+
+# Сколько строк таблицы показывать в текстовом сообщении
+TEXT_MAX_ROWS = 15
+# Ограничение Telegram на длину сообщения
+TEXT_MAX_LENGTH = 4096
+# Сколько первых строк каждой таблицы учитывается при подборе ширины колонок Excel
+WIDTH_SAMPLE_ROWS = 200
+
+
+@dataclass
+class ReportTable:
+    """Таблица отчета: заголовки колонок, строки и необязательное название"""
+    columns: tuple[str, ...]
+    rows: list[tuple]
+    title: str | None = None
+
+
+@dataclass
+class Report:
+    """
+    Содержимое отчета независимо от формата
+    - sheet_title: Название листа Excel
+    - title: Заголовок отчета
+    - summary: Показатели (название, значение)
+    - inline_summary: Показатели записываются в Excel одной ячейкой "название значение"
+    - tables: Таблицы отчета
+    - widths, merge_to: Фиксированные ширины колонок и граница заголовка в Excel
+    """
+    sheet_title: str
+    title: str
+    summary: list[tuple[str, object]]
+    inline_summary: bool = False
+    tables: list[ReportTable] = field(default_factory=list)
+    widths: dict[str, float] = field(default_factory=dict)
+    merge_to: str = 'D'
+
+
+def _summary_line(label: str, value) -> str:
+    return f"{label} {value}"
+
+
+def _summary_rows(report: Report):
+    """Строки показателей для Excel"""
+    for label, value in report.summary:
+        if report.inline_summary:
+            yield (_summary_line(label, value),)
+        else:
+            yield (label, value)
+
+
+def _width_sample(report: Report):
+    """
+    Строки листа Excel для подбора ширины колонок
+
+    От каждой таблицы берутся первые WIDTH_SAMPLE_ROWS строк, поэтому
+    подбор не проходит по всем строкам второй раз.
+    """
+    yield (report.title,)
+    yield from _summary_rows(report)
+    for table in report.tables:
+        if table.title:
+            yield (table.title,)
+        yield table.columns
+        yield from islice(table.rows, WIDTH_SAMPLE_ROWS)
+
+
+def to_xlsx(report: Report) -> BytesIO:
+    """Файл Excel (см. ReportWriter)"""
+    widths = {**report.widths, **fit_widths(_width_sample(report))}
+    writer = ReportWriter(report.sheet_title, widths=widths)
+    writer.title(report.title, merge_to=report.merge_to)
+    for values in _summary_rows(report):
+        writer.row(*values)
+    for table in report.tables:
+        writer.blank()
+        if table.title:
+            writer.section(table.title)
+        writer.header(*table.columns)
+        writer.rows(table.rows)
+    return writer.to_bytes_io()
+
+
+def to_text(report: Report) -> BytesIO:
+    """
+    Короткая текстовая сводка для ответа сообщением
+
+    Показывает все показатели и первые TEXT_MAX_ROWS строк каждой таблицы.
+    """
+    lines = [f"📊 {report.title}", '']
+    lines.extend(_summary_line(label, value) for label, value in report.summary)
+    for table in report.tables:
+        if not table.rows:
+            continue
+        lines.append('')
+        if table.title:
+            lines.append(table.title)
+        lines.append(' | '.join(table.columns))
+        lines.extend(' | '.join(str(value) for value in row)
+                     for row in table.rows[:TEXT_MAX_ROWS])
+        if len(table.rows) > TEXT_MAX_ROWS:
+            lines.append(f"… еще {len(table.rows) - TEXT_MAX_ROWS} строк (полностью - в CSV или Excel)")
+
+    text = '\n'.join(lines)
+    if len(text) > TEXT_MAX_LENGTH:
+        text = text[:TEXT_MAX_LENGTH - 1] + '…'
+    return BytesIO(text.encode('utf-8'))
+
+
+def to_csv(report: Report) -> BytesIO:
+    """CSV: показатели, затем таблицы через пустую строку (BOM для Excel)"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(report.summary)
+    for table in report.tables:
+        writer.writerow(())
+        if table.title:
+            writer.writerow((table.title,))
+        writer.writerow(table.columns)
+        writer.writerows(table.rows)
+    return BytesIO(buffer.getvalue().encode('utf-8-sig'))
+
+
+def to_json(report: Report) -> BytesIO:
+    """JSON с показателями и таблицами в виде списков значений"""
+    data = {
+        'title': report.title,
+        'summary': [{'name': label.rstrip(':'), 'value': value}
+                    for label, value in report.summary],
+        'tables': [{
+            'title': table.title,
+            'columns': list(table.columns),
+            'rows': [list(row) for row in table.rows],
+        } for table in report.tables],
+    }
+    return BytesIO(json.dumps(data, ensure_ascii=False, indent=2, default=str).encode('utf-8'))
+
+
+RENDERERS = {
+    'xlsx': to_xlsx,
+    'text': to_text,
+    'csv': to_csv,
+    'json': to_json,
+}
+
+# Форматы отчетов: xlsx - файл Excel, остальные строятся без книги Excel
+FORMATS = tuple(RENDERERS)
+
+
+def render_report(report: Report, fmt: str = 'xlsx') -> BytesIO:
+    """Записать отчет в заданном формате"""
+    return RENDERERS[fmt](report)
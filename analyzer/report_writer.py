@@ -0,0 +1,117 @@
+from io import BytesIO
+from typing import Iterable
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+
+# Стили создаются один раз и разделяются всеми ячейками и отчетами
+TITLE_FONT = Font(bold=True, size=14)
+SECTION_FONT = Font(bold=True, size=12)
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+
+def fit_widths(
+    rows: Iterable[tuple],
+    auto_width: tuple[str, ...] = ('A',),
+    min_width: int = 10
+) -> dict[str, float]:
+    """
+    Ширина колонок по самому длинному значению
+
+    Считается до записи листа: в XLSX ширины колонок идут до строк,
+    а ReportWriter отдает строки в файл сразу. Для больших листов
+    достаточно передать выборку строк.
+
+    Args:
+        rows: Значения строк листа или их выборка
+        auto_width: Колонки, ширина которых подбирается по содержимому
+        min_width: Минимальная ширина подбираемой колонки
+
+    Returns:
+        {буква: ширина} для колонок auto_width
+    """
+    lengths = {column: 0 for column in auto_width}
+    for values in rows:
+        for column, value in enumerate(values, 1):
+            letter = get_column_letter(column)
+            if letter in lengths and value is not None:
+                lengths[letter] = max(lengths[letter], len(str(value)))
+    return {letter: max(min_width, length + 2) for letter, length in lengths.items()}
+
+
+class ReportWriter:
+    """
+    Построение листа отчета в режиме write-only
+
+    ReportWriter не хранит строки: каждая сразу отдается листу openpyxl,
+    который пишет XML во временный файл. Память зависит от источника
+    строк: rows() принимает и итератор, например Database.stream_rows.
+    Ширины колонок в XLSX идут до строк, поэтому передаются в конструктор
+    (подбор по выборке строк - fit_widths).
+    """
+
+    def __init__(self, title: str, widths: dict[str, float] | None = None):
+        """
+        Args:
+            title: Название листа
+            widths: Ширина колонок {буква: ширина}
+        """
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(title)
+        for letter, width in (widths or {}).items():
+            self._ws.column_dimensions[letter].width = width
+        self._row_count = 0
+
+    def title(self, text: str, merge_to: str):
+        """Заголовок отчета, объединенный до колонки merge_to"""
+        # Объединения записываются после строк, их можно добавлять по ходу
+        self._ws.merged_cells.add(
+            f"A{self._row_count + 1}:{merge_to}{self._row_count + 1}")
+        self._add((text,), TITLE_FONT)
+
+    def section(self, text: str):
+        """Заголовок раздела"""
+        self._add((text,), SECTION_FONT)
+
+    def header(self, *names: str):
+        """Строка заголовков таблицы"""
+        self._add(names, HEADER_FONT, HEADER_FILL, HEADER_ALIGNMENT)
+
+    def row(self, *values):
+        """Строка данных"""
+        self._add(values)
+
+    def rows(self, rows: Iterable[tuple]):
+        """Строки данных из списка или итератора (итератор читается один раз)"""
+        for values in rows:
+            self._add(tuple(values))
+
+    def blank(self):
+        """Пустая строка"""
+        self._add(())
+
+    def _add(self, values: tuple, *style):
+        self._ws.append(values if not style else
+                        [self._styled_cell(self._ws, value, *style) for value in values])
+        self._row_count += 1
+
+    def to_bytes_io(self) -> BytesIO:
+        """Завершить лист и вернуть файл в BytesIO (для отправки, вызывается один раз)"""
+        buffer = BytesIO()
+        self._wb.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def _styled_cell(ws, value, font, fill=None, alignment=None) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
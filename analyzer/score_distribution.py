@@ -0,0 +1,121 @@
+from operator import itemgetter
+from typing import Sequence
+
+import numpy as np
+
+from database import AdmissionCategory
+
+# Перцентили баллов в отчете по направлению
+PERCENTILES = (90, 75, 50, 25, 10)
+
+
+class ScoreDistribution:
+    """
+    Баллы заявлений одной комбинации в виде массивов NumPy
+
+    Все показатели считаются по конкурсантам общего конкурса (экзамены
+    сданы, балл указан), отсортированным по убыванию балла один раз.
+    """
+    __slots__ = ('scores', 'categories', 'participant', '_ranked')
+
+    def __init__(
+        self,
+        scores: np.ndarray,
+        categories: np.ndarray,
+        participant: np.ndarray
+    ):
+        """
+        Args:
+            scores: Баллы (NaN - балл не указан)
+            categories: Категории конкурса (AdmissionCategory)
+            participant: Участвует ли в конкурсе (экзамены сданы)
+        """
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.categories = np.asarray(categories, dtype=np.int16)
+        self.participant = np.asarray(participant, dtype=bool)
+        self._ranked: np.ndarray | None = None
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> 'ScoreDistribution':
+        """
+        Построить по строкам queries.combination_scores
+
+        Args:
+            rows: Строки (score, admission_category, exams_failed)
+        """
+        # Колонки собираются по одной: zip(*rows) на сотнях тысяч строк
+        # медленнее самих расчетов
+        count = len(rows)
+
+        def column(idx, dtype):
+            return np.fromiter(map(itemgetter(idx), rows), dtype=dtype, count=count)
+
+        # None в массиве float становится NaN
+        scores = np.array(list(map(itemgetter(0), rows)), dtype=np.float64)
+        return cls(scores, column(1, np.int16), ~column(2, bool))
+
+    @property
+    def ranked(self) -> np.ndarray:
+        """Баллы конкурсантов общего конкурса по убыванию"""
+        if self._ranked is None:
+            mask = (self.participant
+                    & (self.categories == AdmissionCategory.GENERAL)
+                    & ~np.isnan(self.scores))
+            self._ranked = -np.sort(-self.scores[mask])
+        return self._ranked
+
+    def percentiles(self, qs: Sequence[int] = PERCENTILES) -> dict[int, float]:
+        """
+        Перцентили баллов конкурсантов
+
+        Returns:
+            {перцентиль: балл}, пустой словарь, если конкурсантов нет
+        """
+        if not len(self.ranked):
+            return {}
+        values = np.percentile(self.ranked, qs)
+        return dict(zip(qs, np.round(values, 1).tolist()))
+
+    def histogram(self, bins: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Гистограмма баллов конкурсантов с целыми границами интервалов
+
+        Интервалы [low, high) одной целой длины, поэтому подписи не дробные
+        и не повторяются. Если диапазон баллов меньше bins, интервалов меньше.
+
+        Args:
+            bins: Наибольшее количество интервалов
+
+        Returns:
+            (количество в интервалах, целые границы интервалов)
+        """
+        if not len(self.ranked):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        low = int(np.floor(self.ranked[-1]))
+        high = int(np.floor(self.ranked[0])) + 1
+        step = -(-(high - low) // bins)
+        edges = np.arange(low, high + step, step)
+        return np.histogram(self.ranked, bins=edges)[0], edges
+
+    def projected_cutoff(self, places: int) -> float | None:
+        """
+        Прогноз проходного балла: балл конкурсанта на последнем месте,
+        если бы все конкурсанты подали согласие
+
+        Returns:
+            Балл или None, если конкурсантов меньше, чем мест (недобор)
+        """
+        if places <= 0 or len(self.ranked) < places:
+            return None
+        return float(self.ranked[places - 1])
+
+    def rank_for_score(self, score):
+        """
+        Место в рейтинге общего конкурса для балла
+
+        Место - 1 + число конкурсантов с баллом выше. Принимает число
+        или массив баллов.
+        """
+        ascending = self.ranked[::-1]
+        higher = len(ascending) - np.searchsorted(ascending, score, side='right')
+        return higher + 1
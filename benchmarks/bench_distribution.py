@@ -0,0 +1,91 @@
+"""
+Бенчмарк распределения баллов направления
+
+Сравнивает подсчет перцентилей, гистограммы, прогноза проходного балла
+и мест в рейтинге на списках Python ("before") с
+analyzer.score_distribution.ScoreDistribution ("after") на синтетической
+комбинации из заданного числа заявлений.
+
+Запуск:
+    python -m benchmarks.bench_distribution --rows 100000 --repeat 20
+"""
+import argparse
+import random
+import time
+
+from analyzer.score_distribution import PERCENTILES, ScoreDistribution
+from database import AdmissionCategory
+
+
+def generate(rows: int, seed: int) -> list[tuple]:
+    """Строки (score, admission_category, exams_failed)"""
+    rnd = random.Random(seed)
+    categories = list(AdmissionCategory)
+    return [(
+        None if rnd.random() < 0.02 else rnd.randrange(100, 311),
+        AdmissionCategory.GENERAL if rnd.random() < 0.85 else rnd.choice(categories),
+        rnd.random() < 0.05,
+    ) for _ in range(rows)]
+
+
+def distribution_before(rows: list[tuple], places: int) -> tuple:
+    ranked = sorted((score for score, category, failed in rows
+                     if not failed and category == AdmissionCategory.GENERAL
+                     and score is not None), reverse=True)
+    ascending = ranked[::-1]
+    percentiles = {}
+    for q in PERCENTILES:
+        position = (len(ascending) - 1) * q / 100
+        low = int(position)
+        high = min(low + 1, len(ascending) - 1)
+        percentiles[q] = ascending[low] + (ascending[high] - ascending[low]) * (position - low)
+
+    low, high = ascending[0], ascending[-1]
+    width = (high - low) / 10 or 1
+    histogram = [0] * 10
+    for score in ranked:
+        histogram[min(int((score - low) / width), 9)] += 1
+
+    cutoff = ranked[places - 1] if len(ranked) >= places else None
+    ranks = [1 + sum(1 for score in ranked if score > value)
+             for value in percentiles.values()]
+    return percentiles, histogram, cutoff, ranks
+
+
+def distribution_after(rows: list[tuple], places: int) -> tuple:
+    distribution = ScoreDistribution.from_rows(rows)
+    percentiles = distribution.percentiles()
+    histogram = distribution.histogram()
+    cutoff = distribution.projected_cutoff(places)
+    ranks = distribution.rank_for_score(list(percentiles.values()))
+    return percentiles, histogram, cutoff, ranks
+
+
+def measure(fn, rows: list[tuple], places: int, repeat: int) -> float:
+    """Среднее время одного вызова в миллисекундах"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows, places)
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--places', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rows = generate(args.rows, args.seed)
+    before = distribution_before(rows, args.places)
+    after = distribution_after(rows, args.places)
+    assert before[2] == after[2], "прогноз проходного балла не совпадает"
+
+    print(f"{'distribution_ms':<22}{'before':>14}{'after':>14}")
+    print(f"{args.rows:<22}{measure(distribution_before, rows, args.places, args.repeat):>14.1f}"
+          f"{measure(distribution_after, rows, args.places, args.repeat):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
+import asyncio
 import logging
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 
 from analyzer import DataAnalyzer
+from analyzer.report_formats import FORMATS, TEXT_MAX_LENGTH
 from bot.messages import get_text, get_param_display_name
 from bot.states import AnalysisStates
 from bot.keyboards import *
@@ -16,7 +18,9 @@ logger = logging.getLogger(__name__)
 TYPES_ANALYSIS = {
     'by_speciality': '🎯 Анализ по направлению',
     'by_institute': '🏛️ Анализ по институту',
-    'by_university': '🎓 Анализ по университету'
+    'by_university': '🎓 Анализ по университету',
+    'by_simulation': '🔮 Прогноз проходных баллов',
+    'by_overlap': '🔗 Пересечения направлений'
 }
 
 PARAM_ORDERS = {
@@ -38,9 +42,29 @@ PARAM_ORDERS = {
         'level',
         'inst',
         'category'
+    ],
+    'by_simulation': [
+        'level',
+        'inst',
+        'category'
+    ],
+    'by_overlap': [
+        'level',
+        'inst',
+        'faculty',
+        'category'
     ]
 }
 
+# Тип анализа DataAnalyzer и подпись к файлу для каждого типа анализа бота
+ANALYSIS_KINDS = {
+    'by_speciality': ('speciality', "📊 Анализ направления выполнен!"),
+    'by_institute': ('institute', "📊 Анализ направлений в институте выполнен!"),
+    'by_university': ('university', "📊 Анализ всех направлений выполнен!"),
+    'by_simulation': ('simulation', "🔮 Прогноз проходных баллов построен!"),
+    'by_overlap': ('overlap', "🔗 Пересечения абитуриентов направлений посчитаны!"),
+}
+
 STATE_MAPPING = {
     'level': AnalysisStates.waiting_for_level,
     'inst': AnalysisStates.waiting_for_inst,
@@ -56,7 +80,7 @@ def get_param_order(analysis_type: str) -> list[str]:
     Получить порядок параметров для типа анализа
 
     Args:
-        analysis_type: Тип анализа (by_speciality, by_institute, by_university)
+        analysis_type: Тип анализа (by_speciality, by_institute, by_university, by_simulation, by_overlap)
 
     Returns:
         Список параметров в нужном порядке
@@ -133,19 +157,61 @@ async def get_options_for_param(db: Database, param: str, filters: dict) -> list
         return []
 
 
-def create_router(db: Database) -> Router:
+def format_positions(identifier: str, positions: list[dict]) -> str:
+    """
+    Текст ответа на /position
+
+    Args:
+        identifier: Введенный идентификатор абитуриента
+        positions: Результат DataAnalyzer.applicant_positions
+
+    Returns:
+        Сообщение не длиннее ограничения Telegram
+    """
+    lines = [get_text('position_header', identifier=identifier)]
+    for position in positions:
+        lines.append('')
+        lines.append(f"🎯 {position['name']}")
+        lines.append(f"🏛️ {position['faculty']}, {position['category']}")
+        if position['rank'] is None:
+            lines.append("❌ Экзамены не сданы, в конкурсе не участвует")
+            continue
+
+        if position['agreement']:
+            lines.append(f"📍 Место среди согласий: {position['rank']} (мест: {position['places']})")
+        else:
+            lines.append(f"📍 Место при подаче согласия: {position['rank']} (мест: {position['places']})")
+
+        if position['cutoff'] is None:
+            lines.append("📈 Недобор: согласий меньше, чем мест")
+        elif position['gap'] is None:
+            lines.append(f"📈 Проходной балл: {position['cutoff']}")
+        elif position['gap'] >= 0:
+            lines.append(f"✅ Проходной балл: {position['cutoff']}, запас {position['gap']}")
+        else:
+            lines.append(f"⚠️ Проходной балл: {position['cutoff']}, не хватает {-position['gap']}")
+
+    text = '\n'.join(lines)
+    if len(text) > TEXT_MAX_LENGTH:
+        text = text[:TEXT_MAX_LENGTH - 1] + '…'
+    return text
+
+
+def create_router(db: Database, archive=None, cache=None, pool=None) -> Router:
     """
     Создать роутер с обработчиками
 
     Args:
-        parser: экземпляр парсера КФУ
         db: экземпляр БД
+        archive: архив прошлых парсингов для анализатора (необязательно)
+        cache: кэш готовых отчетов ReportCache (необязательно)
+        pool: пул AnalysisPool для построения отчетов (необязательно)
 
     Returns:
         Router с зарегистрированными обработчиками
     """
     router = Router()
-    analyzer = DataAnalyzer(db)
+    analyzer = DataAnalyzer(db, archive, cache, pool)
 
     @router.message(Command("start"))
     async def start_handler(message: Message):
@@ -159,6 +225,20 @@ def create_router(db: Database) -> Router:
             reply_markup=get_main_menu()
         )
 
+    @router.message(Command("position"))
+    async def position_command(message: Message, command: CommandObject):
+        """Место абитуриента во всех списках по epgu_id или applicant_id"""
+        identifier = (command.args or '').strip()
+        if not identifier or len(identifier) > 15 or ' ' in identifier:
+            await message.answer(get_text('position_usage'))
+            return
+
+        positions = await asyncio.to_thread(analyzer.applicant_positions, identifier)
+        if isinstance(positions, dict):
+            await message.answer(positions.get('error', '❌ Ошибка'))
+            return
+        await message.answer(format_positions(identifier, positions))
+
     @router.callback_query(F.data == "help")
     async def help_handler(callback: CallbackQuery):
         """Справка"""
@@ -248,6 +328,27 @@ def create_router(db: Database) -> Router:
         if callback.message:
             await ask_for_parameter(callback.message, state)
 
+    @router.callback_query(AnalysisStates.waiting_for_format, F.data.startswith("format_"))
+    async def handle_format_selection(callback: CallbackQuery, state: FSMContext):
+        """
+        Пользователь выбрал формат результата
+        Сохраняем его и выполняем анализ
+        """
+        await callback.answer()
+
+        fmt = callback.data.replace("format_", "")
+        if fmt not in FORMATS:
+            logger.error(f"❌ Неизвестный формат: {fmt}")
+            return
+
+        await state.update_data(fmt=fmt)
+        logger.debug(f"✅ Выбран формат: {fmt}")
+
+        if callback.message:
+            await callback.message.edit_text(
+                f"✅ Вы выбрали формат: {FORMAT_NAMES[fmt]}")
+            await process_analysis(callback.message, state)
+
     @router.callback_query(F.data == "cancel")
     async def cancel_handler(callback: CallbackQuery, state: FSMContext):
         """Отмена анализа"""
@@ -288,9 +389,12 @@ def create_router(db: Database) -> Router:
         filters = data.get('filters', {})
         analysis_type = data.get('analysis_type', '')
 
-        # Если все параметры выбраны - переходим к анализу
+        # Если все параметры выбраны - спрашиваем формат результата
         if current_index >= len(param_order):
-            await process_analysis(message, state)
+            if message:
+                await message.answer(get_text('choose_format'),
+                                     reply_markup=get_format_menu())
+            await state.set_state(AnalysisStates.waiting_for_format)
             return
 
         # Текущий параметр
@@ -359,89 +463,37 @@ def create_router(db: Database) -> Router:
         processing_msg = await message.answer(get_text('processing'))
 
         try:
-            if analysis_type == 'by_speciality':
-                logger.info("📚 Анализирую направление...")
-                result = analyzer.analyze_speciality({
-                    'level': filters.get('level'),
-                    'inst': filters.get('inst'),
-                    'faculty': filters.get('faculty'),
-                    'speciality': filters.get('speciality'),
-                    'typeofstudy': filters.get('typeofstudy'),
-                    'category': filters.get('category')
-                })
-
-                if isinstance(result, dict):
-                    text = result.get('error', '❌ Ошибка')
-                    await processing_msg.edit_text(
-                        text,
-                        reply_markup=get_main_menu()
-                    )
-                    logger.error(f"❌ Ошибка анализа: {text}")
-                else:
-                    input_file = BufferedInputFile(
-                        result.read(), filename="speciality_analysis.xlsx")
-                    await message.answer_document(
-                        input_file,
-                        caption="📊 Анализ направления выполнен!",
-                        reply_markup=get_new_analysis_keyboard()
-                    )
-                    await processing_msg.delete()
-                    logger.info("✅ Файл отправлен пользователю")
-
-            elif analysis_type == 'by_institute':
-                logger.info("🏛️ Анализирую направления в институте...")
-
-                result = analyzer.analyze_institute({
-                    'level': filters.get('level'),
-                    'inst': filters.get('inst'),
-                    'faculty': filters.get('faculty'),
-                    'category': filters.get('category')
-                })
-
-                if isinstance(result, dict):
-                    text = result.get('error', '❌ Ошибка')
-                    await processing_msg.edit_text(
-                        text,
-                        reply_markup=get_main_menu()
-                    )
-                    logger.error(f"❌ Ошибка анализа: {text}")
-                else:
-                    input_file = BufferedInputFile(
-                        result.read(), filename="institute_analysis.xlsx")
-                    await message.answer_document(
-                        input_file,
-                        caption="📊 Анализ направлений в институте выполнен!",
-                        reply_markup=get_new_analysis_keyboard()
-                    )
-                    await processing_msg.delete()
-                    logger.info("✅ Файл отправлен пользователю")
-
-            elif analysis_type == 'by_university':
-                logger.info("🎓 Анализирую все направления...")
-
-                result = analyzer.analyze_university({
-                    'level': filters.get('level'),
-                    'inst': filters.get('inst'),
-                    'category': filters.get('category')
-                })
-
-                if isinstance(result, dict):
-                    text = result.get('error', '❌ Ошибка')
-                    await processing_msg.edit_text(
-                        text,
-                        reply_markup=get_main_menu()
-                    )
-                    logger.error(f"❌ Ошибка анализа: {text}")
-                else:
-                    input_file = BufferedInputFile(
-                        result.read(), filename="university_analysis.xlsx")
-                    await message.answer_document(
-                        input_file,
-                        caption="📊 Анализ всех направлений выполнен!",
-                        reply_markup=get_new_analysis_keyboard()
-                    )
-                    await processing_msg.delete()
-                    logger.info("✅ Файл отправлен пользователю")
+            kind, caption = ANALYSIS_KINDS[analysis_type]
+            fmt = data.get('fmt', 'xlsx')
+            logger.info(f"🔍 Анализ {kind} в формате {fmt}...")
+
+            result = await analyzer.run(kind, {
+                param: filters.get(param) for param in get_param_order(analysis_type)
+            }, fmt)
+
+            if isinstance(result, dict):
+                text = result.get('error', '❌ Ошибка')
+                await processing_msg.edit_text(
+                    text,
+                    reply_markup=get_main_menu()
+                )
+                logger.error(f"❌ Ошибка анализа: {text}")
+            elif fmt == 'text':
+                await processing_msg.edit_text(
+                    result.read().decode('utf-8'),
+                    reply_markup=get_new_analysis_keyboard()
+                )
+                logger.info("✅ Сводка отправлена пользователю")
+            else:
+                input_file = BufferedInputFile(
+                    result.read(), filename=f"{kind}_analysis.{fmt}")
+                await message.answer_document(
+                    input_file,
+                    caption=caption,
+                    reply_markup=get_new_analysis_keyboard()
+                )
+                await processing_msg.delete()
+                logger.info("✅ Файл отправлен пользователю")
 
         except Exception as e:
             logger.error(f"❌ Ошибка при анализе: {e}")
@@ -1 +1 @@
-from .keyboards import get_main_menu, get_analysis_type_menu, create_options_keyboard, get_new_analysis_keyboard
+from .keyboards import get_main_menu, get_analysis_type_menu, create_options_keyboard, get_new_analysis_keyboard, get_format_menu, FORMAT_NAMES
@@ -31,6 +31,14 @@ def get_analysis_type_menu() -> InlineKeyboardMarkup:
             text="🎓 По университету",
             callback_data="analysis_type_by_university"
         )],
+        [InlineKeyboardButton(
+            text="🔮 Прогноз проходных баллов",
+            callback_data="analysis_type_by_simulation"
+        )],
+        [InlineKeyboardButton(
+            text="🔗 Пересечения направлений",
+            callback_data="analysis_type_by_overlap"
+        )],
         [InlineKeyboardButton(
             text="❌ Отмена",
             callback_data="cancel"
@@ -67,6 +75,28 @@ def create_options_keyboard(options: list[tuple[int, str]]) -> InlineKeyboardMar
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+# Названия форматов результата анализа для кнопок и сообщений
+FORMAT_NAMES = {
+    'text': "💬 Кратко в сообщении",
+    'xlsx': "📗 Excel",
+    'csv': "📄 CSV",
+    'json': "🧾 JSON",
+}
+
+
+def get_format_menu() -> InlineKeyboardMarkup:
+    """Выбор формата результата анализа"""
+    buttons = [
+        [InlineKeyboardButton(text=name, callback_data=f"format_{fmt}")]
+        for fmt, name in FORMAT_NAMES.items()
+    ]
+    buttons.append([InlineKeyboardButton(
+        text="❌ Отмена",
+        callback_data="cancel"
+    )])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 def get_new_analysis_keyboard() -> InlineKeyboardMarkup:
     """Меню после завершения анализа"""
     buttons = [
@@ -24,11 +24,14 @@ TEXTS = {
 • 📊 По направлению - анализ конкретного направления подготовки
 • 🏛️ По институту - анализ всего института
 • 🎓 По университету - анализ всего университета / филиала
+• 🔮 Прогноз проходных баллов - симуляция зачисления по всем направлениям с учетом согласий абитуриентов
+• 🔗 Пересечения направлений - сколько абитуриентов института подали заявления на каждую пару направлений
 2. По очереди выберите фильтры, которые вам интересны.
-3. После выбора всех фильтров бот загрузит таблицу, проведет анализ и отправит файл с анализом в формате Excel.
+3. После выбора всех фильтров выберите формат: краткая сводка в сообщении, Excel, CSV или JSON. Бот проведет анализ и пришлет результат.
 
 ⚙️ Команды:
 /start - Главное меню
+/position <id> - Ваше место во всех списках по уникальному коду ЕПГУ или id абитуриента
 /help - Эта справка""",
 
     'choose_analysis_type': """🎯 Выберите тип анализа:""",
@@ -46,6 +49,11 @@ TEXTS = {
     'choose_speciality': """🎯 Выберите направление:""",
     'choose_typeofstudy': """📖 Выберите тип обучения:""",
     'choose_category': """🌍 Выберите категорию:""",
+    'choose_format': """📦 В каком виде прислать результат?""",
+
+    'position_usage': """🔎 Укажите уникальный код ЕПГУ или id абитуриента после команды, например:
+/position 1234567""",
+    'position_header': """🔎 Абитуриент {identifier}""",
 
     'error_loading': """❌ Ошибка при загрузке опций. Попробуйте позже.""",
 }
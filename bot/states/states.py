@@ -12,5 +12,6 @@ class AnalysisStates(StatesGroup):
     waiting_for_speciality = State()     # Ожидание направления
     waiting_for_typeofstudy = State()    # Ожидание формы обучения
     waiting_for_category = State()       # Ожидание категории
+    waiting_for_format = State()         # Ожидание формата результата
 
     processing = State()                 # Обработка и анализ
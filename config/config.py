@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from environs import Env
 
 
@@ -14,6 +14,12 @@ class DatabaseSettings:
     host: str
     port: int
     name: str
+    history_days: int = 0
+    archive_dir: str = ''
+    read_host: str = ''
+    read_port: int = 0
+    vacuum_after_crawl: bool = False
+    carry_over_generations: int = 3
 
 
 @dataclass
@@ -27,12 +33,21 @@ class ParserSettings:
     base_url: str
 
 
+@dataclass
+class ReportSettings:
+    cache_mb: int = 64
+    prerender_workers: int = 2
+    workers: int = 4
+    worker_processes: bool = False
+
+
 @dataclass
 class Config:
     bot: TgBot
     db: DatabaseSettings
     log: LogSettings
     parser: ParserSettings
+    report: ReportSettings = field(default_factory=ReportSettings)
 
 
 def load_config(path: str | None = None) -> Config:
@@ -45,8 +60,18 @@ def load_config(path: str | None = None) -> Config:
                             password=env('DB_PASSWORD'),
                             host=env('DB_HOST', default='localhost'),
                             port=env.int('DB_PORT', default=5432),
-                            name=env('DB_NAME'),),
+                            name=env('DB_NAME'),
+                            history_days=env.int('DB_HISTORY_DAYS', default=0),
+                            archive_dir=env('DB_ARCHIVE_DIR', default=''),
+                            read_host=env('DB_READ_HOST', default=''),
+                            read_port=env.int('DB_READ_PORT', default=0),
+                            vacuum_after_crawl=env.bool('DB_VACUUM_AFTER_CRAWL', default=False),
+                            carry_over_generations=env.int('DB_CARRY_OVER_GENERATIONS', default=3),),
         log=LogSettings(level=env("LOG_LEVEL"),
                         format=env("LOG_FORMAT")),
         parser=ParserSettings(base_url=env("PARSER_BASE_URL")),
+        report=ReportSettings(cache_mb=env.int('REPORT_CACHE_MB', default=64),
+                              prerender_workers=env.int('REPORT_PRERENDER_WORKERS', default=2),
+                              workers=env.int('REPORT_WORKERS', default=4),
+                              worker_processes=env.bool('REPORT_WORKER_PROCESSES', default=False)),
     )
@@ -1,2 +1,7 @@
 from .db import Database, create_db_connection
-from .models import FilterCombination, Statistics
+from .models import (
+    FilterCombination, Statistics, LookupValue, CombinationSummary, CombinationSketch,
+    CrawlRun, CrawlFailure, MaintenanceStat, RenderedReport,
+    Applicant, AdmissionCategory, PARTICIPANT_CONDITION, CURRENT_GENERATION,
+    CURRENT_STATISTICS
+)
@@ -0,0 +1,151 @@
+import logging
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from .db import Database
+
+logger = logging.getLogger(__name__)
+
+# Схема hive-партиций архива: crawl_date=YYYY-MM-DD/level_value=N
+PARTITIONING = ds.partitioning(
+    pa.schema([('crawl_date', pa.date32()), ('level_value', pa.int32())]),
+    flavor='hive'
+)
+
+
+class HistoryArchive:
+    """
+    Холодное хранилище прошлых парсингов в Parquet-файлах на диске
+
+    Поколения, которые больше не хранятся в PostgreSQL, выгружаются
+    в колоночный формат с разбиением по дате парсинга и уровню образования.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 100_000):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+
+    def compact(self, db: Database) -> bool:
+        """
+        Выгрузить устаревающие поколения в архив и удалить их из БД
+
+        Returns:
+            True, если все поколения выгружены и БД очищена
+        """
+        generations = db.get_expiring_generations()
+        try:
+            for generation_id, crawl_date in generations:
+                rows = self.export_generation(db, generation_id, crawl_date)
+                logger.info(
+                    f"✅ Поколение {generation_id} ({crawl_date}) выгружено в архив: {rows} записей")
+        except Exception as e:
+            logger.error(f"❌ Ошибка при выгрузке в архив: {e}")
+            return False
+
+        db.purge_generations()
+        return True
+
+    def export_generation(self, db: Database, generation_id: int, crawl_date: date) -> int:
+        """
+        Записать одно поколение в Parquet
+
+        Файлы называются по id поколения, поэтому повторная выгрузка
+        перезаписывает их, а не дублирует данные.
+
+        Returns:
+            Количество выгруженных записей
+        """
+        total = 0
+        batches = db.iter_generation_rows(generation_id, crawl_date, self.chunk_size)
+        for chunk_idx, rows in enumerate(batches):
+            df = pd.DataFrame.from_records(rows, columns=list(rows[0]._fields))
+            df['crawl_date'] = pd.to_datetime(df['crawl_date']).dt.date
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pq.write_to_dataset(
+                table,
+                root_path=str(self.path),
+                partitioning=PARTITIONING,
+                basename_template=f"gen{generation_id}-{chunk_idx}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore',
+            )
+            total += len(df)
+        return total
+
+    def read(
+        self,
+        columns: list[str] | None = None,
+        levels: list[int] | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        filters: dict[str, int] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Прочитать архивные записи
+
+        Args:
+            columns: Нужные колонки (None - все)
+            levels: value уровней образования
+            date_from, date_to: Диапазон дат парсинга включительно
+            filters: Равенства по колонкам, например {'faculty_value': 5}
+
+        Returns:
+            DataFrame с записями (пустой, если архива нет)
+        """
+        if not self.path.exists():
+            return pd.DataFrame(columns=columns or [])
+
+        dataset = ds.dataset(self.path, format='parquet',
+                             partitioning=PARTITIONING)
+        expression = None
+        conditions = []
+        if levels:
+            conditions.append(ds.field('level_value').isin(levels))
+        if date_from:
+            conditions.append(ds.field('crawl_date') >= date_from)
+        if date_to:
+            conditions.append(ds.field('crawl_date') <= date_to)
+        for column, value in (filters or {}).items():
+            conditions.append(ds.field(column) == value)
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    def speciality_trend(self, filters: dict) -> pd.DataFrame:
+        """
+        Динамика направления по архивным дням
+
+        Args:
+            filters: value фильтров направления (level, inst, faculty,
+                speciality, typeofstudy, category)
+
+        Returns:
+            DataFrame с колонками crawl_date, total_count,
+            participants_count, agreed_count
+        """
+        df = self.read(
+            columns=['crawl_date', 'exams_failed', 'agreement'],
+            levels=[int(filters['level'])],
+            filters={
+                'inst_value': int(filters['inst']),
+                'faculty_value': int(filters['faculty']),
+                'speciality_value': int(filters['speciality']),
+                'typeofstudy_value': int(filters['typeofstudy']),
+                'category_value': int(filters['category']),
+            },
+        )
+        if df.empty:
+            return pd.DataFrame(columns=['crawl_date', 'total_count',
+                                         'participants_count', 'agreed_count'])
+
+        df['participant'] = ~df['exams_failed']
+        df['agreed'] = df['participant'] & df['agreement']
+        return df.groupby('crawl_date', as_index=False).agg(
+            total_count=('participant', 'size'),
+            participants_count=('participant', 'sum'),
+            agreed_count=('agreed', 'sum'),
+        )
@@ -0,0 +1,108 @@
+from typing import Iterable
+
+import numpy as np
+
+# Ключи делятся на блоки по 2^16 значений (старшие биты - номер блока)
+_BLOCK_BITS = 16
+_LOW_MASK = (1 << _BLOCK_BITS) - 1
+# Блок с большим числом ключей хранится битовой картой (8 КБ), иначе - массивом uint16
+_ARRAY_LIMIT = 4096
+_BITMAP_BYTES = (1 << _BLOCK_BITS) // 8
+
+
+def _block_size(block: np.ndarray) -> int:
+    """Число ключей в блоке"""
+    if block.dtype == np.uint16:
+        return len(block)
+    return int(np.bitwise_count(block).sum())
+
+
+class ApplicantBitmap:
+    """
+    Сжатое множество целочисленных id абитуриентов (по схеме Roaring)
+
+    Каждый блок из 2^16 id хранится отсортированным массивом uint16,
+    если ключей в нем мало, или битовой картой на 65536 бит, если много.
+    Множество комбинации занимает около двух байт на абитуриента и
+    восстанавливается в массив NumPy без чтения statistics.
+    """
+    __slots__ = ('blocks',)
+
+    def __init__(self, blocks: dict[int, np.ndarray] | None = None):
+        """
+        Args:
+            blocks: {номер блока: массив uint16 или битовая карта uint8}
+        """
+        self.blocks = blocks or {}
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[int]) -> 'ApplicantBitmap':
+        """Построить множество по целочисленным ключам"""
+        keys = np.unique(np.fromiter(keys, dtype=np.int64))
+        if len(keys) and keys[0] < 0:
+            raise ValueError("id абитуриента не может быть отрицательным")
+        high = keys >> _BLOCK_BITS
+        low = (keys & _LOW_MASK).astype(np.uint16)
+        block_ids, starts = np.unique(high, return_index=True)
+
+        blocks = {}
+        for block_id, values in zip(block_ids.tolist(), np.split(low, starts[1:])):
+            if len(values) < _ARRAY_LIMIT:
+                blocks[block_id] = values
+            else:
+                bits = np.zeros(1 << _BLOCK_BITS, dtype=bool)
+                bits[values] = True
+                blocks[block_id] = np.packbits(bits, bitorder='little')
+        return cls(blocks)
+
+    def __len__(self) -> int:
+        return sum(map(_block_size, self.blocks.values()))
+
+    def to_array(self) -> np.ndarray:
+        """Отсортированный массив id (int64)"""
+        parts = []
+        for block_id in sorted(self.blocks):
+            block = self.blocks[block_id]
+            if block.dtype != np.uint16:
+                block = np.flatnonzero(np.unpackbits(block, bitorder='little'))
+            parts.append((block_id << _BLOCK_BITS) + block.astype(np.int64))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def to_bytes(self) -> bytes:
+        """
+        Сериализовать множество
+
+        Формат: число блоков (uint32), номера блоков и число ключей минус
+        один (uint16), затем содержимое блоков по порядку номеров.
+        """
+        block_ids = sorted(self.blocks)
+        blocks = [self.blocks[block_id] for block_id in block_ids]
+        sizes = np.array([_block_size(block) for block in blocks], dtype=np.int64)
+        header = (np.array([len(blocks)], dtype='<u4').tobytes()
+                  + np.array(block_ids, dtype='<u2').tobytes()
+                  + (sizes - 1).astype('<u2').tobytes())
+        return header + b''.join(
+            block.astype('<u2' if block.dtype == np.uint16 else np.uint8).tobytes()
+            for block in blocks)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ApplicantBitmap':
+        """Восстановить множество из to_bytes"""
+        count = int(np.frombuffer(data, dtype='<u4', count=1)[0])
+        offset = 4
+        block_ids = np.frombuffer(data, dtype='<u2', count=count, offset=offset)
+        offset += 2 * count
+        sizes = np.frombuffer(data, dtype='<u2', count=count, offset=offset).astype(np.int64) + 1
+        offset += 2 * count
+
+        blocks = {}
+        for block_id, size in zip(block_ids.tolist(), sizes.tolist()):
+            if size < _ARRAY_LIMIT:
+                blocks[block_id] = np.frombuffer(
+                    data, dtype='<u2', count=size, offset=offset).astype(np.uint16)
+                offset += 2 * size
+            else:
+                blocks[block_id] = np.frombuffer(
+                    data, dtype=np.uint8, count=_BITMAP_BYTES, offset=offset)
+                offset += _BITMAP_BYTES
+        return cls(blocks)
@@ -1,31 +1,228 @@
+import copy
 import logging
 
-from sqlalchemy import create_engine
+from typing import Iterator
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine, func, insert, inspect, literal, select, text, tuple_
 from sqlalchemy.orm import sessionmaker, Session
 
 from config.config import Config
-from .models import Base, FilterCombination, Statistics
+from .filter_cache import FilterTree
+from .bitmap import ApplicantBitmap
+from .hyperloglog import HyperLogLog
+from . import queries
+from .queries import CombinationKey
+from .summary import summarize_combination
+from .models import (
+    Base, FilterCombination, Statistics, LookupValue, AdmissionCategory, Applicant,
+    CombinationSummary, CombinationSketch, CrawlRun, CrawlFailure, RenderedReport, CURRENT_GENERATION,
+    CURRENT_CRAWL_DATE, partition_name,
+    LEGACY_INDEXES, parse_agreement, is_exams_failed, applicant_natural_key
+)
 
 logger = logging.getLogger(__name__)
 
+# Производные таблицы: агрегаты заново считаются из statistics при публикации
+# поколения, поэтому при изменении схемы их можно пересоздать
+REBUILDABLE_TABLES = (CombinationSummary.__table__, CombinationSketch.__table__)
+
+# Таблицы с историей парсингов: их схема меняется только миграцией
+MIGRATED_TABLES = (Statistics.__table__,)
+
+# Суффикс, с которым откладывается statistics прежней версии (см. README)
+LEGACY_TABLE_SUFFIX = '_legacy'
+
+# Агрегаты комбинаций, которые хранятся отдельно для каждого поколения
+AGGREGATE_MODELS = (CombinationSummary, CombinationSketch)
+
 
 class Database:
     """Класс для работы с БД"""
 
-    def __init__(self, db_url: str):
+    def __init__(
+        self,
+        db_url: str,
+        history_days: int = 0,
+        read_url: str | None = None,
+        carry_over_generations: int = 3
+    ):
+        """
+        Args:
+            db_url: URL подключения к БД (запись и парсер)
+            history_days: Сколько дней хранить данные прошлых парсингов
+                (0 - хранить только последний парсинг)
+            read_url: URL узла для чтения отчетов, например реплики
+                (None - читать через db_url)
+            carry_over_generations: Сколько поколений подряд копировать данные
+                комбинации, которую не удалось загрузить (0 - не копировать)
+        """
         self.engine = create_engine(db_url, echo=False)
+        self.read_engine = self._create_read_engine(read_url) if read_url else self.engine
+        self.history_days = history_days
+        self.carry_over_generations = carry_over_generations
         self.SessionLocal = sessionmaker(
             bind=self.engine, expire_on_commit=False)
+        self.ReadSessionLocal = sessionmaker(
+            bind=self.read_engine, expire_on_commit=False)
+        self.filter_tree: FilterTree | None = None
+        self._lookup_ids: dict[tuple[str, str], int] = {}
+        self._applicant_ids: dict[tuple[str, str], int] = {}
 
     def init_db(self):
         """Создать все таблицы"""
+        self._rebuild_outdated_tables()
         Base.metadata.create_all(self.engine)
+        self._create_missing_indexes()
+        self._drop_legacy_indexes()
         logger.info("✅ База данных инициализирована")
 
+    def _rebuild_outdated_tables(self):
+        """
+        Пересоздать производные таблицы, колонки которых не совпадают с моделью
+
+        Таблицы с историей (MIGRATED_TABLES) не удаляются. Таблица прежней
+        версии без поколений (_is_legacy_layout) - один снимок без истории:
+        она переименовывается в <имя>_legacy и создается заново. При другом
+        расхождении схемы запуск прерывается.
+
+        Raises:
+            RuntimeError: Схема таблицы из MIGRATED_TABLES устарела, или
+                отложенная таблица прежней версии уже существует
+        """
+        inspector = inspect(self.engine)
+        for table in MIGRATED_TABLES:
+            if not inspector.has_table(table.name):
+                continue
+            if self._is_legacy_layout(inspector, table):
+                self._set_aside_legacy_table(inspector, table)
+                continue
+            columns = {c['name'] for c in inspector.get_columns(table.name)}
+            missing = sorted(set(table.columns.keys()) - columns)
+            extra = sorted(columns - set(table.columns.keys()))
+            if missing or extra:
+                message = (
+                    f"Схема таблицы {table.name} устарела "
+                    f"(нет колонок: {', '.join(missing) or '-'}; "
+                    f"лишние колонки: {', '.join(extra) or '-'}). "
+                    f"Таблица хранит историю парсингов и не пересоздается "
+                    f"автоматически: перенесите ее данные вручную "
+                    f"(README, раздел \"Обновление с прежней версии\")")
+                logger.error(f"❌ {message}")
+                raise RuntimeError(message)
+
+        for table in REBUILDABLE_TABLES:
+            if not inspector.has_table(table.name):
+                continue
+            columns = {c['name'] for c in inspector.get_columns(table.name)}
+            if columns != set(table.columns.keys()):
+                logger.warning(
+                    f"⚠️ Схема таблицы {table.name} устарела, таблица будет пересоздана")
+                table.drop(self.engine)
+
+    def _is_legacy_layout(self, inspector, table) -> bool:
+        """
+        Таблица прежней версии, которую нельзя привести к модели через ALTER TABLE
+
+        Это statistics без поколений (до появления generation_id) или,
+        в PostgreSQL, обычная таблица вместо секционированной по crawl_date:
+        секционирование существующей таблице не добавить.
+        """
+        columns = {c['name'] for c in inspector.get_columns(table.name)}
+        if 'generation_id' not in columns:
+            return True
+        if self._is_postgresql() and table.dialect_options['postgresql']['partition_by']:
+            with self.engine.connect() as conn:
+                return not conn.execute(text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = to_regclass(:name))"), {'name': table.name}).scalar()
+        return False
+
+    def _set_aside_legacy_table(self, inspector, table):
+        """
+        Переименовать таблицу прежней версии в <имя>_legacy
+
+        Имена индексов, первичного ключа и последовательности id общие
+        для схемы, поэтому индексы отложенной таблицы удаляются, а ключ
+        и последовательность переименовываются: иначе новая таблица
+        не создастся. Данные остаются в <имя>_legacy до ручного удаления.
+        """
+        legacy_name = f"{table.name}{LEGACY_TABLE_SUFFIX}"
+        if inspector.has_table(legacy_name):
+            message = (f"Таблица {table.name} прежней версии, но {legacy_name} уже "
+                       f"существует: удалите или переименуйте {legacy_name} и перезапустите")
+            logger.error(f"❌ {message}")
+            raise RuntimeError(message)
+
+        indexes = [index['name'] for index in inspector.get_indexes(table.name)]
+        primary_key = inspector.get_pk_constraint(table.name).get('name')
+        with self.engine.begin() as conn:
+            for index_name in indexes:
+                conn.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+            conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{legacy_name}"'))
+            if self._is_postgresql():
+                if primary_key:
+                    conn.execute(text(
+                        f'ALTER TABLE "{legacy_name}" RENAME CONSTRAINT "{primary_key}" '
+                        f'TO "{legacy_name}_pkey"'))
+                sequence = conn.execute(text("SELECT pg_get_serial_sequence(:name, 'id')"),
+                                        {'name': legacy_name}).scalar()
+                if sequence:
+                    conn.execute(text(
+                        f'ALTER SEQUENCE {sequence} RENAME TO "{legacy_name}_id_seq"'))
+        logger.warning(
+            f"⚠️ Таблица {table.name} прежней версии переименована в {legacy_name}, "
+            f"создается новая. Данные из {legacy_name} не переносятся")
+
+    def _create_missing_indexes(self):
+        """Создать индексы, добавленные в модели после создания таблиц"""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+
+    def _drop_legacy_indexes(self):
+        """Удалить индексы прежней схемы, замедляющие загрузку данных"""
+        if self.engine.dialect.name != 'postgresql':
+            return
+        with self.engine.begin() as conn:
+            for index_name in LEGACY_INDEXES:
+                conn.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+
+    def _create_read_engine(self, read_url: str):
+        """Отдельный движок со своим пулом соединений для чтения"""
+        engine = create_engine(read_url, echo=False)
+        if engine.dialect.name == 'postgresql':
+            # Транзакции только на чтение: запись через этот узел - ошибка,
+            # даже если он указывает на тот же сервер, что и db_url
+            engine = engine.execution_options(postgresql_readonly=True)
+        return engine
+
     def get_session(self) -> Session:
         """Получить новую сессию"""
         return self.SessionLocal()
 
+    def get_read_session(self) -> Session:
+        """
+        Получить сессию для чтения отчетов
+
+        Сессия работает через read_engine, поэтому запросы бота не занимают
+        соединения пула, через который парсер загружает данные.
+        """
+        return self.ReadSessionLocal()
+
+    def primary_reader(self) -> 'Database':
+        """
+        Экземпляр, который читает отчеты через основной узел
+
+        Нужен сразу после публикации поколения: реплика может отставать
+        и еще отдавать прошлое поколение. Движки и кэши общие с self.
+        """
+        if self.read_engine is self.engine:
+            return self
+        primary = copy.copy(self)
+        primary.read_engine = self.engine
+        primary.ReadSessionLocal = self.SessionLocal
+        return primary
+
     def get_or_create_filter_combination(self, filters_dict: dict) -> FilterCombination:
         """
         Получить комбинацию фильтров или создать новую
@@ -82,61 +279,585 @@ class Database:
         finally:
             session.close()
 
-    def get_all_filter_combinations(self) -> list[FilterCombination]:
-        """Получить все комбинации фильтров"""
+    def get_all_filter_combinations(self) -> list[CombinationKey]:
+        """Получить id и value фильтров всех комбинаций"""
+        combos = list(self.iter_filter_combinations())
+        logger.info(f"✅ Получено {len(combos)} комбинаций")
+        return combos
+
+    def count_filter_combinations(self) -> int:
+        """Количество комбинаций фильтров"""
+        session = self.get_session()
+        try:
+            return session.query(func.count(FilterCombination.id)).scalar() or 0
+        except Exception as e:
+            logger.error(f"❌ Ошибка при подсчете комбинаций: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def iter_filter_combinations(self, batch_size: int = 500) -> Iterator[CombinationKey]:
+        """
+        Перебрать все комбинации фильтров страницами по batch_size
+
+        Каждая страница читается отдельной короткой сессией по условию
+        id > последнего id (keyset-пагинация), поэтому долгий обход парсером
+        не держит открытой транзакцию и курсор, а память не зависит
+        от числа комбинаций.
+
+        Yields:
+            CombinationKey в порядке id
+
+        Raises:
+            Exception: Ошибка БД при чтении страницы. Обход не обрывается
+                молча: иначе парсер опубликовал бы неполное поколение
+        """
+        last_id = 0
+        while True:
+            session = self.get_session()
+            try:
+                rows = session.execute(
+                    queries.combination_keys(last_id, batch_size)).all()
+            except Exception as e:
+                logger.error(f"❌ Ошибка при получении комбинаций: {e}")
+                raise
+            finally:
+                session.close()
+
+            for row in rows:
+                yield CombinationKey(*row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1].id
+
+    def stream_rows(self, statement, batch_size: int = 10_000) -> Iterator[list]:
+        """
+        Выполнить запрос с серверным курсором и отдавать строки пачками
+
+        В PostgreSQL используется именованный курсор (stream_results), и
+        в памяти одновременно находится не больше batch_size строк.
+
+        Args:
+            statement: Запрос select
+            batch_size: Количество строк в пачке
+
+        Yields:
+            Списки Row длиной не больше batch_size
+        """
+        with self.engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(statement)
+            for partition in result.partitions():
+                yield partition
+
+    def iter_generation_rows(
+        self,
+        generation_id: int,
+        crawl_date: date,
+        batch_size: int = 10_000
+    ) -> Iterator[list]:
+        """
+        Потоково прочитать записи поколения для выгрузки
+
+        Yields:
+            Пачки строк queries.generation_rows
+        """
+        yield from self.stream_rows(
+            queries.generation_rows(generation_id, crawl_date), batch_size)
+
+    def start_generation(self) -> int:
+        """
+        Начать новое поколение данных
+
+        Returns:
+            id поколения (CrawlRun), в которое сохраняет данные парсер
+        """
+        session = self.get_session()
+        try:
+            run = CrawlRun(status='loading', crawl_date=date.today())
+            session.add(run)
+            self._ensure_partition(session, run.crawl_date)
+            session.commit()
+            logger.info(f"✅ Начато поколение данных {run.id}")
+            return run.id
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Ошибка при создании поколения: {e}")
+            raise
+        finally:
+            session.close()
+
+    def publish_generation(self, generation_id: int, records_count: int = 0) -> bool:
+        """
+        Сделать поколение текущим
+
+        Комбинации, загрузка которых не удалась (record_crawl_failure),
+        копируются из предыдущего поколения. Переключение выполняется одной транзакцией, поэтому
+        читатели видят либо старое поколение целиком, либо новое.
+        """
+        session = self.get_session()
+        try:
+            previous_id = session.execute(
+                select(CrawlRun.id).where(CrawlRun.status == 'current')
+            ).scalar()
+
+            if previous_id is not None:
+                self._copy_missing_combinations(
+                    session, previous_id, generation_id)
+
+            session.query(CrawlRun).filter(
+                CrawlRun.id == previous_id
+            ).update({'status': 'retired'})
+            session.flush()
+            session.query(CrawlRun).filter(
+                CrawlRun.id == generation_id
+            ).update({
+                'status': 'current',
+                'finished_at': datetime.utcnow(),
+                'records_count': records_count,
+            })
+            session.commit()
+            logger.info(
+                f"✅ Поколение {generation_id} стало текущим (предыдущее: {previous_id})")
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Ошибка при публикации поколения: {e}")
+            return False
+        finally:
+            session.close()
+
+    def record_crawl_failure(self, generation_id: int, combo_id: int):
+        """
+        Отметить, что комбинацию не удалось загрузить в поколение
+
+        При публикации поколения данные таких комбинаций копируются
+        из предыдущего (не больше carry_over_generations поколений подряд).
+        """
+        session = self.get_session()
+        try:
+            session.merge(CrawlFailure(generation_id=generation_id,
+                                       filter_combination_id=combo_id,
+                                       carried_over=0))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Ошибка при отметке неудачной комбинации {combo_id}: {e}")
+        finally:
+            session.close()
+
+    def _copy_missing_combinations(self, session: Session, source_id: int, target_id: int):
+        """
+        Скопировать из source_id данные комбинаций, которые не удалось загрузить в target_id
+
+        Копируются только комбинации из CrawlFailure поколения target_id.
+        Если данные комбинации уже копировались carry_over_generations
+        поколений подряд, они устарели и больше не копируются.
+        """
+        failures = session.query(CrawlFailure).filter(
+            CrawlFailure.generation_id == target_id).all()
+        if not failures:
+            return
+        # Комбинация могла загрузиться, а ошибка случиться уже после сохранения
+        loaded = set(session.execute(
+            select(CombinationSummary.filter_combination_id).where(
+                CombinationSummary.generation_id == target_id,
+                CombinationSummary.filter_combination_id.in_(
+                    [failure.filter_combination_id for failure in failures]))
+        ).scalars())
+        carried = dict(session.execute(
+            select(CrawlFailure.filter_combination_id, CrawlFailure.carried_over).where(
+                CrawlFailure.generation_id == source_id)
+        ).all())
+
+        copy_ids, expired_ids = [], []
+        for failure in failures:
+            if failure.filter_combination_id in loaded:
+                continue
+            carried_over = carried.get(failure.filter_combination_id, 0) + 1
+            if carried_over > self.carry_over_generations:
+                expired_ids.append(failure.filter_combination_id)
+                continue
+            failure.carried_over = carried_over
+            copy_ids.append(failure.filter_combination_id)
+
+        if expired_ids:
+            logger.warning(
+                f"⚠️ Данные {len(expired_ids)} комбинаций не обновлялись "
+                f"{self.carry_over_generations} поколений подряд и больше не копируются: "
+                f"{expired_ids}")
+        if not copy_ids:
+            return
+        logger.info(
+            f"♻️ Данные {len(copy_ids)} незагруженных комбинаций копируются "
+            f"из поколения {source_id}: {copy_ids}")
+
+        source_date, target_date = (session.get(CrawlRun, generation_id).crawl_date
+                                    for generation_id in (source_id, target_id))
+        statistics_columns = [c for c in Statistics.__table__.columns
+                              if c.name not in ('id', 'crawl_date', 'generation_id')]
+        session.execute(insert(Statistics).from_select(
+            ['crawl_date', 'generation_id'] +
+            [c.name for c in statistics_columns],
+            select(literal(target_date), literal(target_id), *statistics_columns).where(
+                Statistics.crawl_date == source_date,
+                Statistics.generation_id == source_id,
+                Statistics.filter_combination_id.in_(copy_ids))
+        ))
+
+        for model in AGGREGATE_MODELS:
+            aggregate_columns = [c for c in model.__table__.columns
+                                 if c.name != 'generation_id']
+            session.execute(insert(model).from_select(
+                ['generation_id'] + [c.name for c in aggregate_columns],
+                select(literal(target_id), *aggregate_columns).where(
+                    model.generation_id == source_id,
+                    model.filter_combination_id.in_(copy_ids))
+            ))
+
+    def fail_generation(self, generation_id: int):
+        """Пометить поколение как неудачное, его данные удалит purge_generations"""
+        session = self.get_session()
+        try:
+            session.query(CrawlRun).filter(
+                CrawlRun.id == generation_id
+            ).update({'status': 'failed', 'finished_at': datetime.utcnow()})
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Ошибка при отметке поколения: {e}")
+        finally:
+            session.close()
+
+    def purge_generations(self) -> int:
+        """
+        Удалить данные устаревших и неудачных поколений
+
+        Партиции statistics старше срока хранения удаляются целиком,
+        оставшиеся записи старых поколений удаляются через DELETE.
+        В режиме истории (history_days > 0) прошлые успешные поколения
+        хранятся history_days дней.
+
+        Returns:
+            Количество удаленных через DELETE записей statistics
+        """
         session = self.get_session()
         try:
-            combos = session.query(FilterCombination).all()
-            logger.info(f"✅ Получено {len(combos)} комбинаций")
-            return combos
+            keep_from = self._get_keep_from(session)
+            if keep_from is None:
+                return 0
+            stale_statuses = ('failed',) if self.history_days else (
+                'retired', 'failed')
+
+            expired = select(CrawlRun.id).where(
+                CrawlRun.status.in_(('retired', 'failed')),
+                CrawlRun.crawl_date < keep_from)
+            stale = select(CrawlRun.id).where(
+                CrawlRun.status.in_(stale_statuses),
+                CrawlRun.crawl_date >= keep_from)
+
+            for model in (*AGGREGATE_MODELS, CrawlFailure, RenderedReport):
+                session.query(model).filter(
+                    model.generation_id.in_(expired.union(stale))
+                ).delete(synchronize_session=False)
+
+            if self._is_postgresql():
+                self.drop_partitions(session, keep_from)
+            else:
+                session.query(Statistics).filter(
+                    Statistics.generation_id.in_(expired)
+                ).delete(synchronize_session=False)
+
+            deleted = session.query(Statistics).filter(
+                Statistics.crawl_date >= keep_from,
+                Statistics.generation_id.in_(stale)
+            ).delete(synchronize_session=False)
+
+            session.query(CrawlRun).filter(
+                CrawlRun.id.in_(expired.union(stale))
+            ).update({'status': 'dropped'}, synchronize_session=False)
+
+            session.commit()
+            logger.info(f"✅ Удалено {deleted} записей старых поколений")
+            return deleted
         except Exception as e:
-            logger.error(f"❌ Ошибка при получении комбинаций: {e}")
+            session.rollback()
+            logger.error(f"❌ Ошибка при удалении старых поколений: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def _get_keep_from(self, session: Session) -> date | None:
+        """Дата, начиная с которой данные хранятся в БД (None - нет текущего поколения)"""
+        current_date = session.execute(select(CURRENT_CRAWL_DATE)).scalar()
+        if current_date is None:
+            return None
+        if self.history_days:
+            return min(current_date, date.today() - timedelta(days=self.history_days))
+        return current_date
+
+    def get_expiring_generations(self) -> list[tuple[int, date]]:
+        """
+        Получить успешные поколения, которые purge_generations удалит из БД
+
+        Returns:
+            Список (id поколения, дата парсинга)
+        """
+        session = self.get_session()
+        try:
+            keep_from = self._get_keep_from(session)
+            if keep_from is None:
+                return []
+            return [tuple(row) for row in session.query(
+                CrawlRun.id, CrawlRun.crawl_date
+            ).filter(
+                CrawlRun.status == 'retired',
+                CrawlRun.crawl_date < keep_from,
+            ).order_by(CrawlRun.id).all()]
+        finally:
+            session.close()
+
+    def _is_postgresql(self) -> bool:
+        return self.engine.dialect.name == 'postgresql'
+
+    def _ensure_partition(self, session: Session, crawl_date: date):
+        """Создать партицию statistics для даты парсинга"""
+        if not self._is_postgresql():
+            return
+        name = partition_name(crawl_date)
+        session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF statistics '
+            f"FOR VALUES FROM ('{crawl_date.isoformat()}') "
+            f"TO ('{(crawl_date + timedelta(days=1)).isoformat()}')"
+        ))
+
+    def list_partitions(self, session: Session) -> list[tuple[str, date]]:
+        """
+        Получить партиции statistics
+
+        Returns:
+            Список (имя партиции, дата парсинга), отсортированный по дате
+        """
+        rows = session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'statistics'"
+        )).scalars().all()
+        partitions = []
+        for name in rows:
+            try:
+                partitions.append(
+                    (name, datetime.strptime(name[-8:], '%Y%m%d').date()))
+            except ValueError:
+                logger.warning(f"⚠️ Неизвестная партиция {name}")
+        return sorted(partitions, key=lambda p: p[1])
+
+    def drop_partitions(self, session: Session, before: date, detach: bool = False) -> list[str]:
+        """
+        Удалить или отсоединить партиции statistics старше даты
+
+        Args:
+            session: Сессия, в транзакции которой выполняется операция
+            before: Партиции с датой раньше этой удаляются
+            detach: Отсоединить партиции вместо удаления (таблицы остаются)
+
+        Returns:
+            Имена удаленных (отсоединенных) партиций
+        """
+        names = [name for name, crawl_date in self.list_partitions(session)
+                 if crawl_date < before]
+        for name in names:
+            if detach:
+                session.execute(
+                    text(f'ALTER TABLE statistics DETACH PARTITION "{name}"'))
+            else:
+                session.execute(text(f'DROP TABLE "{name}"'))
+        if names:
+            logger.info(
+                f"✅ {'Отсоединены' if detach else 'Удалены'} партиции: {', '.join(names)}")
+        return names
+
+    def get_combination_history(self, combo_id: int) -> list[tuple]:
+        """
+        Получить агрегаты комбинации по всем хранимым поколениям
+
+        Returns:
+            Список строк (crawl_date, admission_category,
+            total_count, participants_count, agreed_count, available_places,
+            score_min), отсортированный по дате
+        """
+        session = self.get_read_session()
+        try:
+            return session.query(
+                CrawlRun.crawl_date,
+                CombinationSummary.admission_category,
+                CombinationSummary.total_count,
+                CombinationSummary.participants_count,
+                CombinationSummary.agreed_count,
+                CombinationSummary.available_places,
+                CombinationSummary.score_min,
+            ).join(
+                CrawlRun, CrawlRun.id == CombinationSummary.generation_id
+            ).filter(
+                CombinationSummary.filter_combination_id == combo_id,
+                CrawlRun.status.in_(('current', 'retired')),
+            ).order_by(
+                CrawlRun.crawl_date,
+                CombinationSummary.admission_category
+            ).all()
+        except Exception as e:
+            logger.error(f"❌ Ошибка при получении истории комбинации: {e}")
             return []
         finally:
             session.close()
 
+    def get_current_generation(self) -> int | None:
+        """Получить id текущего поколения данных"""
+        session = self.get_read_session()
+        try:
+            return session.execute(select(CURRENT_GENERATION)).scalar()
+        finally:
+            session.close()
+
+    def get_applicant_positions(self, identifier: str) -> list:
+        """
+        Получить заявления абитуриента в текущем поколении
+
+        Args:
+            identifier: epgu_id или applicant_id
+
+        Returns:
+            Строки queries.applicant_positions (пустой список, если не найдено)
+        """
+        session = self.get_read_session()
+        try:
+            return session.execute(queries.applicant_positions(identifier)).all()
+        except Exception as e:
+            logger.error(f"❌ Ошибка при поиске абитуриента: {e}")
+            return []
+        finally:
+            session.close()
+
+    def get_rendered_report(self, generation_id: int, kind: str, filters_key: str) -> bytes | None:
+        """
+        Получить заранее построенный отчет
+
+        Args:
+            generation_id: Поколение данных
+            kind: Тип анализа
+            filters_key: Нормализованные фильтры (ReportCache.filters_key)
+
+        Returns:
+            Содержимое файла или None, если отчет не построен
+        """
+        session = self.get_read_session()
+        try:
+            return session.execute(select(RenderedReport.content).where(
+                RenderedReport.generation_id == generation_id,
+                RenderedReport.kind == kind,
+                RenderedReport.filters_key == filters_key,
+            )).scalar()
+        except Exception as e:
+            logger.error(f"❌ Ошибка при чтении готового отчета: {e}")
+            return None
+        finally:
+            session.close()
+
+    def save_rendered_reports(self, generation_id: int, reports: list[tuple[str, str, bytes]]) -> int:
+        """
+        Сохранить заранее построенные отчеты поколения
+
+        Args:
+            generation_id: Поколение данных
+            reports: Список (kind, filters_key, content)
+
+        Returns:
+            Количество сохраненных отчетов
+        """
+        if not reports:
+            return 0
+        session = self.get_session()
+        try:
+            session.execute(insert(RenderedReport), [{
+                'generation_id': generation_id,
+                'kind': kind,
+                'filters_key': filters_key,
+                'content': content,
+            } for kind, filters_key, content in reports])
+            session.commit()
+            return len(reports)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Ошибка при сохранении готовых отчетов: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def clear_rendered_reports(self) -> int:
+        """
+        Удалить все заранее построенные отчеты перед новым построением
+
+        Returns:
+            Количество удаленных отчетов
+        """
+        session = self.get_session()
+        try:
+            deleted = session.query(RenderedReport).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Ошибка при удалении готовых отчетов: {e}")
+            return 0
+        finally:
+            session.close()
+
     async def save_data_batch(
         self,
         records: list[dict],
-        combo: FilterCombination
+        combo: FilterCombination | CombinationKey,
+        generation_id: int
     ) -> int:
         """
-        Сохранить данные
+        Сохранить данные комбинации в поколение
 
         Args:
             records: Список словарей с данными строк таблицы
-            combo: Объект FilterCombination
+            combo: FilterCombination или CombinationKey
+            generation_id: id загружаемого поколения (start_generation)
 
         Returns:
             Количество сохраненных записей
         """
         session = self.get_session()
         try:
+            crawl_date = session.get(CrawlRun, generation_id).crawl_date
             session.query(Statistics).filter(
+                Statistics.crawl_date == crawl_date,
+                Statistics.generation_id == generation_id,
                 Statistics.filter_combination_id == combo.id
             ).delete()
+            for model in AGGREGATE_MODELS:
+                session.query(model).filter(
+                    model.generation_id == generation_id,
+                    model.filter_combination_id == combo.id
+                ).delete()
 
-            count = 0
-            for record in records:
-                score = None
-                if record.get('score'):
-                    try:
-                        score = int(record['score'])
-                    except (ValueError, TypeError):
-                        score = None
-                row = Statistics(
-                    filter_combination_id=combo.id,
-                    admission_category=record.get('admission_category'),
-                    available_places=record.get('available_places'),
-                    epgu_id=record.get('epgu_id'),
-                    applicant_id=record.get('applicant_id'),
-                    score=score,
-                    agreement=record.get('agreement'),
-                    status=record.get('status'),
-                    note=record.get('note'),
-                )
-                session.add(row)
-                count += 1
+            applicant_ids = self._get_applicant_ids(session, records)
+            rows = [self._encode_record(session, record, combo.id, generation_id,
+                                        crawl_date, applicant_ids)
+                    for record in records]
+            session.add_all(rows)
+            session.add_all(
+                CombinationSummary(generation_id=generation_id,
+                                   filter_combination_id=combo.id, **summary)
+                for summary in summarize_combination(
+                    rows, [record.get('admission_category') for record in records])
+            )
+            session.add(self._build_sketch(rows, combo.id, generation_id))
+            count = len(rows)
 
             session.commit()
             logger.info(
@@ -145,35 +866,179 @@ class Database:
 
         except Exception as e:
             session.rollback()
+            self._lookup_ids.clear()
+            self._applicant_ids.clear()
             logger.error(f"❌ Ошибка при сохранении: {e}")
+            self.record_crawl_failure(generation_id, combo.id)
             return 0
         finally:
             session.close()
 
-    def get_levels(self) -> list[tuple[int, str]]:
+    def _encode_record(
+        self,
+        session: Session,
+        record: dict,
+        combo_id: int,
+        generation_id: int,
+        crawl_date: date,
+        applicant_ids: dict[tuple[str, str], int]
+    ) -> Statistics:
+        """Преобразовать строку парсера в запись Statistics с кодами вместо строк"""
+        score = None
+        if record.get('score'):
+            try:
+                score = int(record['score'])
+            except (ValueError, TypeError):
+                score = None
+        note = record.get('note')
+        applicant = applicant_natural_key(record)
+        return Statistics(
+            crawl_date=crawl_date,
+            generation_id=generation_id,
+            filter_combination_id=combo_id,
+            admission_category=AdmissionCategory.from_label(
+                record.get('admission_category')),
+            available_places=record.get('available_places'),
+            applicant_key=applicant_ids[applicant] if applicant else None,
+            score=score,
+            agreement=parse_agreement(record.get('agreement')),
+            status_id=self._get_lookup_id(
+                session, 'status', record.get('status')),
+            note_id=self._get_lookup_id(session, 'note', note),
+            exams_failed=is_exams_failed(note),
+        )
+
+    def _build_sketch(
+        self,
+        rows: list[Statistics],
+        combo_id: int,
+        generation_id: int
+    ) -> CombinationSketch:
+        """Построить скетчи уникальных абитуриентов и конкурсантов и множество абитуриентов комбинации"""
+        applicants = [row.applicant_key for row in rows
+                      if row.applicant_key is not None]
+        participants = [row.applicant_key for row in rows
+                        if row.applicant_key is not None and not row.exams_failed]
+        return CombinationSketch(
+            generation_id=generation_id,
+            filter_combination_id=combo_id,
+            applicants=HyperLogLog.from_keys(applicants).to_bytes(),
+            participants=HyperLogLog.from_keys(participants).to_bytes(),
+            applicant_set=ApplicantBitmap.from_keys(applicants).to_bytes(),
+        )
+
+    def _get_applicant_ids(
+        self,
+        session: Session,
+        records: list[dict],
+        chunk_size: int = 1000
+    ) -> dict[tuple[str, str], int]:
         """
-        Получить все уровни образования
+        Получить id абитуриентов пачки, добавив новых в справочник
+
+        Неизвестные ключи ищутся и добавляются одним запросом на chunk_size
+        ключей, а найденные id кэшируются между пачками.
 
         Returns:
-            Список кортежей (value, name)
-            Пример: [(1, 'бакалавриат'), (2, 'магистратура')]
+            Словарь {(epgu_id, applicant_id): id}
+        """
+        keys = {key for key in map(applicant_natural_key, records) if key}
+        missing = [key for key in keys if key not in self._applicant_ids]
+
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            found = session.query(
+                Applicant.epgu_id, Applicant.applicant_id, Applicant.id
+            ).filter(
+                tuple_(Applicant.epgu_id, Applicant.applicant_id).in_(chunk)
+            ).all()
+            for epgu_id, applicant_id, applicant_key in found:
+                self._applicant_ids[(epgu_id, applicant_id)] = applicant_key
+
+            new = [key for key in chunk if key not in self._applicant_ids]
+            if new:
+                inserted = session.execute(
+                    insert(Applicant).returning(
+                        Applicant.epgu_id, Applicant.applicant_id, Applicant.id),
+                    [{'epgu_id': epgu_id, 'applicant_id': applicant_id}
+                     for epgu_id, applicant_id in new]
+                ).all()
+                for epgu_id, applicant_id, applicant_key in inserted:
+                    self._applicant_ids[(epgu_id, applicant_id)] = applicant_key
+
+        return {key: self._applicant_ids[key] for key in keys}
+
+    def _get_lookup_id(self, session: Session, kind: str, value: str | None) -> int | None:
+        """Получить код строки из справочника, добавив ее при необходимости"""
+        if not isinstance(value, str) or not value:
+            return None
+        key = (kind, value)
+        lookup_id = self._lookup_ids.get(key)
+        if lookup_id is None:
+            lookup = session.query(LookupValue).filter(
+                LookupValue.kind == kind,
+                LookupValue.value == value,
+            ).first()
+            if lookup is None:
+                lookup = LookupValue(kind=kind, value=value)
+                session.add(lookup)
+                session.flush()
+            lookup_id = lookup.id
+            self._lookup_ids[key] = lookup_id
+        return lookup_id
+
+    def reload_filter_tree(self) -> FilterTree | None:
+        """
+        Перестроить дерево комбинаций фильтров в памяти
+
+        Новое дерево строится целиком и подменяет старое одной операцией
+        присваивания, поэтому читатели всегда видят согласованный снимок.
+        При ошибке остается предыдущее дерево.
         """
         session = self.get_session()
         try:
-            results = session.query(
+            rows = session.query(
                 FilterCombination.level_value,
-                FilterCombination.level_name
-            ).distinct().order_by(FilterCombination.level_value).all()
+                FilterCombination.level_name,
+                FilterCombination.inst_value,
+                FilterCombination.inst_name,
+                FilterCombination.faculty_value,
+                FilterCombination.faculty_name,
+                FilterCombination.speciality_value,
+                FilterCombination.speciality_name,
+                FilterCombination.typeofstudy_value,
+                FilterCombination.typeofstudy_name,
+                FilterCombination.category_value,
+                FilterCombination.category_name,
+            ).all()
 
-            levels = [(r.level_value, r.level_name) for r in results]
-            logger.debug(f"✅ Получено {len(levels)} уровней")
-            return levels
+            tree = FilterTree(tuple(r) for r in rows)
+            self.filter_tree = tree
+            logger.info(
+                f"✅ Дерево фильтров загружено: {tree.size} комбинаций")
+            return tree
         except Exception as e:
-            logger.error(f"❌ Ошибка при получении уровней: {e}")
-            return []
+            logger.error(f"❌ Ошибка при загрузке дерева фильтров: {e}")
+            return self.filter_tree
         finally:
             session.close()
 
+    def _get_filter_tree(self) -> FilterTree | None:
+        return self.filter_tree or self.reload_filter_tree()
+
+    def get_levels(self) -> list[tuple[int, str]]:
+        """
+        Получить все уровни образования
+
+        Returns:
+            Список кортежей (value, name)
+            Пример: [(1, 'бакалавриат'), (2, 'магистратура')]
+        """
+        tree = self._get_filter_tree()
+        levels = list(tree.levels) if tree else []
+        logger.debug(f"✅ Получено {len(levels)} уровней")
+        return levels
+
     def get_institutes(self) -> list[tuple[int, str]]:
         """
         Получить все филиалы и ВУЗ
@@ -182,22 +1047,10 @@ class Database:
             Список кортежей (value, name)
             Пример: [(0, 'КФУ'), (1, 'Набережночелнинский институт')]
         """
-        session = self.get_session()
-        try:
-            results = session.query(
-                FilterCombination.inst_value,
-                FilterCombination.inst_name
-            ).distinct().order_by(FilterCombination.inst_value).all()
-
-            institutes = [(r.inst_value, r.inst_name) for r in results]
-            logger.debug(
-                f"✅ Получено {len(institutes)} филиалов ВУЗа")
-            return institutes
-        except Exception as e:
-            logger.error(f"❌ Ошибка при получении филиалов ВУЗа: {e}")
-            return []
-        finally:
-            session.close()
+        tree = self._get_filter_tree()
+        institutes = list(tree.institutes) if tree else []
+        logger.debug(f"✅ Получено {len(institutes)} филиалов ВУЗа")
+        return institutes
 
     def get_faculties(self, inst_value: str) -> list[tuple[int, str]]:
         """
@@ -210,23 +1063,15 @@ class Database:
             Список кортежей (value, name)
             Пример: [('6', 'Институт физики'), ('8', 'Юридический факультет')]
         """
-        session = self.get_session()
+        tree = self._get_filter_tree()
         try:
-            results = session.query(
-                FilterCombination.faculty_value,
-                FilterCombination.faculty_name
-            ).filter(
-                FilterCombination.inst_value == int(inst_value)
-            ).distinct().order_by(FilterCombination.faculty_value).all()
-
-            faculties = [(r.faculty_value, r.faculty_name) for r in results]
+            faculties = list(tree.get_faculties(
+                int(inst_value))) if tree else []
             logger.debug(f"✅ Получено {len(faculties)} факультетов")
             return faculties
         except Exception as e:
             logger.error(f"❌ Ошибка при получении факультетов: {e}")
             return []
-        finally:
-            session.close()
 
     def get_specialities(
         self,
@@ -246,26 +1091,18 @@ class Database:
             Список кортежей (value, name)
             Пример: [(166, '01.03.02 Прикладная математика и информатика'), (203, '38.03.05 Бизнес-информатика')]
         """
-        session = self.get_session()
+        tree = self._get_filter_tree()
         try:
-            results = session.query(
-                FilterCombination.speciality_value,
-                FilterCombination.speciality_name
-            ).filter(
-                FilterCombination.level_value == int(level_value),
-                FilterCombination.inst_value == int(inst_value),
-                FilterCombination.faculty_value == int(faculty_value)
-            ).distinct().order_by(FilterCombination.speciality_value).all()
-
-            specialities = [(r.speciality_value, r.speciality_name)
-                            for r in results]
+            specialities = list(tree.get_specialities(
+                int(level_value),
+                int(inst_value),
+                int(faculty_value)
+            )) if tree else []
             logger.debug(f"✅ Получено {len(specialities)} направлений")
             return specialities
         except Exception as e:
             logger.error(f"❌ Ошибка при получении направлений: {e}")
             return []
-        finally:
-            session.close()
 
     def get_study_types(
         self,
@@ -287,27 +1124,19 @@ class Database:
             Список кортежей (value, name)
             Пример: [(1, 'Очная'), (2, 'Очно-заочная')]
         """
-        session = self.get_session()
+        tree = self._get_filter_tree()
         try:
-            results = session.query(
-                FilterCombination.typeofstudy_value,
-                FilterCombination.typeofstudy_name
-            ).filter(
-                FilterCombination.level_value == int(level_value),
-                FilterCombination.inst_value == int(inst_value),
-                FilterCombination.faculty_value == int(faculty_value),
-                FilterCombination.speciality_value == int(speciality_value)
-            ).distinct().order_by(FilterCombination.typeofstudy_value).all()
-
-            study_types = [(r.typeofstudy_value, r.typeofstudy_name)
-                           for r in results]
+            study_types = list(tree.get_study_types(
+                int(level_value),
+                int(inst_value),
+                int(faculty_value),
+                int(speciality_value)
+            )) if tree else []
             logger.debug(f"✅ Получено {len(study_types)} типа обучения")
             return study_types
         except Exception as e:
             logger.error(f"❌ Ошибка при получении типов обучения: {e}")
             return []
-        finally:
-            session.close()
 
     def get_categories(self) -> list[tuple[int, str]]:
         """
@@ -317,26 +1146,20 @@ class Database:
             Список кортежей (value, name)
             Пример: [(1, 'Бюджет'), (2, 'Внебюджет')]
         """
-        session = self.get_session()
-        try:
-            results = session.query(
-                FilterCombination.category_value,
-                FilterCombination.category_name
-            ).distinct().order_by(FilterCombination.category_value).all()
-
-            categories = [(r.category_value, r.category_name) for r in results]
-            logger.debug(f"✅ Получено {len(categories)} категории")
-            return categories
-        except Exception as e:
-            logger.error(f"❌ Ошибка при получении категорий: {e}")
-            return []
-        finally:
-            session.close()
+        tree = self._get_filter_tree()
+        categories = list(tree.categories) if tree else []
+        logger.debug(f"✅ Получено {len(categories)} категории")
+        return categories
 
 
 def create_db_connection(config: Config) -> Database:
     """Создать подключение к БД из config"""
     db_url = f"postgresql://{config.db.user}:{config.db.password}@{config.db.host}:{config.db.port}/{config.db.name}"
-    db = Database(db_url)
+    read_url = None
+    if config.db.read_host:
+        read_url = f"postgresql://{config.db.user}:{config.db.password}@{config.db.read_host}:{config.db.read_port or config.db.port}/{config.db.name}"
+    db = Database(db_url, history_days=config.db.history_days, read_url=read_url,
+                  carry_over_generations=config.db.carry_over_generations)
     db.init_db()
+    db.reload_filter_tree()
     return db
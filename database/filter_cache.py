@@ -0,0 +1,123 @@
+import sys
+from typing import Iterable
+
+
+class FilterNode:
+    """
+    Узел дерева комбинаций фильтров
+    - value: value фильтра
+    - name: Название фильтра (интернированная строка)
+    - children: Дочерние узлы по value
+    """
+    __slots__ = ('value', 'name', 'children', '_options')
+
+    def __init__(self, value: int, name: str):
+        self.value = value
+        self.name = name
+        self.children: dict[int, 'FilterNode'] = {}
+        self._options: tuple[tuple[int, str], ...] | None = None
+
+    def child(self, value: int, name: str) -> 'FilterNode':
+        """Получить дочерний узел или создать новый"""
+        node = self.children.get(value)
+        if node is None:
+            node = FilterNode(value, name)
+            self.children[value] = node
+        return node
+
+    def options(self) -> tuple[tuple[int, str], ...]:
+        """Отсортированные по value пары (value, name) дочерних узлов"""
+        if self._options is None:
+            self._options = _sorted_options(
+                (node.value, node.name) for node in self.children.values())
+        return self._options
+
+
+def _sorted_options(pairs: Iterable[tuple[int, str]]) -> tuple[tuple[int, str], ...]:
+    return tuple(sorted(set(pairs)))
+
+
+class FilterTree:
+    """
+    Неизменяемый снимок иерархии filter_combinations в памяти
+
+    Иерархия: level -> inst -> faculty -> speciality -> typeofstudy.
+    Уровни, ВУЗы и категории независимы, факультеты зависят только от ВУЗа,
+    поэтому для них хранятся отдельные готовые списки.
+    """
+    __slots__ = ('root', 'levels', 'institutes', 'categories',
+                 'faculties_by_inst', 'size')
+
+    def __init__(self, rows: Iterable[tuple]):
+        """
+        Args:
+            rows: Строки вида (level_value, level_name, inst_value, inst_name,
+                faculty_value, faculty_name, speciality_value, speciality_name,
+                typeofstudy_value, typeofstudy_name, category_value, category_name)
+        """
+        intern = sys.intern
+        self.root = FilterNode(0, '')
+        levels: set[tuple[int, str]] = set()
+        institutes: set[tuple[int, str]] = set()
+        categories: set[tuple[int, str]] = set()
+        faculties: dict[int, set[tuple[int, str]]] = {}
+        size = 0
+
+        for (level_value, level_name, inst_value, inst_name,
+             faculty_value, faculty_name, speciality_value, speciality_name,
+             typeofstudy_value, typeofstudy_name,
+             category_value, category_name) in rows:
+            level_name = intern(level_name)
+            inst_name = intern(inst_name)
+            faculty_name = intern(faculty_name)
+
+            levels.add((level_value, level_name))
+            institutes.add((inst_value, inst_name))
+            categories.add((category_value, intern(category_name)))
+            faculties.setdefault(inst_value, set()).add(
+                (faculty_value, faculty_name))
+
+            self.root.child(level_value, level_name) \
+                .child(inst_value, inst_name) \
+                .child(faculty_value, faculty_name) \
+                .child(speciality_value, intern(speciality_name)) \
+                .child(typeofstudy_value, intern(typeofstudy_name))
+            size += 1
+
+        self.levels = _sorted_options(levels)
+        self.institutes = _sorted_options(institutes)
+        self.categories = _sorted_options(categories)
+        self.faculties_by_inst = {
+            inst: _sorted_options(pairs) for inst, pairs in faculties.items()}
+        self.size = size
+
+    def _find(self, *values: int) -> FilterNode | None:
+        node = self.root
+        for value in values:
+            node = node.children.get(value)
+            if node is None:
+                return None
+        return node
+
+    def get_faculties(self, inst_value: int) -> tuple[tuple[int, str], ...]:
+        return self.faculties_by_inst.get(inst_value, ())
+
+    def get_specialities(
+        self,
+        level_value: int,
+        inst_value: int,
+        faculty_value: int
+    ) -> tuple[tuple[int, str], ...]:
+        node = self._find(level_value, inst_value, faculty_value)
+        return node.options() if node else ()
+
+    def get_study_types(
+        self,
+        level_value: int,
+        inst_value: int,
+        faculty_value: int,
+        speciality_value: int
+    ) -> tuple[tuple[int, str], ...]:
+        node = self._find(level_value, inst_value,
+                          faculty_value, speciality_value)
+        return node.options() if node else ()
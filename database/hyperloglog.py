@@ -0,0 +1,102 @@
+import zlib
+from typing import Iterable
+
+import numpy as np
+
+# Константы хеш-функции splitmix64
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _hash64(keys: np.ndarray) -> np.ndarray:
+    """Перемешать целочисленные ключи в равномерно распределенные 64-битные хеши"""
+    z = keys.astype(np.uint64) + _GOLDEN_GAMMA
+    z = (z ^ (z >> np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+class HyperLogLog:
+    """
+    Скетч HyperLogLog для приближенного подсчета уникальных значений
+
+    Скетчи с одинаковой точностью объединяются поэлементным максимумом
+    регистров, поэтому число уникальных абитуриентов факультета или
+    университета считается по скетчам комбинаций без чтения statistics.
+    """
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision: int = 12, registers: np.ndarray | None = None):
+        """
+        Args:
+            precision: Число бит индекса регистра (2^precision регистров)
+            registers: Готовые регистры (для восстановления из байтов)
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError(f"Недопустимая точность HyperLogLog: {precision}")
+        self.precision = precision
+        size = 1 << precision
+        if registers is None:
+            registers = np.zeros(size, dtype=np.uint8)
+        elif registers.shape != (size,):
+            raise ValueError("Размер регистров не совпадает с точностью")
+        self.registers = registers
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[int], precision: int = 12) -> 'HyperLogLog':
+        """Построить скетч по целочисленным ключам"""
+        sketch = cls(precision)
+        sketch.add_many(keys)
+        return sketch
+
+    @property
+    def relative_error(self) -> float:
+        """Стандартная относительная ошибка оценки"""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def add_many(self, keys: Iterable[int]):
+        """Добавить ключи в скетч"""
+        keys = np.fromiter(keys, dtype=np.int64)
+        if not len(keys):
+            return
+        hashes = _hash64(keys)
+        value_bits = 64 - self.precision
+        index = (hashes >> np.uint64(value_bits)).astype(np.intp)
+
+        # Ранг - номер младшего единичного бита оставшихся value_bits бит.
+        # Сторожевой бит ограничивает ранг значением value_bits + 1
+        rest = (hashes & np.uint64((1 << value_bits) - 1)) | np.uint64(1 << value_bits)
+        lowest = rest & (~rest + np.uint64(1))
+        rank = (np.log2(lowest.astype(np.float64)) + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Объединить с другим скетчем на месте"""
+        if other.precision != self.precision:
+            raise ValueError("Нельзя объединить скетчи разной точности")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Оценка числа уникальных ключей"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Для малых множеств точнее линейный подсчет
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """Сериализовать скетч (регистры малых множеств в основном нулевые и хорошо сжимаются)"""
+        return bytes([self.precision]) + zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        """Восстановить скетч из to_bytes"""
+        registers = np.frombuffer(zlib.decompress(data[1:]), dtype=np.uint8).copy()
+        return cls(data[0], registers)
@@ -0,0 +1,143 @@
+import logging
+import time
+
+from sqlalchemy import bindparam, text
+
+from .db import Database
+from .models import MaintenanceStat
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, которые переписывает фоновый парсер. ANALYZE statistics
+# проходит и по родительской таблице, и по всем ее партициям
+MAINTENANCE_TABLES = (
+    'statistics',
+    'combination_summaries',
+    'combination_sketches',
+    'applicants',
+    'lookup_values',
+)
+
+TABLE_STATS_QUERY = text(
+    "SELECT s.relname, s.n_live_tup, s.n_dead_tup, "
+    "pg_table_size(s.relid) AS table_bytes, "
+    "pg_indexes_size(s.relid) AS index_bytes "
+    "FROM pg_stat_user_tables s "
+    "WHERE s.relname IN :names"
+).bindparams(bindparam('names', expanding=True))
+
+
+class DatabaseMaintenance:
+    """
+    Обслуживание БД после загрузки поколения
+
+    Обновляет статистику планировщика для переписанных таблиц, записывает
+    размер и число мертвых строк каждой таблицы и партиции в
+    maintenance_stats и, если включено, очищает таблицы с большой
+    долей мертвых строк.
+    """
+
+    def __init__(self, vacuum: bool = False, dead_ratio: float = 0.2):
+        """
+        Args:
+            vacuum: Выполнять VACUUM для таблиц с долей мертвых строк
+                больше dead_ratio
+            dead_ratio: Порог доли мертвых строк для VACUUM
+        """
+        self.vacuum = vacuum
+        self.dead_ratio = dead_ratio
+
+    def run(self, db: Database, generation_id: int) -> list[MaintenanceStat]:
+        """
+        Выполнить обслуживание и сохранить результаты
+
+        Args:
+            db: Экземпляр Database
+            generation_id: Загруженное поколение
+
+        Returns:
+            Сохраненные записи MaintenanceStat (пустой список вне PostgreSQL
+            или при ошибке)
+        """
+        if db.engine.dialect.name != 'postgresql':
+            logger.debug("Обслуживание БД поддерживается только в PostgreSQL")
+            return []
+
+        started = time.perf_counter()
+        try:
+            stats = self._collect(db, generation_id)
+        except Exception as e:
+            logger.error(f"❌ Ошибка при обслуживании БД: {e}")
+            return []
+
+        session = db.get_session()
+        try:
+            session.add_all(stats)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Ошибка при сохранении результатов обслуживания: {e}")
+            return []
+        finally:
+            session.close()
+
+        dead = sum(stat.dead_tuples or 0 for stat in stats)
+        vacuumed = [stat.table_name for stat in stats if stat.vacuum_ms is not None]
+        logger.info(
+            f"✅ Обслуживание БД за {time.perf_counter() - started:.1f} с: "
+            f"мертвых строк {dead}, очищено таблиц {len(vacuumed)}")
+        return stats
+
+    def _collect(self, db: Database, generation_id: int) -> list[MaintenanceStat]:
+        """ANALYZE, сбор статистики таблиц и VACUUM в режиме autocommit"""
+        analyze_ms = {}
+        with db.engine.connect().execution_options(
+                isolation_level='AUTOCOMMIT') as conn:
+            for table in MAINTENANCE_TABLES:
+                analyze_ms[table] = self._timed(conn, f'ANALYZE "{table}"')
+
+            session = db.get_session()
+            try:
+                partitions = [name for name, _ in db.list_partitions(session)]
+            finally:
+                session.close()
+
+            rows = conn.execute(TABLE_STATS_QUERY, {
+                'names': [*MAINTENANCE_TABLES, *partitions]}).all()
+
+            stats = []
+            for row in rows:
+                vacuum_ms = None
+                if self.vacuum and self._is_bloated(row.n_live_tup, row.n_dead_tup):
+                    vacuum_ms = self._timed(conn, f'VACUUM "{row.relname}"')
+                stats.append(MaintenanceStat(
+                    generation_id=generation_id,
+                    table_name=row.relname,
+                    live_tuples=row.n_live_tup,
+                    dead_tuples=row.n_dead_tup,
+                    table_bytes=row.table_bytes,
+                    index_bytes=row.index_bytes,
+                    analyze_ms=analyze_ms.get(row.relname),
+                    vacuum_ms=vacuum_ms,
+                ))
+
+        # Секционированная таблица statistics сама строк не хранит
+        # и может отсутствовать в pg_stat_user_tables
+        collected = {stat.table_name for stat in stats}
+        stats.extend(
+            MaintenanceStat(generation_id=generation_id, table_name=table,
+                            analyze_ms=duration)
+            for table, duration in analyze_ms.items() if table not in collected)
+        return stats
+
+    def _is_bloated(self, live: int | None, dead: int | None) -> bool:
+        """Превышает ли доля мертвых строк порог"""
+        live, dead = live or 0, dead or 0
+        return dead > 0 and dead / (live + dead) > self.dead_ratio
+
+    @staticmethod
+    def _timed(conn, sql: str) -> int:
+        """Выполнить команду и вернуть время в миллисекундах"""
+        started = time.perf_counter()
+        conn.execute(text(sql))
+        return int((time.perf_counter() - started) * 1000)
@@ -1,14 +1,188 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime,
-    Index, ForeignKey
+    Column, Integer, BigInteger, SmallInteger, String, DateTime, Date,
+    Boolean, Float, LargeBinary, Index, ForeignKey, UniqueConstraint, Identity, and_,
+    select, PrimaryKeyConstraint
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import date, datetime
+from enum import IntEnum
 
 Base = declarative_base()
 
 
+class AdmissionCategory(IntEnum):
+    """Категория конкурса, хранится в statistics.admission_category"""
+    GENERAL = 0
+    TARGET_QUOTA = 1
+    SPECIAL_QUOTA = 2
+    SEPARATE_QUOTA = 3
+    WITHOUT_EXAMS = 4
+    OTHER = 9
+
+    @property
+    def label(self) -> str:
+        """Название категории для отчетов"""
+        return ADMISSION_CATEGORY_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label: str | None) -> 'AdmissionCategory':
+        """Получить категорию по названию из парсера"""
+        if not isinstance(label, str) or not label:
+            return cls.GENERAL
+        return _CATEGORIES_BY_LABEL.get(label.strip().lower(), cls.OTHER)
+
+
+ADMISSION_CATEGORY_LABELS = {
+    AdmissionCategory.GENERAL: 'общий конкурс',
+    AdmissionCategory.TARGET_QUOTA: 'целевая квота',
+    AdmissionCategory.SPECIAL_QUOTA: 'особая квота',
+    AdmissionCategory.SEPARATE_QUOTA: 'отдельная квота',
+    AdmissionCategory.WITHOUT_EXAMS: 'без вступительных испытаний',
+    AdmissionCategory.OTHER: 'другое',
+}
+
+_CATEGORIES_BY_LABEL = {
+    label: category for category, label in ADMISSION_CATEGORY_LABELS.items()}
+
+EXAMS_NOT_PASSED_NOTE = 'не сданы один или несколько экзаменов'
+
+
+def parse_agreement(value: str | None) -> bool:
+    """Есть ли заявление о согласии на зачисление"""
+    return isinstance(value, str) and value.strip().lower() == 'да'
+
+
+def is_exams_failed(note: str | None) -> bool:
+    """Не сданы ли экзамены по примечанию"""
+    return isinstance(note, str) and EXAMS_NOT_PASSED_NOTE in note.lower()
+
+
+class LookupValue(Base):
+    """
+    Справочник повторяющихся строк таблицы statistics
+    - kind: Поле, к которому относится значение ('status', 'note')
+    - value: Исходная строка
+    """
+    __tablename__ = "lookup_values"
+    __table_args__ = (
+        UniqueConstraint('kind', 'value', name='uq_lookup_values_kind_value'),
+    )
+
+    id = Column(SmallInteger().with_variant(Integer, 'sqlite'), primary_key=True)
+    kind = Column(String(20), nullable=False)
+    value = Column(String(255), nullable=False)
+
+
+class Applicant(Base):
+    """
+    Абитуриент, общий для всех комбинаций фильтров и парсингов
+    - epgu_id: Уникальный id абитуриента ЕПГУ ('' если не указан)
+    - applicant_id: id абитуриента ('' если не указан)
+    """
+    __tablename__ = "applicants"
+    __table_args__ = (
+        UniqueConstraint('epgu_id', 'applicant_id',
+                         name='uq_applicants_epgu_applicant'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    epgu_id = Column(String(15), nullable=False, default='')
+    applicant_id = Column(String(15), nullable=False, default='')
+
+
+# Поиск абитуриента по applicant_id (поиск по epgu_id обслуживает
+# уникальный индекс uq_applicants_epgu_applicant)
+Index('idx_applicants_applicant_id', Applicant.applicant_id)
+
+
+def applicant_natural_key(record: dict) -> tuple[str, str] | None:
+    """Ключ абитуриента (epgu_id, applicant_id) из строки парсера"""
+    epgu_id = record.get('epgu_id')
+    applicant_id = record.get('applicant_id')
+    key = (
+        epgu_id.strip() if isinstance(epgu_id, str) else '',
+        applicant_id.strip() if isinstance(applicant_id, str) else '',
+    )
+    return key if any(key) else None
+
+
+class CrawlRun(Base):
+    """
+    Запуск фонового парсинга (поколение данных)
+    - status: 'loading' - идет загрузка, 'current' - данные видны читателям,
+      'retired' - заменено более новым поколением, 'failed' - загрузка прервана,
+      'dropped' - данные удалены вместе с партицией
+    - crawl_date: Дата парсинга, ключ партиции statistics
+    - records_count: Количество загруженных записей
+    """
+    __tablename__ = "crawl_runs"
+
+    id = Column(Integer, primary_key=True)
+    status = Column(String(10), nullable=False, default='loading')
+    crawl_date = Column(Date, nullable=False, default=date.today)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    records_count = Column(Integer, nullable=False, default=0)
+
+
+class CrawlFailure(Base):
+    """
+    Комбинация, которую не удалось загрузить в поколение
+    - carried_over: Сколько поколений подряд данные комбинации скопированы
+      из прошлых при публикации (0 - не копировались)
+    """
+    __tablename__ = "crawl_failures"
+
+    generation_id = Column(Integer, ForeignKey(
+        'crawl_runs.id'), primary_key=True)
+    filter_combination_id = Column(Integer, ForeignKey(
+        'filter_combinations.id'), primary_key=True)
+    carried_over = Column(SmallInteger, nullable=False, default=0)
+
+
+class MaintenanceStat(Base):
+    """
+    Результаты обслуживания таблицы после загрузки поколения
+    - generation_id: Поколение, после которого выполнялось обслуживание
+    - table_name: Таблица или партиция
+    - live_tuples, dead_tuples: Живые и мертвые строки по pg_stat_user_tables
+    - table_bytes, index_bytes: Размер таблицы и ее индексов
+    - analyze_ms: Время ANALYZE (None - таблица не анализировалась отдельно)
+    - vacuum_ms: Время VACUUM (None - очистка не выполнялась)
+    """
+    __tablename__ = "maintenance_stats"
+
+    generation_id = Column(Integer, ForeignKey(
+        'crawl_runs.id'), primary_key=True)
+    table_name = Column(String(63), primary_key=True)
+    live_tuples = Column(BigInteger, nullable=True)
+    dead_tuples = Column(BigInteger, nullable=True)
+    table_bytes = Column(BigInteger, nullable=True)
+    index_bytes = Column(BigInteger, nullable=True)
+    analyze_ms = Column(Integer, nullable=True)
+    vacuum_ms = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Текущим может быть только одно поколение
+Index(
+    'idx_crawl_runs_current',
+    CrawlRun.status,
+    unique=True,
+    postgresql_where=CrawlRun.status == 'current',
+    sqlite_where=CrawlRun.status == 'current',
+)
+
+# id текущего поколения. Подзапрос вычисляется внутри того же запроса,
+# что и выборка данных, поэтому отчет всегда видит одно поколение целиком
+CURRENT_GENERATION = select(CrawlRun.id).where(
+    CrawlRun.status == 'current').scalar_subquery()
+CURRENT_CRAWL_DATE = select(CrawlRun.crawl_date).where(
+    CrawlRun.status == 'current').scalar_subquery()
+
+
 class FilterCombination(Base):
     """
     Таблица с сочетаниями фильтров
@@ -17,26 +191,25 @@ class FilterCombination(Base):
 
     id = Column(Integer, primary_key=True)
 
-    level_value = Column(Integer, nullable=False, index=True)
-    level_name = Column(String(30), nullable=False, index=True)
+    level_value = Column(Integer, nullable=False)
+    level_name = Column(String(30), nullable=False)
 
-    inst_value = Column(Integer, nullable=False, index=True)
-    inst_name = Column(String(100), nullable=False, index=True)
+    inst_value = Column(Integer, nullable=False)
+    inst_name = Column(String(100), nullable=False)
 
-    faculty_value = Column(Integer, nullable=False, index=True)
-    faculty_name = Column(String(100), nullable=False, index=True)
+    faculty_value = Column(Integer, nullable=False)
+    faculty_name = Column(String(100), nullable=False)
 
-    speciality_value = Column(Integer, nullable=False, index=True)
-    speciality_name = Column(String(100), nullable=False, index=True)
+    speciality_value = Column(Integer, nullable=False)
+    speciality_name = Column(String(100), nullable=False)
 
-    typeofstudy_value = Column(Integer, nullable=False, index=True)
-    typeofstudy_name = Column(String(20), nullable=False, index=True)
+    typeofstudy_value = Column(Integer, nullable=False)
+    typeofstudy_name = Column(String(20), nullable=False)
 
-    category_value = Column(Integer, nullable=False, index=True)
-    category_name = Column(String(10), nullable=False, index=True)
+    category_value = Column(Integer, nullable=False)
+    category_name = Column(String(10), nullable=False)
 
-    updated_at = Column(DateTime, default=datetime.utcnow,
-                        nullable=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     statistics = relationship(
         "Statistics", back_populates="filter_combo", cascade="all, delete-orphan")
@@ -53,11 +226,13 @@ class FilterCombination(Base):
         }
 
 
+# Порядок колонок повторяет иерархию фильтров: префиксы индекса
+# обслуживают выборки по направлению, институту и университету
 Index(
-    'idx_filter_combination_unique',
+    'idx_filter_combination_hierarchy',
     FilterCombination.level_value,
-    FilterCombination.faculty_value,
     FilterCombination.inst_value,
+    FilterCombination.faculty_value,
     FilterCombination.speciality_value,
     FilterCombination.typeofstudy_value,
     FilterCombination.category_value,
@@ -67,41 +242,216 @@ Index(
 
 class Statistics(Base):
     """
-    Таблица со всеми данными поступления КФУ
+    Таблица со всеми данными поступления КФУ, в PostgreSQL разбита
+    на партиции по дате парсинга (statistics_pYYYYMMDD)
+    - crawl_date: Дата парсинга, ключ партиции
+    - generation_id: Поколение данных, ссылка на CrawlRun
     - filter_combination_id: ссылка на FilterCombination
-    - admission_category: Категория конкурса
+    - admission_category: Код категории конкурса (AdmissionCategory)
     - available_places: Количество мест в рамках конкурса
-    - epgu_id: Уникальный id абитуриента ЕПГУ
-    - applicant_id: id абитуриента
+    - applicant_key: Абитуриент, ссылка на Applicant
     - score: Сумма конкурсных баллов
-    - agreement: Заявление о согласии на зачисление
-    - status: Статус
-    - note: Примечание
+    - agreement: Есть ли заявление о согласии на зачисление
+    - status_id: Статус, ссылка на LookupValue
+    - note_id: Примечание, ссылка на LookupValue
+    - exams_failed: Не сданы один или несколько экзаменов
+    - agreed_rank: Место среди согласившихся конкурсантов категории
+      (считается при загрузке, см. database.summary)
 
     - created_at: Когда была загружена запись
     """
     __tablename__ = "statistics"
+    __table_args__ = {'postgresql_partition_by': 'RANGE (crawl_date)'}
 
-    id = Column(Integer, primary_key=True)
+    # В PostgreSQL ключ партиции входит в первичный ключ, в SQLite первичный
+    # ключ - только id (см. _sqlite_primary_key), иначе id не автоинкрементный
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'),
+                Identity(), primary_key=True)
+    crawl_date = Column(Date, primary_key=True)
+
+    generation_id = Column(Integer, ForeignKey(
+        'crawl_runs.id'), nullable=False)
 
     filter_combination_id = Column(
         Integer,
         ForeignKey('filter_combinations.id', ondelete='CASCADE'),
-        nullable=False,
-        index=True
+        nullable=False
     )
 
-    admission_category = Column(String(50), nullable=True, index=True)
+    admission_category = Column(SmallInteger, nullable=False,
+                                default=AdmissionCategory.GENERAL)
     available_places = Column(Integer, nullable=True)
-    epgu_id = Column(String(15), nullable=True, index=True)
-    applicant_id = Column(String(15), nullable=True, index=True)
+    applicant_key = Column(Integer, ForeignKey(
+        'applicants.id'), nullable=True)
     score = Column(Integer, nullable=True)
-    agreement = Column(String(10), nullable=True)
-    status = Column(String(30), nullable=True)
-    note = Column(String(255), nullable=True)
+    agreement = Column(Boolean, nullable=False, default=False)
+    status_id = Column(SmallInteger, ForeignKey(
+        'lookup_values.id'), nullable=True)
+    note_id = Column(SmallInteger, ForeignKey(
+        'lookup_values.id'), nullable=True)
+    exams_failed = Column(Boolean, nullable=False, default=False)
+    agreed_rank = Column(Integer, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow,
-                        nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     filter_combo = relationship(
         "FilterCombination", back_populates="statistics")
+
+
+@compiles(PrimaryKeyConstraint, 'sqlite')
+def _sqlite_primary_key(constraint, compiler, **kw):
+    """
+    Первичный ключ statistics в SQLite - только id
+
+    Составной ключ (id, crawl_date) нужен для партиций PostgreSQL, а в SQLite
+    автоинкремент работает только у единственной колонки INTEGER PRIMARY KEY.
+    """
+    if constraint.table is Statistics.__table__:
+        return "PRIMARY KEY (id)"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+class CombinationSummary(Base):
+    """
+    Агрегаты по комбинации фильтров и категории конкурса,
+    пересчитываются при каждом сохранении данных комбинации
+    - generation_id: Поколение данных, ссылка на CrawlRun
+    - total_count: Всего заявлений
+    - participants_count: Конкурсантов (экзамены сданы)
+    - agreed_count: Конкурсантов с согласием на зачисление
+    - available_places: Мест в категории (для БВИ равно числу согласий)
+    - admitted_count: Согласившихся, проходящих в пределах мест
+    - score_min, score_max, score_avg: Баллы проходящих в пределах мест
+    """
+    __tablename__ = "combination_summaries"
+
+    generation_id = Column(Integer, ForeignKey(
+        'crawl_runs.id'), primary_key=True)
+    filter_combination_id = Column(
+        Integer,
+        ForeignKey('filter_combinations.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    admission_category = Column(SmallInteger, primary_key=True)
+
+    total_count = Column(Integer, nullable=False, default=0)
+    participants_count = Column(Integer, nullable=False, default=0)
+    agreed_count = Column(Integer, nullable=False, default=0)
+    available_places = Column(Integer, nullable=False, default=0)
+    admitted_count = Column(Integer, nullable=False, default=0)
+    score_min = Column(Integer, nullable=True)
+    score_max = Column(Integer, nullable=True)
+    score_avg = Column(Float, nullable=True)
+
+
+class CombinationSketch(Base):
+    """
+    Скетчи HyperLogLog уникальных абитуриентов комбинации фильтров
+    (см. database.hyperloglog), объединяются для факультета и университета
+    - generation_id: Поколение данных, ссылка на CrawlRun
+    - applicants: Скетч всех абитуриентов
+    - participants: Скетч конкурсантов (экзамены сданы)
+    - applicant_set: Точное множество id абитуриентов
+      (database.bitmap.ApplicantBitmap) для пересечений направлений
+    """
+    __tablename__ = "combination_sketches"
+
+    generation_id = Column(Integer, ForeignKey(
+        'crawl_runs.id'), primary_key=True)
+    filter_combination_id = Column(
+        Integer,
+        ForeignKey('filter_combinations.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    applicants = Column(LargeBinary, nullable=False)
+    participants = Column(LargeBinary, nullable=False)
+    applicant_set = Column(LargeBinary, nullable=False)
+
+
+class RenderedReport(Base):
+    """
+    Заранее построенный файл отчета для поколения данных
+    - generation_id: Поколение, по данным которого построен отчет
+    - kind: Тип анализа ('speciality', 'institute', 'university')
+    - filters_key: Нормализованные фильтры (ReportCache.filters_key)
+    - content: Содержимое файла отчета
+    """
+    __tablename__ = "rendered_reports"
+
+    generation_id = Column(Integer, ForeignKey(
+        'crawl_runs.id'), primary_key=True)
+    kind = Column(String(16), primary_key=True)
+    filters_key = Column(String(255), primary_key=True)
+    content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Условие "абитуриент участвует в конкурсе". Анализатор должен использовать
+# именно это выражение, чтобы планировщик мог применить частичный индекс
+PARTICIPANT_CONDITION = Statistics.exams_failed.is_(False)
+
+# Записи текущего поколения. Условие на crawl_date позволяет PostgreSQL
+# читать только партицию последнего парсинга
+CURRENT_STATISTICS = and_(
+    Statistics.crawl_date == CURRENT_CRAWL_DATE,
+    Statistics.generation_id == CURRENT_GENERATION,
+)
+
+
+def partition_name(crawl_date: date) -> str:
+    """Имя партиции statistics для даты парсинга"""
+    return f"statistics_p{crawl_date:%Y%m%d}"
+
+
+# Удаление поколения, подсчеты и группировка по категориям
+Index(
+    'idx_statistics_combo_category',
+    Statistics.generation_id,
+    Statistics.filter_combination_id,
+    Statistics.admission_category,
+    Statistics.available_places,
+    postgresql_include=['agreement']
+)
+
+# Подсчет уникальных абитуриентов по институту и университету
+# без чтения самих строк statistics (index-only scan)
+Index(
+    'idx_statistics_combo_applicant',
+    Statistics.generation_id,
+    Statistics.filter_combination_id,
+    Statistics.applicant_key,
+    Statistics.exams_failed
+)
+
+# Все заявления абитуриента в поколении (команда /position)
+Index(
+    'idx_statistics_applicant',
+    Statistics.applicant_key,
+    Statistics.generation_id,
+)
+
+# Индексы прежней схемы, которые больше не используются запросами
+LEGACY_INDEXES = (
+    'idx_filter_combination_unique',
+    'ix_filter_combinations_level_value',
+    'ix_filter_combinations_level_name',
+    'ix_filter_combinations_inst_value',
+    'ix_filter_combinations_inst_name',
+    'ix_filter_combinations_faculty_value',
+    'ix_filter_combinations_faculty_name',
+    'ix_filter_combinations_speciality_value',
+    'ix_filter_combinations_speciality_name',
+    'ix_filter_combinations_typeofstudy_value',
+    'ix_filter_combinations_typeofstudy_name',
+    'ix_filter_combinations_category_value',
+    'ix_filter_combinations_category_name',
+    'ix_filter_combinations_updated_at',
+    'ix_statistics_filter_combination_id',
+    'ix_statistics_admission_category',
+    'ix_statistics_epgu_id',
+    'ix_statistics_applicant_id',
+    'ix_statistics_created_at',
+    # Отчеты читают баллы из combination_summaries, выборки лучших баллов
+    # по statistics больше нет
+    'idx_statistics_participants_ranking',
+)
@@ -0,0 +1,447 @@
+"""
+Запросы чтения для отчетов и фонового парсера
+
+Запросы строятся через lambda_stmt: SQLAlchemy кэширует и сам объект
+запроса, и его скомпилированный SQL по коду лямбды, а значения фильтров
+передаются как связанные параметры. Возвращаются только нужные колонки
+в виде Row, без загрузки ORM-объектов в сессию.
+"""
+from typing import NamedTuple
+from datetime import date
+
+from sqlalchemy import and_, case, distinct, func, lambda_stmt, or_, select, true
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select, StatementLambdaElement
+
+from .models import (
+    FilterCombination, Statistics, CombinationSummary, CombinationSketch, AdmissionCategory,
+    Applicant, LookupValue, CrawlRun,
+    PARTICIPANT_CONDITION, CURRENT_GENERATION, CURRENT_STATISTICS
+)
+
+
+class CombinationKey(NamedTuple):
+    """Легкая замена FilterCombination для обхода всех комбинаций парсером"""
+    id: int
+    level_value: int
+    inst_value: int
+    faculty_value: int
+    speciality_value: int
+    typeofstudy_value: int
+    category_value: int
+
+    def to_filters_dict(self) -> dict[str, str]:
+        """Преобразовать в словарь value для URL"""
+        return FilterCombination.to_filters_dict(self)
+
+
+def combination_keys(
+    after_id: int | None = None,
+    limit: int | None = None
+) -> StatementLambdaElement:
+    """
+    id и value фильтров комбинаций в порядке id
+
+    Args:
+        after_id: Вернуть только комбинации с id больше указанного (keyset-пагинация)
+        limit: Максимальное количество строк
+    """
+    stmt = lambda_stmt(lambda: select(
+        FilterCombination.id,
+        FilterCombination.level_value,
+        FilterCombination.inst_value,
+        FilterCombination.faculty_value,
+        FilterCombination.speciality_value,
+        FilterCombination.typeofstudy_value,
+        FilterCombination.category_value,
+    ).order_by(FilterCombination.id))
+    if after_id is not None:
+        stmt += lambda s: s.where(FilterCombination.id > after_id)
+    if limit is not None:
+        stmt += lambda s: s.limit(limit)
+    return stmt
+
+
+def find_combination(filters: dict) -> StatementLambdaElement:
+    """id и название направления для полного набора фильтров"""
+    level, inst, faculty, speciality, typeofstudy, category = (
+        int(filters[key]) for key in
+        ('level', 'inst', 'faculty', 'speciality', 'typeofstudy', 'category'))
+    return lambda_stmt(lambda: select(
+        FilterCombination.id,
+        FilterCombination.speciality_name,
+    ).where(
+        FilterCombination.level_value == level,
+        FilterCombination.inst_value == inst,
+        FilterCombination.faculty_value == faculty,
+        FilterCombination.speciality_value == speciality,
+        FilterCombination.typeofstudy_value == typeofstudy,
+        FilterCombination.category_value == category,
+    ))
+
+
+def speciality_report(filters: dict) -> StatementLambdaElement:
+    """
+    Все данные отчета по направлению одним запросом
+
+    Комбинация соединяется с агрегатами текущего поколения через LEFT JOIN,
+    поэтому существующая комбинация без данных дает одну строку
+    с admission_category = NULL, а несуществующая - ни одной строки.
+
+    Поколение и дата парсинга агрегатов возвращаются вместе с ними: по ним
+    combination_scores читает баллы того же поколения, даже если между
+    запросами опубликовано новое.
+
+    Returns:
+        Запрос строк (id, speciality_name, admission_category, total_count,
+        participants_count, agreed_count, available_places, admitted_count,
+        score_min, score_max, score_avg, generation_id, crawl_date)
+        по одной на категорию
+    """
+    level, inst, faculty, speciality, typeofstudy, category = (
+        int(filters[key]) for key in
+        ('level', 'inst', 'faculty', 'speciality', 'typeofstudy', 'category'))
+    return lambda_stmt(lambda: select(
+        FilterCombination.id,
+        FilterCombination.speciality_name,
+        CombinationSummary.admission_category,
+        CombinationSummary.total_count,
+        CombinationSummary.participants_count,
+        CombinationSummary.agreed_count,
+        CombinationSummary.available_places,
+        CombinationSummary.admitted_count,
+        CombinationSummary.score_min,
+        CombinationSummary.score_max,
+        CombinationSummary.score_avg,
+        CombinationSummary.generation_id,
+        CrawlRun.crawl_date,
+    ).select_from(
+        FilterCombination
+    ).outerjoin(
+        CombinationSummary, and_(
+            CombinationSummary.filter_combination_id == FilterCombination.id,
+            CombinationSummary.generation_id == CURRENT_GENERATION,
+        )
+    ).outerjoin(
+        CrawlRun, CrawlRun.id == CombinationSummary.generation_id
+    ).where(
+        FilterCombination.level_value == level,
+        FilterCombination.inst_value == inst,
+        FilterCombination.faculty_value == faculty,
+        FilterCombination.speciality_value == speciality,
+        FilterCombination.typeofstudy_value == typeofstudy,
+        FilterCombination.category_value == category,
+    ))
+
+
+def combination_scores(
+    combo_id: int,
+    generation_id: int,
+    crawl_date: date
+) -> StatementLambdaElement:
+    """
+    Баллы, категории и результат экзаменов заявлений комбинации
+    (для analyzer.score_distribution)
+
+    Поколение задается явно - то, из которого прочитаны агрегаты отчета
+    (speciality_report), а не текущее на момент этого запроса.
+    """
+    return lambda_stmt(lambda: select(
+        Statistics.score,
+        Statistics.admission_category,
+        Statistics.exams_failed,
+    ).where(
+        Statistics.crawl_date == crawl_date,
+        Statistics.generation_id == generation_id,
+        Statistics.filter_combination_id == combo_id,
+    ))
+
+
+def institute_report(filters: dict) -> StatementLambdaElement:
+    """
+    Все данные отчета по институту одним сгруппированным проходом
+
+    Суммы по категориям считаются условными агрегатами (FILTER), точное
+    число уникальных абитуриентов института приходит из CTE
+    в той же строке. Направления без данных дают строку с summaries = 0.
+
+    Returns:
+        Запрос строк (faculty_name, speciality_name, summaries,
+        total_applications, total_places, occupied_by_special,
+        unique_applicants, unique_participants) по одной на направление
+    """
+    level, inst, faculty, category = (
+        int(filters[key]) for key in ('level', 'inst', 'faculty', 'category'))
+    return lambda_stmt(lambda: _institute_select(level, inst, faculty, category))
+
+
+def _institute_select(level: int, inst: int, faculty: int, category: int):
+    """Запрос institute_report (аргументы лямбды становятся связанными параметрами)"""
+    in_institute = and_(
+        FilterCombination.level_value == level,
+        FilterCombination.inst_value == inst,
+        FilterCombination.faculty_value == faculty,
+        FilterCombination.category_value == category,
+    )
+    unique = select(
+        func.count(distinct(Statistics.applicant_key)).label('applicants'),
+        func.count(distinct(case(
+            (PARTICIPANT_CONDITION, Statistics.applicant_key)
+        ))).label('participants'),
+    ).join(
+        FilterCombination, FilterCombination.id == Statistics.filter_combination_id
+    ).where(CURRENT_STATISTICS, in_institute).cte('unique_applicants')
+    general = CombinationSummary.admission_category == AdmissionCategory.GENERAL
+
+    return select(
+        FilterCombination.faculty_name,
+        FilterCombination.speciality_name,
+        func.count(CombinationSummary.filter_combination_id).label('summaries'),
+        func.coalesce(func.sum(CombinationSummary.participants_count), 0).label(
+            'total_applications'),
+        func.coalesce(func.sum(CombinationSummary.available_places).filter(general), 0).label(
+            'total_places'),
+        func.coalesce(func.sum(CombinationSummary.admitted_count).filter(~general), 0).label(
+            'occupied_by_special'),
+        unique.c.applicants.label('unique_applicants'),
+        unique.c.participants.label('unique_participants'),
+    ).select_from(FilterCombination).join(
+        unique, true()
+    ).outerjoin(
+        CombinationSummary, and_(
+            CombinationSummary.filter_combination_id == FilterCombination.id,
+            CombinationSummary.generation_id == CURRENT_GENERATION,
+        )
+    ).where(in_institute).group_by(
+        FilterCombination.faculty_name,
+        FilterCombination.speciality_value,
+        FilterCombination.speciality_name,
+        unique.c.applicants,
+        unique.c.participants,
+    )
+
+
+def university_sketches(filters: dict) -> StatementLambdaElement:
+    """
+    Скетчи уникальных абитуриентов всех комбинаций университета
+
+    Returns:
+        Запрос строк (inst_name, faculty_name, applicants, participants),
+        для комбинаций без данных скетчи равны NULL
+    """
+    level, inst, category = (
+        int(filters[key]) for key in ('level', 'inst', 'category'))
+    return lambda_stmt(lambda: select(
+        FilterCombination.inst_name,
+        FilterCombination.faculty_name,
+        CombinationSketch.applicants,
+        CombinationSketch.participants,
+    ).outerjoin(
+        CombinationSketch, and_(
+            CombinationSketch.filter_combination_id == FilterCombination.id,
+            CombinationSketch.generation_id == CURRENT_GENERATION,
+        )
+    ).where(
+        FilterCombination.level_value == level,
+        FilterCombination.inst_value == inst,
+        FilterCombination.category_value == category,
+    ))
+
+
+def institute_applicant_sets(filters: dict) -> StatementLambdaElement:
+    """
+    Множества абитуриентов всех комбинаций института (для analyzer.overlap)
+
+    Returns:
+        Запрос строк (faculty_name, speciality_value, speciality_name,
+        applicant_set), для комбинаций без данных applicant_set равно NULL
+    """
+    level, inst, faculty, category = (
+        int(filters[key]) for key in ('level', 'inst', 'faculty', 'category'))
+    return lambda_stmt(lambda: select(
+        FilterCombination.faculty_name,
+        FilterCombination.speciality_value,
+        FilterCombination.speciality_name,
+        CombinationSketch.applicant_set,
+    ).outerjoin(
+        CombinationSketch, and_(
+            CombinationSketch.filter_combination_id == FilterCombination.id,
+            CombinationSketch.generation_id == CURRENT_GENERATION,
+        )
+    ).where(
+        FilterCombination.level_value == level,
+        FilterCombination.inst_value == inst,
+        FilterCombination.faculty_value == faculty,
+        FilterCombination.category_value == category,
+    ).order_by(FilterCombination.speciality_name))
+
+
+def simulation_places(filters: dict) -> StatementLambdaElement:
+    """
+    Места по категориям конкурса всех комбинаций университета
+    (для analyzer.admission_simulation)
+
+    Returns:
+        Запрос строк (id, inst_name, faculty_name, speciality_name,
+        typeofstudy_name, admission_category, available_places)
+        по одной на категорию
+    """
+    level, inst, category = (
+        int(filters[key]) for key in ('level', 'inst', 'category'))
+    return lambda_stmt(lambda: select(
+        FilterCombination.id,
+        FilterCombination.inst_name,
+        FilterCombination.faculty_name,
+        FilterCombination.speciality_name,
+        FilterCombination.typeofstudy_name,
+        CombinationSummary.admission_category,
+        CombinationSummary.available_places,
+    ).join(
+        CombinationSummary, and_(
+            CombinationSummary.filter_combination_id == FilterCombination.id,
+            CombinationSummary.generation_id == CURRENT_GENERATION,
+        )
+    ).where(
+        FilterCombination.level_value == level,
+        FilterCombination.inst_value == inst,
+        FilterCombination.category_value == category,
+    ).order_by(FilterCombination.id))
+
+
+def simulation_applications(filters: dict) -> StatementLambdaElement:
+    """
+    Заявления с согласием всех конкурсантов университета в текущем поколении
+    (для analyzer.admission_simulation)
+
+    Returns:
+        Запрос строк (filter_combination_id, applicant_key,
+        admission_category, score)
+    """
+    level, inst, category = (
+        int(filters[key]) for key in ('level', 'inst', 'category'))
+    return lambda_stmt(lambda: select(
+        Statistics.filter_combination_id,
+        Statistics.applicant_key,
+        Statistics.admission_category,
+        Statistics.score,
+    ).join(
+        FilterCombination, FilterCombination.id == Statistics.filter_combination_id
+    ).where(
+        CURRENT_STATISTICS,
+        PARTICIPANT_CONDITION,
+        Statistics.agreement.is_(True),
+        FilterCombination.level_value == level,
+        FilterCombination.inst_value == inst,
+        FilterCombination.category_value == category,
+    ))
+
+
+def applicant_positions(identifier: str) -> StatementLambdaElement:
+    """
+    Все заявления абитуриента в текущем поколении с местом в рейтинге
+
+    Абитуриент ищется по epgu_id или applicant_id через индексы
+    справочника applicants, заявления - по idx_statistics_applicant.
+    Место берется из agreed_rank, посчитанного при загрузке.
+
+    Returns:
+        Запрос строк (faculty_name, speciality_name, typeofstudy_name,
+        category_name, admission_category, score, agreement, exams_failed,
+        agreed_rank, available_places, admitted_count, score_min,
+        occupied_by_special) по одной на заявление
+    """
+    return lambda_stmt(lambda: _applicant_positions_select(identifier))
+
+
+def _applicant_positions_select(identifier: str):
+    """Запрос applicant_positions (аргументы лямбды становятся связанными параметрами)"""
+    special = aliased(CombinationSummary)
+    occupied_by_special = select(
+        func.coalesce(func.sum(special.admitted_count), 0)
+    ).where(
+        special.generation_id == CURRENT_GENERATION,
+        special.filter_combination_id == Statistics.filter_combination_id,
+        special.admission_category != AdmissionCategory.GENERAL,
+    ).scalar_subquery()
+    applicant = select(Applicant.id).where(or_(
+        Applicant.epgu_id == identifier,
+        Applicant.applicant_id == identifier,
+    ))
+
+    return select(
+        FilterCombination.faculty_name,
+        FilterCombination.speciality_name,
+        FilterCombination.typeofstudy_name,
+        FilterCombination.category_name,
+        Statistics.admission_category,
+        Statistics.score,
+        Statistics.agreement,
+        Statistics.exams_failed,
+        Statistics.agreed_rank,
+        CombinationSummary.available_places,
+        CombinationSummary.admitted_count,
+        CombinationSummary.score_min,
+        occupied_by_special.label('occupied_by_special'),
+    ).join(
+        FilterCombination, FilterCombination.id == Statistics.filter_combination_id
+    ).outerjoin(
+        CombinationSummary, and_(
+            CombinationSummary.generation_id == Statistics.generation_id,
+            CombinationSummary.filter_combination_id == Statistics.filter_combination_id,
+            CombinationSummary.admission_category == Statistics.admission_category,
+        )
+    ).where(
+        CURRENT_STATISTICS,
+        Statistics.applicant_key.in_(applicant),
+    ).order_by(
+        FilterCombination.faculty_name,
+        FilterCombination.speciality_name,
+        Statistics.admission_category,
+    )
+
+
+def generation_rows(generation_id: int, crawl_date: date) -> Select:
+    """
+    Записи поколения с раскодированными справочниками для выгрузки
+
+    Returns:
+        Запрос строк statistics с полями комбинации, id абитуриента,
+        статусом и примечанием в исходном виде
+    """
+    status = aliased(LookupValue)
+    note = aliased(LookupValue)
+    return select(
+        Statistics.crawl_date,
+        Statistics.generation_id,
+        Statistics.filter_combination_id,
+        FilterCombination.level_value,
+        FilterCombination.level_name,
+        FilterCombination.inst_value,
+        FilterCombination.inst_name,
+        FilterCombination.faculty_value,
+        FilterCombination.faculty_name,
+        FilterCombination.speciality_value,
+        FilterCombination.speciality_name,
+        FilterCombination.typeofstudy_value,
+        FilterCombination.category_value,
+        Statistics.admission_category,
+        Statistics.available_places,
+        Applicant.epgu_id,
+        Applicant.applicant_id,
+        Statistics.score,
+        Statistics.agreement,
+        Statistics.exams_failed,
+        status.value.label('status'),
+        note.value.label('note'),
+    ).join(
+        FilterCombination, FilterCombination.id == Statistics.filter_combination_id
+    ).outerjoin(
+        Applicant, Applicant.id == Statistics.applicant_key
+    ).outerjoin(
+        status, status.id == Statistics.status_id
+    ).outerjoin(
+        note, note.id == Statistics.note_id
+    ).where(
+        Statistics.crawl_date == crawl_date,
+        Statistics.generation_id == generation_id,
+    )
@@ -0,0 +1,128 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Sequence
+
+from .models import AdmissionCategory, Statistics
+
+
+def summarize_combination(
+    rows: Sequence[Statistics],
+    headings: Sequence[str | None] | None = None
+) -> list[dict]:
+    """
+    Посчитать агрегаты CombinationSummary для записей одной комбинации
+
+    Сначала заполняются специальные категории (для БВИ мест столько же,
+    сколько согласий), оставшиеся места уходят на общий конкурс.
+    Записям проставляется agreed_rank (см. _rank_agreed).
+
+    Args:
+        rows: Записи комбинации
+        headings: Исходные названия категорий из парсера для каждой записи
+            (None - у каждой категории одна таблица, см. _category_places)
+
+    Returns:
+        Список словарей с полями CombinationSummary
+        (без filter_combination_id), по одному на категорию
+    """
+    places = _category_places(rows, headings or [None] * len(rows))
+    by_category: dict[int, list[Statistics]] = defaultdict(list)
+    for row in rows:
+        by_category[row.admission_category].append(row)
+
+    summaries = []
+    occupied_places = 0
+    general_rows = by_category.pop(AdmissionCategory.GENERAL, None)
+
+    for category, category_rows in sorted(by_category.items()):
+        summary = _summarize_category(category, category_rows, places[category])
+        if category == AdmissionCategory.WITHOUT_EXAMS:
+            summary['available_places'] = summary['agreed_count']
+        _apply_admitted(summary, _rank_agreed(category_rows), summary['available_places'])
+        occupied_places += summary['admitted_count']
+        summaries.append(summary)
+
+    if general_rows is not None:
+        summary = _summarize_category(AdmissionCategory.GENERAL, general_rows,
+                                      places[AdmissionCategory.GENERAL])
+        remaining_places = summary['available_places'] - occupied_places
+        _apply_admitted(summary, _rank_agreed(general_rows), remaining_places)
+        summaries.insert(0, summary)
+
+    return summaries
+
+
+def _category_places(rows: Sequence[Statistics], headings: Sequence[str | None]) -> dict[int, int]:
+    """
+    Места каждой категории
+
+    В одной таблице у всех записей одно число мест, поэтому берется максимум
+    по записям одного названия. Разные нераспознанные названия попадают
+    в AdmissionCategory.OTHER, и их места складываются.
+    """
+    by_heading: dict[tuple[int, str | None], int] = {}
+    for row, heading in zip(rows, headings):
+        key = (row.admission_category,
+               heading.strip().lower() if isinstance(heading, str) else None)
+        by_heading[key] = max(by_heading.get(key, 0), row.available_places or 0)
+
+    places: dict[int, int] = defaultdict(int)
+    for (category, _), category_places in by_heading.items():
+        places[category] += category_places
+    return places
+
+
+def _summarize_category(category: int, rows: list[Statistics], places: int) -> dict:
+    participants = [r for r in rows if not r.exams_failed]
+    return {
+        'admission_category': int(category),
+        'total_count': len(rows),
+        'participants_count': len(participants),
+        'agreed_count': sum(1 for r in participants if r.agreement),
+        'available_places': places,
+        'admitted_count': 0,
+        'score_min': None,
+        'score_max': None,
+        'score_avg': None,
+    }
+
+
+def _score_order(row: Statistics) -> tuple[bool, int]:
+    """Ключ сортировки по убыванию балла, записи без балла в конце"""
+    return row.score is None, -(row.score or 0)
+
+
+def _rank_agreed(rows: list[Statistics]) -> list[Statistics]:
+    """
+    Проставить agreed_rank - место среди согласившихся конкурсантов категории
+
+    Конкурсанту без согласия ставится место, которое он занял бы,
+    подав согласие: 1 + число согласившихся с большим баллом.
+    Не сдавшим экзамены место не ставится.
+
+    Returns:
+        Согласившиеся конкурсанты по убыванию балла
+    """
+    agreed = sorted((r for r in rows if r.agreement and not r.exams_failed),
+                    key=_score_order)
+    keys = [_score_order(r) for r in agreed]
+    for row in rows:
+        if row.exams_failed:
+            row.agreed_rank = None
+        elif not row.agreement:
+            row.agreed_rank = bisect_left(keys, _score_order(row)) + 1
+    for rank, row in enumerate(agreed, 1):
+        row.agreed_rank = rank
+    return agreed
+
+
+def _apply_admitted(summary: dict, agreed: list[Statistics], places: int):
+    """Заполнить число и баллы согласившихся, проходящих в пределах places мест"""
+    admitted = agreed[:max(places, 0)]
+    scores = [r.score for r in admitted if r.score is not None]
+
+    summary['admitted_count'] = len(admitted)
+    if scores:
+        summary['score_min'] = min(scores)
+        summary['score_max'] = max(scores)
+        summary['score_avg'] = round(sum(scores) / len(scores), 1)
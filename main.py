@@ -8,7 +8,10 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from config import load_config
 from parser import Parser, BackgroundParser
 from database import create_db_connection
+from database.archive import HistoryArchive
+from database.maintenance import DatabaseMaintenance
 from bot.handlers import create_router
+from analyzer import AnalysisPool, ReportCache, ReportPrerenderer
 
 
 logger = logging.getLogger(__name__)
@@ -46,10 +49,19 @@ async def main():
         db = create_db_connection(config)
         logger.info("✅ БД подключена")
 
+        archive = None
+        if config.db.archive_dir:
+            archive = HistoryArchive(config.db.archive_dir)
+            logger.info(f"🗄️ Архив парсингов: {config.db.archive_dir}")
+
         logger.info("🌐 Инициализирую парсер...")
         session = aiohttp.ClientSession()
         parser = Parser(session, config.parser.base_url)
-        bg_parser = BackgroundParser(parser, db)
+        maintenance = DatabaseMaintenance(vacuum=config.db.vacuum_after_crawl)
+        prerenderer = None
+        if config.report.prerender_workers:
+            prerenderer = ReportPrerenderer(workers=config.report.prerender_workers)
+        bg_parser = BackgroundParser(parser, db, archive, maintenance, prerenderer)
         logger.info("✅ Парсер инициализирован")
 
         logger.info("🤖 Инициализирую бота...")
@@ -59,7 +71,12 @@ async def main():
         logger.info("✅ Бот Инициализирован")
 
         logger.info("📝 Регистрирую обработчики...")
-        router = create_router(db)
+        cache = None
+        if config.report.cache_mb:
+            cache = ReportCache(max_bytes=config.report.cache_mb * 1024 * 1024)
+        pool = AnalysisPool(workers=config.report.workers, db=db,
+                            processes=config.report.worker_processes)
+        router = create_router(db, archive, cache, pool)
         dp.include_router(router)
         logger.info("✅ Обработчики зарегистрированы")
 
@@ -105,6 +122,12 @@ async def main():
         except:
             pass
 
+        try:
+            pool.shutdown()
+            logger.info("✅ Пул отчетов остановлен")
+        except:
+            pass
+
         try:
             await bot.session.close()
             logger.info("✅ Сессия бота закрыта")
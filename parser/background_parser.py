@@ -3,6 +3,9 @@ import logging
 
 from .parser import Parser
 from database import Database
+from database.archive import HistoryArchive
+from database.maintenance import DatabaseMaintenance
+from analyzer.prerender import ReportPrerenderer
 
 from datetime import datetime
 
@@ -12,9 +15,27 @@ logger = logging.getLogger(__name__)
 class BackgroundParser:
     """Фоновый парсер для периодической загрузки данных"""
 
-    def __init__(self, parser: Parser, db: Database):
+    def __init__(
+        self,
+        parser: Parser,
+        db: Database,
+        archive: HistoryArchive | None = None,
+        maintenance: DatabaseMaintenance | None = None,
+        prerenderer: ReportPrerenderer | None = None
+    ):
+        """
+        Args:
+            parser: Экземпляр Parser
+            db: Экземпляр Database
+            archive: HistoryArchive для выгрузки прошлых парсингов (необязательно)
+            maintenance: Обслуживание БД после парсинга (по умолчанию только ANALYZE)
+            prerenderer: Предварительное построение отчетов после парсинга (необязательно)
+        """
         self.parser: Parser = parser
         self.db = db
+        self.archive = archive
+        self.maintenance = maintenance or DatabaseMaintenance()
+        self.prerenderer = prerenderer
 
     async def get_all_filter_combinations(self) -> list[dict[str, dict[str, str]]]:
         """
@@ -126,6 +147,8 @@ class BackgroundParser:
                     logger.error(f"❌ Ошибка при сохранении комбинации: {e}")
                     continue
 
+            self.db.reload_filter_tree()
+
             logger.info(
                 f"✅ Таблица комбинаций обновлена {datetime.now()}. Было обработано {len(combinations)} записей")
 
@@ -133,21 +156,28 @@ class BackgroundParser:
             logger.error(f"❌ Ошибка при обновлении комбинаций: {e}")
 
     async def parse_and_save_all(self):
-        """Парсить ВСЕ комбинации и сохранить в БД"""
+        """
+        Парсить ВСЕ комбинации и сохранить в БД
+
+        Данные загружаются в новое поколение и становятся видны читателям
+        только после публикации, затем старые поколения удаляются целиком
+        """
         logger.info(f"🚀 Начинается фоновый парсинг данных {datetime.now()}...")
 
+        generation_id = None
         try:
-            combinations = self.db.get_all_filter_combinations()
-            if not combinations:
+            combinations_count = self.db.count_filter_combinations()
+            if not combinations_count:
                 logger.warning("⚠️ Нет комбинаций в БД")
                 return
 
+            generation_id = self.db.start_generation()
             total_records = 0
 
-            for idx, combo in enumerate(combinations, 1):
+            for idx, combo in enumerate(self.db.iter_filter_combinations(), 1):
                 filters = combo.to_filters_dict()
                 logger.debug(
-                    f"[{idx}/{len(combinations)}] Парсинг комбинации {combo.id}...")
+                    f"[{idx}/{combinations_count}] Парсинг комбинации {combo.id}...")
 
                 try:
                     html = await self.parser.fetch_page(filters)
@@ -156,10 +186,16 @@ class BackgroundParser:
                     if df is not None and not df.empty:
                         records = df.to_dict('records')
 
-                        saved = await self.db.save_data_batch(records, combo)
+                        saved = await self.db.save_data_batch(records, combo, generation_id)
                         total_records += saved
 
                         logger.info(f"✅ Сохранено {saved} записей")
+                    elif df is None:
+                        # Таблицы не найдены или не разобраны - сбой загрузки,
+                        # а не конкурс без заявлений (пустой DataFrame)
+                        logger.warning(
+                            f"⚠️ Таблицы не найдены для комбинации {combo.id}")
+                        self.db.record_crawl_failure(generation_id, combo.id)
                     else:
                         logger.warning(
                             f"⚠️ Таблица пуста для комбинации {combo.id}")
@@ -169,10 +205,28 @@ class BackgroundParser:
                 except Exception as e:
                     logger.error(
                         f"❌ Ошибка при парсинге комбинации {combo.id}: {e}")
+                    self.db.record_crawl_failure(generation_id, combo.id)
                     continue
 
+            if self.db.publish_generation(generation_id, total_records):
+                # Выгрузка в Parquet и удаление партиций выполняются в потоке,
+                # чтобы бот продолжал отвечать
+                if self.archive is not None:
+                    await asyncio.to_thread(self.archive.compact, self.db)
+                else:
+                    await asyncio.to_thread(self.db.purge_generations)
+                await asyncio.to_thread(
+                    self.maintenance.run, self.db, generation_id)
+                if self.prerenderer is not None:
+                    await asyncio.to_thread(
+                        self.prerenderer.run, self.db, generation_id)
+            else:
+                self.db.fail_generation(generation_id)
+
             logger.info(
                 f"🎉 Парсинг завершен {datetime.now()}! Всего сохранено {total_records} записей")
 
         except Exception as e:
             logger.error(f"❌ Критическая ошибка: {e}")
+            if generation_id is not None:
+                self.db.fail_generation(generation_id)
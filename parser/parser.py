@@ -208,6 +208,11 @@ class Parser:
         """
         Извлечь данные из таблиц
         Находит все таблицы с классом tablebig, извлекает нужные столбцы и объединяет их
+
+        Returns:
+            DataFrame с записями; пустой DataFrame, если таблицы разобраны,
+            но заявлений в них нет; None, если ни одну таблицу разобрать
+            не удалось (страница не загрузилась или изменилась разметка)
         """
         soup = BeautifulSoup(html, 'lxml')
 
@@ -222,6 +227,7 @@ class Parser:
         logger.debug(f"📊 Найдено таблиц: {len(tables)}")
 
         all_data = []
+        parsed_tables = 0
 
         for table_idx, table in enumerate(tables):
             logger.debug(f"📋 Обрабатываю таблицу {table_idx + 1}")
@@ -236,6 +242,7 @@ class Parser:
                 if not column_indices:
                     continue
 
+                parsed_tables += 1
                 rows = table.find_all('tr')[1:]
                 for _, tr in enumerate(rows):
                     tds = tr.find_all('td')
@@ -263,10 +270,15 @@ class Parser:
                     f"❌ Ошибка при обработке таблицы {table_idx + 1}: {e}")
                 continue
 
-        if not all_data:
-            logger.warning("⚠️ Данные не найдены")
+        if not parsed_tables:
+            logger.warning("⚠️ Ни одну таблицу не удалось разобрать")
             return None
 
+        if not all_data:
+            logger.info("ℹ️ Таблицы разобраны, заявлений нет")
+            return pd.DataFrame(columns=[*NEEDED_COLUMNS.values(),
+                                         'admission_category', 'available_places'])
+
         df = pd.DataFrame(all_data)
         logger.info(
             f"✅ Всего извлечено {len(df)} записей из {len(tables)} таблиц")
@@ -0,0 +1,104 @@
+from collections import namedtuple
+
+PlaceRow = namedtuple('PlaceRow', 'id admission_category available_places')
+
+
+class TestAdmissionSimulation:
+    """Тесты для симуляции зачисления"""
+
+    @staticmethod
+    def simulate(places, applications):
+        from analyzer.admission_simulation import AdmissionSimulation
+        return AdmissionSimulation.from_rows(
+            [PlaceRow(*row) for row in places], applications).run()
+
+    def test_applicant_admitted_once_by_best_score(self):
+        """Проверка что абитуриент с несколькими согласиями занимает одно место"""
+        import numpy as np
+        from database import AdmissionCategory
+
+        general = AdmissionCategory.GENERAL
+        result = self.simulate(
+            [(1, general, 2), (2, general, 2)],
+            [(1, 10, general, 280), (2, 10, general, 270),
+             (1, 11, general, 250), (1, 12, general, 240),
+             (2, 13, general, 230), (2, 14, general, 220)])
+
+        assert result.combo_ids.tolist() == [1, 2]
+        assert result.general_admitted.tolist() == [2, 2]
+        # Абитуриент 10 занял место на направлении 1, а не 2
+        assert result.cutoffs.tolist() == [250, 220]
+        assert not np.isnan(result.cutoffs).any()
+
+    def test_special_categories_first(self):
+        """Проверка что особые категории заполняются до общего конкурса"""
+        from database import AdmissionCategory
+
+        result = self.simulate(
+            [(1, AdmissionCategory.GENERAL, 3), (1, AdmissionCategory.TARGET_QUOTA, 2)],
+            [(1, 10, AdmissionCategory.TARGET_QUOTA, 200),
+             (1, 10, AdmissionCategory.GENERAL, 300),
+             (1, 11, AdmissionCategory.GENERAL, 290),
+             (1, 12, AdmissionCategory.GENERAL, 280)])
+
+        # Неиспользованное место квоты переходит в общий конкурс
+        assert result.special_admitted.tolist() == [1]
+        assert result.general_places.tolist() == [2]
+        assert result.cutoffs.tolist() == [280]
+
+    def test_shortfall_and_unknown_applicants(self):
+        """Проверка недобора и заявлений без абитуриента"""
+        import numpy as np
+        from database import AdmissionCategory
+
+        general = AdmissionCategory.GENERAL
+        result = self.simulate(
+            [(1, general, 3), (2, general, 0)],
+            [(1, None, general, 250), (1, None, general, 240),
+             (1, 5, general, None), (3, 6, general, 300)])
+
+        assert result.general_admitted.tolist() == [2, 0]
+        assert np.isnan(result.cutoffs).all()
+
+    def test_report(self):
+        """Проверка отчета с прогнозом проходных баллов"""
+        from analyzer import DataAnalyzer
+        from database import AdmissionCategory
+
+        Row = namedtuple('Row', 'id inst_name faculty_name speciality_name '
+                                'typeofstudy_name admission_category available_places')
+
+        places = [Row(1, 'КФУ', 'ИВМИТ', 'Информатика', 'Очная', AdmissionCategory.GENERAL, 1),
+                  Row(2, 'КФУ', 'ИВМИТ', 'Математика', 'Очная', AdmissionCategory.GENERAL, 5)]
+        applications = [(1, 10, AdmissionCategory.GENERAL, 290),
+                        (2, 11, AdmissionCategory.GENERAL, 280)]
+
+        class Result:
+            def __init__(self, rows):
+                self.rows = rows
+
+            def all(self):
+                return self.rows
+
+        class Session:
+            def __init__(self):
+                self.results = [places, applications]
+
+            def execute(self, stmt):
+                return Result(self.results.pop(0))
+
+            def close(self):
+                pass
+
+        class MockDB:
+            def get_read_session(self):
+                return Session()
+
+        report = DataAnalyzer(MockDB())._simulation_report(
+            {'level': 1, 'inst': 0, 'category': 0})
+
+        assert ("Зачислено в симуляции:", 2) in report.summary
+        assert report.tables[0].rows == [
+            ('ИВМИТ', 'Информатика', 'Очная', 1, 0, 1, 290),
+            ('ИВМИТ', 'Математика', 'Очная', 5, 0, 1, 'недобор'),
+        ]
@@ -13,94 +13,139 @@ def mock_db():
 class TestAnalyzer:
     """Тесты для анализатора данных"""
 
-    def test_analyzer_excel_workbook_creation(self, mock_db):
-        """Проверка создания Excel workbook"""
-        from analyzer.analyzer import DataAnalyzer
+    def test_report_writer_workbook_creation(self):
+        """Проверка создания Excel файла отчета"""
+        from analyzer.report_writer import ReportWriter
         import openpyxl
 
-        analyzer = DataAnalyzer(mock_db)
-        wb = analyzer._create_excel_workbook()
+        report = ReportWriter("Тест")
+        report.title("ЗАГОЛОВОК", merge_to='D')
+        report.row("Всего:", 5)
 
-        assert wb is not None
-        assert isinstance(wb, openpyxl.Workbook)
-        assert wb.active is not None
+        wb = openpyxl.load_workbook(report.to_bytes_io())
 
-    def test_analyzer_bytes_io_conversion(self, mock_db):
-        """Проверка преобразования Excel в BytesIO"""
-        from analyzer import DataAnalyzer
+        assert wb.sheetnames == ["Тест"]
+        assert wb.active['A1'].value == "ЗАГОЛОВОК"
+        assert wb.active['B2'].value == 5
+        assert [str(r) for r in wb.active.merged_cells.ranges] == ['A1:D1']
 
-        analyzer = DataAnalyzer(mock_db)
-        wb = analyzer._create_excel_workbook()
-        wb.active['A1'] = "Тестовые данные"
+    def test_report_writer_bytes_io(self):
+        """Проверка что файл отчета возвращается в начале буфера"""
+        from analyzer.report_writer import ReportWriter
+
+        report = ReportWriter("Тест")
+        report.row("Тестовые данные")
 
-        buffer = analyzer._get_bytes_io(wb)
+        buffer = report.to_bytes_io()
 
         assert isinstance(buffer, BytesIO)
         assert buffer.tell() == 0
-        assert len(buffer.getvalue()) > 0
+        assert len(buffer.read()) > 0
 
-    def test_analyzer_buffer_seekable(self, mock_db):
-        """Проверка что буфер можно читать"""
-        from analyzer import DataAnalyzer
+    def test_report_writer_header_style(self):
+        """Проверка стиля строки заголовков"""
+        from analyzer.report_writer import ReportWriter
+        import openpyxl
 
-        analyzer = DataAnalyzer(mock_db)
-        wb = analyzer._create_excel_workbook()
-        wb.active['A1'] = "Данные"
+        report = ReportWriter("Тест")
+        report.blank()
+        report.header('Категория', 'Мест')
 
-        buffer = analyzer._get_bytes_io(wb)
+        ws = openpyxl.load_workbook(report.to_bytes_io()).active
 
-        data = buffer.read()
-        assert len(data) > 0
+        assert ws['A2'].font.b
+        assert ws['B2'].fill.fgColor.rgb == '004472C4'
+        assert ws['A1'].value is None
 
-        buffer.seek(0)
-        assert buffer.tell() == 0
+    def test_report_writer_min_width(self):
+        """Проверка минимальной ширины подбираемой колонки"""
+        from analyzer.report_writer import ReportWriter, fit_widths
+        import openpyxl
 
-    def test_analyzer_column_auto_adjust_min_width(self, mock_db):
-        """Проверка минимальной ширины при подстройке"""
-        from analyzer import DataAnalyzer
+        rows = [("abc", "значение")]
+        report = ReportWriter("Тест", widths={'B': 15, **fit_widths(rows)})
+        for row in rows:
+            report.row(*row)
 
-        analyzer = DataAnalyzer(mock_db)
-        wb = analyzer._create_excel_workbook()
-        ws = wb.active
+        ws = openpyxl.load_workbook(report.to_bytes_io()).active
 
-        ws['A1'] = "abc"
-        analyzer._auto_adjust_column(ws, 'A')
+        assert ws.column_dimensions['A'].width == 10
+        assert ws.column_dimensions['B'].width == 15
 
-        width = ws.column_dimensions['A'].width
-        assert width >= 10  # Минимальная ширина 10
+    def test_report_writer_width_tracks_longest_value(self):
+        """Проверка подбора ширины по самому длинному значению"""
+        from analyzer.report_writer import fit_widths
 
-    def test_analyzer_column_auto_adjust_long_text(self, mock_db):
-        """Проверка подстройки для длинного текста"""
-        from analyzer import DataAnalyzer
+        long_text = "Это намного более длинный текст в ячейке"
 
-        analyzer = DataAnalyzer(mock_db)
-        wb = analyzer._create_excel_workbook()
-        ws = wb.active
+        widths = fit_widths([("Короткий",), (long_text,), ("abc",), (), (None, long_text)])
 
-        long_text = "Это очень длинный текст для проверки автоматической подстройки ширины колонки"
-        ws['A1'] = long_text
+        assert widths == {'A': len(long_text) + 2}
 
-        analyzer._auto_adjust_column(ws, 'A')
+    def test_report_writer_streams_rows(self):
+        """Проверка что строки сразу отдаются листу, а не копятся в ReportWriter"""
+        from analyzer.report_writer import ReportWriter
+        import openpyxl
 
-        width = ws.column_dimensions['A'].width
-        assert width > 10
+        report = ReportWriter("Тест")
+        report.row("первая")
+        report.blank()
+        report.title("ЗАГОЛОВОК", merge_to='C')
 
-    def test_analyzer_multiple_rows_adjust(self, mock_db):
-        """Проверка подстройки для нескольких строк"""
-        from analyzer import DataAnalyzer
+        assert all(not isinstance(value, list) for value in vars(report).values())
+        ws = openpyxl.load_workbook(report.to_bytes_io()).active
+        assert [str(r) for r in ws.merged_cells.ranges] == ['A3:C3']
+        assert ws['A3'].value == "ЗАГОЛОВОК"
 
-        analyzer = DataAnalyzer(mock_db)
-        wb = analyzer._create_excel_workbook()
-        ws = wb.active
+    def test_report_writer_rows_from_iterator(self):
+        """Проверка записи строк из итератора за один проход с шириной по выборке"""
+        from itertools import islice
+        from analyzer.report_writer import ReportWriter, fit_widths
+        import openpyxl
+
+        def source():
+            for idx in range(5000):
+                yield (f"строка {idx}", idx)
+
+        rows = source()
+        sample = list(islice(rows, 10))
+        report = ReportWriter("Тест", widths=fit_widths(sample))
+        report.rows(sample)
+        report.rows(rows)
+
+        ws = openpyxl.load_workbook(report.to_bytes_io()).active
+
+        assert ws.max_row == 5000
+        assert ws['B5000'].value == 4999
+        assert ws.column_dimensions['A'].width == len("строка 9") + 2
+
+    def test_xlsx_width_sampled(self):
+        """Проверка что ширина колонок Excel подбирается по первым строкам таблиц"""
+        from analyzer.report_formats import Report, ReportTable, WIDTH_SAMPLE_ROWS, to_xlsx
+        import openpyxl
 
-        ws['A1'] = "Короткий"
-        ws['A2'] = "Это намного более длинный текст в ячейке"
-        ws['A3'] = "abc"
+        rows = [("короткое", 1)] * WIDTH_SAMPLE_ROWS + [("очень длинное значение в конце таблицы", 2)]
+        report = Report("Тест", "ОТЧЕТ", [], tables=[ReportTable(('Имя', 'N'), rows)])
 
-        analyzer._auto_adjust_column(ws, 'A')
+        ws = openpyxl.load_workbook(to_xlsx(report)).active
 
-        width = ws.column_dimensions['A'].width
-        assert width > 10
+        assert ws.column_dimensions['A'].width == 10
+        assert ws.max_row == len(rows) + 3
+
+    def test_xlsx_auto_width_from_report(self):
+        """Проверка что ширина первой колонки Excel подбирается по всему отчету"""
+        from analyzer.report_formats import Report, ReportTable, to_xlsx
+        import openpyxl
+
+        long_text = "Очень длинное название направления подготовки"
+        report = Report("Тест", "ОТЧЕТ", [("Всего:", 5)], widths={'B': 15},
+                        tables=[ReportTable(('Направление', 'Мест'), [(long_text, 3)])])
+
+        ws = openpyxl.load_workbook(to_xlsx(report)).active
+
+        assert ws.column_dimensions['A'].width == len(long_text) + 2
+        assert ws.column_dimensions['B'].width == 15
+        assert ws['A5'].value == long_text
 
     def test_analyzer_initialization_with_db(self, mock_db):
         """Проверка инициализации анализатора с БД"""
@@ -110,3 +155,34 @@ class TestAnalyzer:
 
         assert analyzer.db == mock_db
         assert analyzer is not None
+
+    def test_applicant_positions(self):
+        """Проверка места, числа мест и запаса до проходного балла"""
+        from types import SimpleNamespace
+        from analyzer import DataAnalyzer
+        from database import AdmissionCategory
+
+        def row(category, score, rank, places, admitted, score_min, occupied=0):
+            return SimpleNamespace(
+                faculty_name='ИВМИТ', speciality_name='Информатика',
+                typeofstudy_name='Очная', category_name='Бюджет',
+                admission_category=category, score=score, agreement=True,
+                exams_failed=rank is None, agreed_rank=rank,
+                available_places=places, admitted_count=admitted,
+                score_min=score_min, occupied_by_special=occupied)
+
+        class MockDB:
+            def get_applicant_positions(self, identifier):
+                if identifier != '1234567':
+                    return []
+                return [row(AdmissionCategory.GENERAL, 250, 3, 12, 10, 240, occupied=2),
+                        row(AdmissionCategory.GENERAL, 230, 8, 10, 4, 200),
+                        row(AdmissionCategory.TARGET_QUOTA, 230, None, 2, 0, None)]
+
+        analyzer = DataAnalyzer(MockDB())
+        filled, shortfall, failed = analyzer.applicant_positions('1234567')
+
+        assert (filled['places'], filled['cutoff'], filled['gap']) == (10, 240, 10)
+        assert (shortfall['places'], shortfall['cutoff'], shortfall['gap']) == (10, None, None)
+        assert failed['rank'] is None and failed['category'] == 'целевая квота'
+        assert 'error' in analyzer.applicant_positions('7654321')
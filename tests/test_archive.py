@@ -0,0 +1,65 @@
+import pytest
+from datetime import date
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Архив с записями двух дней парсинга"""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from database.archive import HistoryArchive, PARTITIONING
+
+    rows = []
+    for crawl_date, agreed in ((date(2025, 7, 1), 1), (date(2025, 7, 2), 2)):
+        for idx in range(3):
+            rows.append({
+                'crawl_date': crawl_date, 'level_value': 1, 'inst_value': 0,
+                'faculty_value': 5, 'speciality_value': 166, 'typeofstudy_value': 1,
+                'category_value': 0, 'exams_failed': idx == 2, 'agreement': idx < agreed,
+            })
+    rows.append({**rows[0], 'level_value': 2, 'speciality_value': 301})
+
+    table = pa.Table.from_pandas(pd.DataFrame(rows), preserve_index=False)
+    pq.write_to_dataset(table, root_path=str(tmp_path),
+                        partitioning=PARTITIONING)
+    return HistoryArchive(str(tmp_path))
+
+
+class TestHistoryArchive:
+    """Тесты для Parquet-архива прошлых парсингов"""
+
+    def test_read_filters_by_partitions(self, archive):
+        """Проверка фильтрации по уровню и дате"""
+        df = archive.read(levels=[1], date_from=date(2025, 7, 2))
+
+        assert len(df) == 3
+        assert set(df['crawl_date']) == {date(2025, 7, 2)}
+
+    def test_read_filters_by_columns(self, archive):
+        """Проверка фильтрации по значениям колонок"""
+        df = archive.read(columns=['speciality_value'],
+                          filters={'speciality_value': 301})
+
+        assert list(df.columns) == ['speciality_value']
+        assert len(df) == 1
+
+    def test_speciality_trend(self, archive):
+        """Проверка динамики направления по дням"""
+        trend = archive.speciality_trend({
+            'level': '1', 'inst': '0', 'faculty': '5',
+            'speciality': '166', 'typeofstudy': '1', 'category': '0',
+        })
+
+        assert list(trend['crawl_date']) == [date(2025, 7, 1), date(2025, 7, 2)]
+        assert list(trend['total_count']) == [3, 3]
+        assert list(trend['participants_count']) == [2, 2]
+        assert list(trend['agreed_count']) == [1, 2]
+
+    def test_missing_archive_is_empty(self, tmp_path):
+        """Проверка чтения несуществующего архива"""
+        from database.archive import HistoryArchive
+
+        archive = HistoryArchive(str(tmp_path / 'missing'))
+
+        assert archive.read().empty
@@ -0,0 +1,143 @@
+class TestBackgroundParser:
+    """Тесты для фонового парсера"""
+
+    class MockDB:
+        def __init__(self, combinations=()):
+            self.failed = False
+            self.published = False
+            self.combinations = combinations
+            self.crawl_failures = []
+
+        def count_filter_combinations(self):
+            return 1
+
+        def start_generation(self):
+            return 1
+
+        def iter_filter_combinations(self):
+            return iter(self.combinations)
+
+        def record_crawl_failure(self, generation_id, combo_id):
+            self.crawl_failures.append(combo_id)
+
+        def publish_generation(self, generation_id, records_count=0):
+            self.published = True
+            return True
+
+        def purge_generations(self):
+            return 0
+
+        def fail_generation(self, generation_id):
+            self.failed = True
+
+    def test_maintenance_does_not_block_event_loop(self):
+        """Проверка что обслуживание БД после парсинга не блокирует цикл событий"""
+        import asyncio
+        import threading
+        from parser.background_parser import BackgroundParser
+
+        loop_answered = threading.Event()
+
+        class Maintenance:
+            def __init__(self):
+                self.answered = None
+
+            def run(self, db, generation_id):
+                # Событие выставляет корутина: при блокировке цикла ожидание истечет
+                self.answered = loop_answered.wait(timeout=2)
+
+        async def answer():
+            await asyncio.sleep(0.01)
+            loop_answered.set()
+
+        maintenance = Maintenance()
+        background = BackgroundParser(None, self.MockDB(), maintenance=maintenance)
+
+        async def scenario():
+            await asyncio.gather(background.parse_and_save_all(), answer())
+
+        asyncio.run(scenario())
+
+        assert maintenance.answered is True
+
+    def test_cleanup_runs_in_threads(self, monkeypatch):
+        """Проверка что очистка поколений, архив и обслуживание идут через to_thread"""
+        import asyncio
+        from parser.background_parser import BackgroundParser
+
+        class Archive:
+            def compact(self, db):
+                pass
+
+        class Maintenance:
+            def run(self, db, generation_id):
+                pass
+
+        archive, maintenance = Archive(), Maintenance()
+        offloaded = []
+        to_thread = asyncio.to_thread
+
+        async def recording_to_thread(fn, *args):
+            offloaded.append(fn)
+            return await to_thread(fn, *args)
+
+        monkeypatch.setattr(asyncio, 'to_thread', recording_to_thread)
+
+        db = self.MockDB()
+        asyncio.run(BackgroundParser(None, db, maintenance=maintenance).parse_and_save_all())
+        assert offloaded == [db.purge_generations, maintenance.run]
+
+        offloaded.clear()
+        asyncio.run(BackgroundParser(None, db, archive=archive,
+                                     maintenance=maintenance).parse_and_save_all())
+        assert offloaded == [archive.compact, maintenance.run]
+
+    def test_failed_combinations_recorded(self, monkeypatch):
+        """Проверка что неудачные комбинации отмечаются, а конкурсы без заявлений - нет"""
+        import asyncio
+        from pathlib import Path
+        from database.queries import CombinationKey
+        from parser import Parser
+        from parser.background_parser import BackgroundParser
+
+        fixtures = Path(__file__).parent / 'fixtures'
+        pages = {'2': 'listing_no_tables.html', '3': 'listing_empty.html'}
+
+        class FixtureParser(Parser):
+            async def fetch_page(self, params):
+                if params['p_speciality'] == '1':
+                    raise ConnectionError('timeout')
+                return (fixtures / pages[params['p_speciality']]).read_text(encoding='utf-8')
+
+        class Maintenance:
+            def run(self, db, generation_id):
+                pass
+
+        async def no_sleep(delay):
+            pass
+
+        monkeypatch.setattr(asyncio, 'sleep', no_sleep)
+        db = self.MockDB([CombinationKey(idx, 1, 0, 5, idx, 1, 0) for idx in (1, 2, 3)])
+
+        asyncio.run(BackgroundParser(FixtureParser(None, 'https://abiturient.kpfu.ru'), db,
+                                     maintenance=Maintenance()).parse_and_save_all())
+
+        assert db.crawl_failures == [1, 2]
+        assert db.failed is False
+
+    def test_combinations_read_error_fails_generation(self):
+        """Проверка что ошибка чтения комбинаций помечает поколение неудачным"""
+        import asyncio
+        from parser.background_parser import BackgroundParser
+
+        class BrokenDB(self.MockDB):
+            def iter_filter_combinations(self):
+                raise ConnectionError('connection lost')
+                yield
+
+        db = BrokenDB()
+        asyncio.run(BackgroundParser(None, db).parse_and_save_all())
+
+        assert db.failed is True
+        assert db.published is False
+
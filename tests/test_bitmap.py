@@ -0,0 +1,42 @@
+import pytest
+
+
+class TestApplicantBitmap:
+    """Тесты для сжатого множества id абитуриентов"""
+
+    @pytest.mark.parametrize("keys", [
+        [],
+        [0, 5, 65535, 65536, 70000],
+        list(range(100_000, 110_000)),
+        list(range(0, 300_000, 7)),
+    ])
+    def test_round_trip(self, keys):
+        """Проверка что множество восстанавливается из байтов без потерь"""
+        from database.bitmap import ApplicantBitmap
+
+        bitmap = ApplicantBitmap.from_keys(keys)
+        restored = ApplicantBitmap.from_bytes(bitmap.to_bytes())
+
+        assert len(restored) == len(set(keys))
+        assert restored.to_array().tolist() == sorted(set(keys))
+
+    def test_duplicates_removed(self):
+        """Проверка что повторы id не учитываются"""
+        from database.bitmap import ApplicantBitmap
+
+        assert ApplicantBitmap.from_keys([3, 1, 3, 2, 1]).to_array().tolist() == [1, 2, 3]
+
+    def test_dense_block_is_compact(self):
+        """Проверка что плотный блок хранится битовой картой"""
+        from database.bitmap import ApplicantBitmap
+
+        data = ApplicantBitmap.from_keys(range(20_000)).to_bytes()
+
+        assert len(data) < 8300
+
+    def test_negative_keys_rejected(self):
+        """Проверка что отрицательные id не принимаются"""
+        from database.bitmap import ApplicantBitmap
+
+        with pytest.raises(ValueError):
+            ApplicantBitmap.from_keys([-1, 2])
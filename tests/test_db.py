@@ -0,0 +1,283 @@
+class TestReadEngine:
+    """Тесты для разделения подключений на запись и чтение"""
+
+    def test_read_engine_defaults_to_write_engine(self):
+        """Проверка что без read_url чтение идет через основной движок"""
+        from database import Database
+
+        db = Database('sqlite://')
+
+        assert db.read_engine is db.engine
+        assert db.get_read_session().get_bind() is db.engine
+
+    def test_read_url_gets_own_engine(self, tmp_path):
+        """Проверка отдельного движка и пула для read_url"""
+        from database import Database
+
+        db = Database(f"sqlite:///{tmp_path / 'write.db'}",
+                      read_url=f"sqlite:///{tmp_path / 'read.db'}")
+
+        assert db.read_engine is not db.engine
+        assert db.read_engine.pool is not db.engine.pool
+        assert str(db.get_read_session().get_bind().url).endswith('read.db')
+        assert str(db.get_session().get_bind().url).endswith('write.db')
+
+    def test_primary_reader_reads_through_write_engine(self, tmp_path):
+        """Проверка что primary_reader читает с основного узла, не меняя исходный экземпляр"""
+        from analyzer.pool import worker_initargs
+        from database import Database
+
+        db = Database(f"sqlite:///{tmp_path / 'write.db'}",
+                      read_url=f"sqlite:///{tmp_path / 'read.db'}")
+
+        primary = db.primary_reader()
+
+        assert str(primary.get_read_session().get_bind().url).endswith('write.db')
+        assert str(db.get_read_session().get_bind().url).endswith('read.db')
+        # Процессы предварительного построения не получают URL реплики
+        assert worker_initargs(primary)[1] is None
+        assert worker_initargs(db)[1].endswith('read.db')
+
+
+class TestFilterCombinations:
+    """Тесты для обхода комбинаций фильтров"""
+
+    def test_iter_reraises_db_errors(self):
+        """Проверка что ошибка БД при обходе комбинаций не обрывает обход молча"""
+        import pytest
+        from sqlalchemy.exc import OperationalError
+        from database import Database
+
+        db = Database('sqlite://')
+
+        with pytest.raises(OperationalError):
+            list(db.iter_filter_combinations())
+
+
+class TestMaintenance:
+    """Тесты для обслуживания БД после парсинга"""
+
+    def test_bloat_threshold(self):
+        """Проверка порога доли мертвых строк"""
+        from database.maintenance import DatabaseMaintenance
+
+        maintenance = DatabaseMaintenance(vacuum=True, dead_ratio=0.2)
+
+        assert maintenance._is_bloated(700, 300)
+        assert not maintenance._is_bloated(900, 100)
+        assert not maintenance._is_bloated(0, 0)
+        assert not maintenance._is_bloated(None, None)
+
+    def test_skipped_outside_postgresql(self):
+        """Проверка что вне PostgreSQL обслуживание пропускается"""
+        from database import Database
+        from database.maintenance import DatabaseMaintenance
+
+        assert DatabaseMaintenance().run(Database('sqlite://'), 1) == []
+
+    def test_vacuum_disabled_by_default(self):
+        """Проверка что по умолчанию выполняется только ANALYZE"""
+        from config.config import DatabaseSettings
+        from database.maintenance import DatabaseMaintenance
+
+        assert DatabaseMaintenance().vacuum is False
+        assert DatabaseSettings('user', 'pass', 'localhost', 5432, 'db').vacuum_after_crawl is False
+
+
+class TestSchemaCheck:
+    """Тесты для проверки схемы таблиц при init_db"""
+
+    def test_outdated_statistics_is_not_dropped(self, tmp_path):
+        """Проверка что устаревшая statistics не удаляется, а запуск прерывается"""
+        import pytest
+        from sqlalchemy import create_engine, text
+        from database import Database
+
+        url = f"sqlite:///{tmp_path / 'old.db'}"
+        with create_engine(url).begin() as conn:
+            conn.execute(text("CREATE TABLE statistics (id INTEGER PRIMARY KEY, "
+                              "generation_id INTEGER, note TEXT)"))
+            conn.execute(text("INSERT INTO statistics (generation_id, note) VALUES (1, 'история')"))
+
+        with pytest.raises(RuntimeError, match='statistics'):
+            Database(url).init_db()
+
+        with create_engine(url).connect() as conn:
+            assert conn.execute(text("SELECT note FROM statistics")).scalar() == 'история'
+
+    def test_baseline_statistics_set_aside(self, tmp_path):
+        """Проверка обновления с прежней версии: statistics без поколений откладывается"""
+        import pytest
+        from sqlalchemy import create_engine, inspect, text
+        from database import Database, Statistics
+
+        url = f"sqlite:///{tmp_path / 'baseline.db'}"
+        # Схема statistics прежней версии (один снимок, без generation_id)
+        with create_engine(url).begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE statistics (id INTEGER NOT NULL, "
+                "filter_combination_id INTEGER NOT NULL, admission_category VARCHAR(50), "
+                "available_places INTEGER, epgu_id VARCHAR(15), applicant_id VARCHAR(15), "
+                "score INTEGER, agreement VARCHAR(10), status VARCHAR(30), note VARCHAR(255), "
+                "created_at DATETIME NOT NULL, PRIMARY KEY (id))"))
+            conn.execute(text("CREATE INDEX ix_statistics_epgu_id ON statistics (epgu_id)"))
+            conn.execute(text(
+                "INSERT INTO statistics (filter_combination_id, epgu_id, created_at) "
+                "VALUES (1, '4001', '2025-07-01')"))
+
+        Database(url).init_db()
+        # Повторный запуск не трогает уже обновленную схему
+        Database(url).init_db()
+
+        inspector = inspect(create_engine(url))
+        columns = {c['name'] for c in inspector.get_columns('statistics')}
+        assert columns == set(Statistics.__table__.columns.keys())
+        with create_engine(url).connect() as conn:
+            assert conn.execute(text("SELECT epgu_id FROM statistics_legacy")).scalar() == '4001'
+            assert conn.execute(text("SELECT count(*) FROM statistics")).scalar() == 0
+
+        # Вторую отложенную таблицу init_db не перезаписывает
+        with create_engine(url).begin() as conn:
+            conn.execute(text("ALTER TABLE statistics RENAME TO statistics_new"))
+            conn.execute(text("CREATE TABLE statistics (id INTEGER PRIMARY KEY)"))
+        with pytest.raises(RuntimeError, match='statistics_legacy'):
+            Database(url).init_db()
+
+    def test_outdated_aggregate_is_rebuilt(self, tmp_path):
+        """Проверка что производные таблицы с устаревшей схемой пересоздаются"""
+        from sqlalchemy import create_engine, inspect, text
+        from database import Database, CombinationSummary
+
+        url = f"sqlite:///{tmp_path / 'old.db'}"
+        with create_engine(url).begin() as conn:
+            conn.execute(text("CREATE TABLE combination_summaries (id INTEGER PRIMARY KEY)"))
+
+        Database(url).init_db()
+
+        columns = {c['name'] for c in inspect(create_engine(url)).get_columns('combination_summaries')}
+        assert columns == set(CombinationSummary.__table__.columns.keys())
+
+
+class TestSqliteRoundTrip:
+    """Тесты загрузки и анализа на реальной схеме в SQLite"""
+
+    @staticmethod
+    def filters(speciality: int) -> dict:
+        return {
+            'level': {'value': '1', 'name': 'Бакалавриат'},
+            'inst': {'value': '0', 'name': 'КФУ'},
+            'faculty': {'value': '5', 'name': 'ИВМИТ'},
+            'speciality': {'value': str(speciality), 'name': f'Направление {speciality}'},
+            'typeofstudy': {'value': '1', 'name': 'Очная'},
+            'category': {'value': '0', 'name': 'Бюджет'},
+        }
+
+    @staticmethod
+    def records(count: int) -> list[dict]:
+        return [{
+            'admission_category': 'общий конкурс',
+            'available_places': 3,
+            'epgu_id': str(1000 + idx),
+            'score': str(300 - idx),
+            'agreement': 'да',
+        } for idx in range(count)]
+
+    def test_save_publish_analyze(self):
+        """Проверка цепочки save_data_batch -> publish_generation -> отчет"""
+        import asyncio
+        import json
+        from analyzer import DataAnalyzer
+        from database import Database
+
+        db = Database('sqlite://')
+        db.init_db()
+        combos = [db.get_or_create_filter_combination(self.filters(idx)) for idx in (1, 2)]
+
+        generation_id = db.start_generation()
+        saved = [asyncio.run(db.save_data_batch(self.records(5), combo, generation_id))
+                 for combo in combos]
+        assert saved == [5, 5]
+        assert db.publish_generation(generation_id, sum(saved))
+
+        report = json.loads(DataAnalyzer(db).render('speciality', {
+            'level': 1, 'inst': 0, 'faculty': 5, 'speciality': 1,
+            'typeofstudy': 1, 'category': 0}, 'json').read())
+        summary = {item['name']: item['value'] for item in report['summary']}
+        assert summary['Всего заявлений'] == 5
+        assert summary['Прогноз проходного балла'] == 298
+
+        positions = DataAnalyzer(db).applicant_positions('1001')
+        assert [position['rank'] for position in positions] == [2, 2]
+
+
+class TestCarryOver:
+    """Тесты для копирования незагруженных комбинаций при публикации поколения"""
+
+    @staticmethod
+    def publish(db, saved, failed=()):
+        """Загрузить поколение: saved - сохраненные комбинации, failed - неудачные"""
+        import asyncio
+
+        generation_id = db.start_generation()
+        for combo in saved:
+            asyncio.run(db.save_data_batch(TestSqliteRoundTrip.records(3), combo, generation_id))
+        for combo in failed:
+            db.record_crawl_failure(generation_id, combo.id)
+        assert db.publish_generation(generation_id)
+        return generation_id
+
+    @staticmethod
+    def loaded(db, combo):
+        """Количество заявлений комбинации в текущем поколении"""
+        from sqlalchemy import func, select
+        from database import CombinationSummary, CURRENT_GENERATION
+
+        session = db.get_session()
+        try:
+            return session.execute(select(func.sum(CombinationSummary.total_count)).where(
+                CombinationSummary.generation_id == CURRENT_GENERATION,
+                CombinationSummary.filter_combination_id == combo.id)).scalar() or 0
+        finally:
+            session.close()
+
+    def make_db(self, carry_over_generations=3):
+        from database import Database
+
+        db = Database('sqlite://', carry_over_generations=carry_over_generations)
+        db.init_db()
+        combos = [db.get_or_create_filter_combination(TestSqliteRoundTrip.filters(idx))
+                  for idx in (1, 2)]
+        return db, combos
+
+    def test_only_failed_combinations_copied(self):
+        """Проверка что копируются только неудачные комбинации, а не все отсутствующие"""
+        db, (first, second) = self.make_db()
+        self.publish(db, saved=(first, second))
+
+        self.publish(db, saved=(first,), failed=(second,))
+        assert self.loaded(db, second) == 3
+
+        # Комбинация загружена без ошибок, но без данных: старые данные не копируются
+        self.publish(db, saved=(first,))
+        assert self.loaded(db, second) == 0
+        assert self.loaded(db, first) == 3
+
+    def test_copy_limited_by_generations(self):
+        """Проверка что данные копируются не больше carry_over_generations поколений подряд"""
+        from database import CrawlFailure
+
+        db, (first, second) = self.make_db(carry_over_generations=2)
+        self.publish(db, saved=(first, second))
+
+        generations = [self.publish(db, saved=(first,), failed=(second,))
+                       for _ in range(3)]
+
+        assert self.loaded(db, second) == 0
+        session = db.get_session()
+        try:
+            carried = [session.get(CrawlFailure, (generation_id, second.id)).carried_over
+                       for generation_id in generations[:2]]
+        finally:
+            session.close()
+        assert carried == [1, 2]
+
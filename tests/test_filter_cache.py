@@ -0,0 +1,88 @@
+import pytest
+
+
+@pytest.fixture
+def sample_rows():
+    """Пример строк таблицы filter_combinations"""
+    return [
+        (1, 'Бакалавриат', 0, 'КФУ', 5, 'ИВМиИТ', 203, '38.03.05 Бизнес-информатика',
+         1, 'Очная', 0, 'Бюджет'),
+        (1, 'Бакалавриат', 0, 'КФУ', 5, 'ИВМиИТ', 166, '01.03.02 Прикладная математика',
+         1, 'Очная', 1, 'Внебюджет'),
+        (1, 'Бакалавриат', 0, 'КФУ', 5, 'ИВМиИТ', 166, '01.03.02 Прикладная математика',
+         2, 'Очно-заочная', 0, 'Бюджет'),
+        (2, 'Магистратура', 0, 'КФУ', 6, 'Институт физики', 301, '03.04.02 Физика',
+         1, 'Очная', 0, 'Бюджет'),
+        (1, 'Бакалавриат', 1, 'Набережночелнинский институт', 7, 'Инженерный',
+         400, '15.03.01 Машиностроение', 1, 'Очная', 0, 'Бюджет'),
+    ]
+
+
+class TestFilterTree:
+    """Тесты для дерева комбинаций фильтров"""
+
+    def test_independent_params_sorted_and_unique(self, sample_rows):
+        """Проверка независимых параметров"""
+        from database.filter_cache import FilterTree
+
+        tree = FilterTree(sample_rows)
+
+        assert tree.levels == ((1, 'Бакалавриат'), (2, 'Магистратура'))
+        assert tree.institutes == (
+            (0, 'КФУ'), (1, 'Набережночелнинский институт'))
+        assert tree.categories == ((0, 'Бюджет'), (1, 'Внебюджет'))
+        assert tree.size == len(sample_rows)
+
+    def test_faculties_depend_only_on_inst(self, sample_rows):
+        """Проверка что факультеты зависят только от ВУЗа"""
+        from database.filter_cache import FilterTree
+
+        tree = FilterTree(sample_rows)
+
+        assert tree.get_faculties(0) == (
+            (5, 'ИВМиИТ'), (6, 'Институт физики'))
+        assert tree.get_faculties(1) == ((7, 'Инженерный'),)
+        assert tree.get_faculties(99) == ()
+
+    def test_specialities_and_study_types(self, sample_rows):
+        """Проверка зависимых параметров"""
+        from database.filter_cache import FilterTree
+
+        tree = FilterTree(sample_rows)
+
+        assert tree.get_specialities(1, 0, 5) == (
+            (166, '01.03.02 Прикладная математика'),
+            (203, '38.03.05 Бизнес-информатика'),
+        )
+        assert tree.get_specialities(2, 0, 5) == ()
+        assert tree.get_study_types(1, 0, 5, 166) == (
+            (1, 'Очная'), (2, 'Очно-заочная'))
+        assert tree.get_study_types(1, 0, 5, 999) == ()
+
+    def test_names_are_interned(self, sample_rows):
+        """Проверка что одинаковые названия хранятся одним объектом"""
+        from database.filter_cache import FilterTree
+
+        rows = [tuple(''.join(v) if isinstance(v, str) else v for v in row)
+                for row in sample_rows]
+        tree = FilterTree(rows)
+
+        first = tree.root.children[1].children[0]
+        second = tree.root.children[2].children[0]
+        assert first.name is second.name
+
+    def test_nodes_have_slots(self):
+        """Проверка что узлы не хранят __dict__"""
+        from database.filter_cache import FilterNode, FilterTree
+
+        assert not hasattr(FilterNode(1, 'a'), '__dict__')
+        assert not hasattr(FilterTree([]), '__dict__')
+
+    def test_empty_tree(self):
+        """Проверка пустого дерева"""
+        from database.filter_cache import FilterTree
+
+        tree = FilterTree([])
+
+        assert tree.levels == ()
+        assert tree.get_specialities(1, 0, 5) == ()
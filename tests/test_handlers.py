@@ -9,6 +9,8 @@ class TestHandlers:
          'speciality', 'typeofstudy', 'category']),
         ('by_institute', ['level', 'inst', 'faculty', 'category']),
         ('by_university', ['level', 'inst', 'category']),
+        ('by_simulation', ['level', 'inst', 'category']),
+        ('by_overlap', ['level', 'inst', 'faculty', 'category']),
     ])
     def test_param_order_for_analysis_types(self, analysis_type, expected_order):
         """Проверка правильного порядка параметров для каждого типа анализа"""
@@ -89,3 +91,26 @@ class TestHandlers:
             assert len(order) > 0
             for param in order:
                 assert isinstance(param, str)
+
+    def test_analysis_kinds_cover_all_types(self):
+        """Проверка что для каждого типа анализа задан тип отчета"""
+        from bot.handlers.handlers import ANALYSIS_KINDS, TYPES_ANALYSIS
+
+        assert set(ANALYSIS_KINDS) == set(TYPES_ANALYSIS)
+        assert {kind for kind, _ in ANALYSIS_KINDS.values()} == {
+            'speciality', 'institute', 'university', 'simulation', 'overlap'}
+
+    def test_format_positions(self):
+        """Проверка текста ответа на /position"""
+        from bot.handlers.handlers import format_positions
+
+        position = {'name': 'Информатика (Очная, Бюджет)', 'faculty': 'ИВМИТ',
+                    'category': 'общий конкурс', 'score': 230, 'agreement': False,
+                    'rank': 12, 'places': 10, 'cutoff': 240, 'gap': -10}
+
+        text = format_positions('1234567', [position, {**position, 'rank': None}])
+
+        assert '1234567' in text
+        assert 'Место при подаче согласия: 12 (мест: 10)' in text
+        assert 'не хватает 10' in text
+        assert 'Экзамены не сданы' in text
@@ -0,0 +1,58 @@
+import pytest
+
+
+class TestHyperLogLog:
+    """Тесты для скетча HyperLogLog"""
+
+    def test_empty_sketch(self):
+        """Проверка пустого скетча"""
+        from database.hyperloglog import HyperLogLog
+
+        assert HyperLogLog().count() == 0
+        assert HyperLogLog.from_keys([]).count() == 0
+
+    def test_small_sets_are_exact(self):
+        """Проверка что малые множества считаются практически точно"""
+        from database.hyperloglog import HyperLogLog
+
+        assert HyperLogLog.from_keys([1, 2, 3, 2, 1]).count() == 3
+        assert HyperLogLog.from_keys(range(100)).count() == pytest.approx(100, abs=5)
+
+    @pytest.mark.parametrize("size", [10_000, 200_000])
+    def test_estimate_within_error_bound(self, size):
+        """Проверка что оценка укладывается в тройную стандартную ошибку"""
+        from database.hyperloglog import HyperLogLog
+
+        sketch = HyperLogLog.from_keys(range(size))
+
+        assert sketch.count() == pytest.approx(size, rel=3 * sketch.relative_error)
+
+    def test_merge_counts_union(self):
+        """Проверка что объединение скетчей оценивает объединение множеств"""
+        from database.hyperloglog import HyperLogLog
+
+        first = HyperLogLog.from_keys(range(0, 6000))
+        second = HyperLogLog.from_keys(range(4000, 10_000))
+        union = HyperLogLog.from_keys(range(10_000))
+
+        merged = HyperLogLog().merge(first).merge(second)
+
+        assert merged.count() == union.count()
+
+    def test_merge_requires_same_precision(self):
+        """Проверка запрета объединения скетчей разной точности"""
+        from database.hyperloglog import HyperLogLog
+
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+    def test_bytes_roundtrip(self):
+        """Проверка сериализации скетча"""
+        from database.hyperloglog import HyperLogLog
+
+        sketch = HyperLogLog.from_keys(range(500), precision=10)
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+
+        assert restored.precision == 10
+        assert restored.count() == sketch.count()
+        assert len(sketch.to_bytes()) < len(sketch.registers)
@@ -66,6 +66,8 @@ class TestKeyboards:
             'analysis_type_by_speciality',
             'analysis_type_by_institute',
             'analysis_type_by_university',
+            'analysis_type_by_simulation',
+            'analysis_type_by_overlap',
             'cancel'
         }
 
@@ -129,3 +131,14 @@ class TestKeyboards:
 
         assert 'start_analysis' in callback_data_list
         assert 'main_menu' in callback_data_list
+
+    def test_format_menu_has_all_formats(self):
+        """Проверка что меню форматов содержит все форматы анализатора"""
+        from bot.keyboards import get_format_menu
+        from analyzer.report_formats import FORMATS
+
+        keyboard = get_format_menu()
+        callbacks = [row[0].callback_data for row in keyboard.inline_keyboard]
+
+        assert callbacks == [f"format_{fmt}" for fmt in ('text', 'xlsx', 'csv', 'json')] + ['cancel']
+        assert set(callbacks[:-1]) == {f"format_{fmt}" for fmt in FORMATS}
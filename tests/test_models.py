@@ -53,3 +53,103 @@ class TestModels:
         for key, value in filters_dict.items():
             assert isinstance(
                 value, str), f"Значение {key} должно быть строкой, получен {type(value)}"
+
+
+class TestEncoding:
+    """Тесты для кодирования повторяющихся строк statistics"""
+
+    @pytest.mark.parametrize("label,expected", [
+        ('общий конкурс', 'GENERAL'),
+        ('целевая квота', 'TARGET_QUOTA'),
+        ('особая квота', 'SPECIAL_QUOTA'),
+        ('отдельная квота', 'SEPARATE_QUOTA'),
+        ('без вступительных испытаний', 'WITHOUT_EXAMS'),
+        ('Неизвестный заголовок таблицы', 'OTHER'),
+        (None, 'GENERAL'),
+    ])
+    def test_admission_category_from_label(self, label, expected):
+        """Проверка кодирования категории конкурса"""
+        from database.models import AdmissionCategory
+
+        assert AdmissionCategory.from_label(label) == AdmissionCategory[expected]
+
+    def test_admission_category_labels_match_parser(self):
+        """Проверка что все категории парсера имеют свой код"""
+        from database.models import AdmissionCategory
+        from parser.parser import CATEGORIES
+
+        for label in CATEGORIES.values():
+            category = AdmissionCategory.from_label(label)
+            assert category != AdmissionCategory.OTHER
+            assert category.label == label
+
+    @pytest.mark.parametrize("value,expected", [
+        ('да', True), ('Да ', True), ('нет', False), (None, False), (float('nan'), False),
+    ])
+    def test_parse_agreement(self, value, expected):
+        """Проверка кодирования согласия на зачисление"""
+        from database.models import parse_agreement
+
+        assert parse_agreement(value) is expected
+
+    @pytest.mark.parametrize("note,expected", [
+        ('Не сданы один или несколько экзаменов', True),
+        ('Не сданы один или несколько экзаменов; иное', True),
+        ('Иное примечание', False),
+        (None, False),
+    ])
+    def test_is_exams_failed(self, note, expected):
+        """Проверка вычисления признака несданных экзаменов"""
+        from database.models import is_exams_failed
+
+        assert is_exams_failed(note) is expected
+
+    @pytest.mark.parametrize("record,expected", [
+        ({'epgu_id': ' 123 ', 'applicant_id': '45'}, ('123', '45')),
+        ({'epgu_id': '123', 'applicant_id': None}, ('123', '')),
+        ({'epgu_id': None, 'applicant_id': '45'}, ('', '45')),
+        ({'epgu_id': None}, None),
+        ({}, None),
+    ])
+    def test_applicant_natural_key(self, record, expected):
+        """Проверка ключа абитуриента из строки парсера"""
+        from database.models import applicant_natural_key
+
+        assert applicant_natural_key(record) == expected
+
+    def test_statistics_references_applicant_by_id(self):
+        """Проверка что statistics хранит только целочисленную ссылку на абитуриента"""
+        from database.models import Statistics
+
+        columns = Statistics.__table__.columns
+        assert 'applicant_key' in columns
+        assert 'epgu_id' not in columns
+        assert 'applicant_id' not in columns
+
+
+    def test_unused_ranking_index_dropped(self):
+        """Проверка что индекс выборки лучших баллов удален из модели и удаляется из БД"""
+        from database.models import Statistics, LEGACY_INDEXES
+
+        names = {index.name for index in Statistics.__table__.indexes}
+        assert 'idx_statistics_participants_ranking' not in names
+        assert 'idx_statistics_participants_ranking' in LEGACY_INDEXES
+
+
+class TestPartitions:
+    """Тесты для партиций statistics"""
+
+    def test_partition_name_format(self):
+        """Проверка имени партиции по дате парсинга"""
+        from datetime import date
+        from database.models import partition_name
+
+        assert partition_name(date(2025, 7, 3)) == 'statistics_p20250703'
+
+    def test_statistics_partitioned_by_crawl_date(self):
+        """Проверка что statistics разбита на партиции по дате парсинга"""
+        from database.models import Statistics
+
+        table = Statistics.__table__
+        assert table.dialect_options['postgresql']['partition_by'] == 'RANGE (crawl_date)'
+        assert 'crawl_date' in table.primary_key.columns
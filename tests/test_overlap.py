@@ -0,0 +1,65 @@
+class TestOverlap:
+    """Тесты для пересечений множеств абитуриентов"""
+
+    def test_overlap_matrix(self):
+        """Проверка матрицы пересечений и счетчиков абитуриентов"""
+        import numpy as np
+        from analyzer.overlap import overlap_matrix
+
+        overlap = overlap_matrix([np.array([1, 2, 3, 4]), np.array([3, 4, 5]),
+                                  np.array([4, 6])])
+
+        assert overlap.matrix.tolist() == [[4, 2, 1], [2, 3, 1], [1, 1, 2]]
+        assert overlap.unique == 6
+        assert overlap.multiple == 2
+
+    def test_top_pairs(self):
+        """Проверка пар с наибольшим пересечением"""
+        import numpy as np
+        from analyzer.overlap import top_pairs
+
+        matrix = np.array([[4, 2, 0], [2, 3, 1], [0, 1, 2]])
+
+        assert top_pairs(matrix) == [(0, 1, 2), (1, 2, 1)]
+        assert top_pairs(matrix, limit=1) == [(0, 1, 2)]
+
+    def test_empty(self):
+        """Проверка пустого набора множеств"""
+        from analyzer.overlap import overlap_matrix
+
+        assert overlap_matrix([]).unique == 0
+
+    def test_report_merges_study_types(self):
+        """Проверка что формы обучения одного направления объединяются"""
+        from types import SimpleNamespace
+        from analyzer import DataAnalyzer
+        from database.bitmap import ApplicantBitmap
+
+        def row(value, name, keys):
+            return SimpleNamespace(faculty_name='ИВМИТ', speciality_value=value,
+                                   speciality_name=name,
+                                   applicant_set=ApplicantBitmap.from_keys(keys).to_bytes())
+
+        rows = [row(1, 'Информатика', [1, 2, 3]), row(1, 'Информатика', [3, 4]),
+                row(2, 'Математика', [2, 4, 9]),
+                SimpleNamespace(faculty_name='ИВМИТ', speciality_value=3,
+                                speciality_name='Физика', applicant_set=None)]
+
+        class Session:
+            def execute(self, stmt):
+                return SimpleNamespace(all=lambda: rows)
+
+            def close(self):
+                pass
+
+        class MockDB:
+            def get_read_session(self):
+                return Session()
+
+        report = DataAnalyzer(MockDB())._overlap_report(
+            {'level': 1, 'inst': 0, 'faculty': 5, 'category': 0})
+
+        assert ("Уникальных абитуриентов:", 5) in report.summary
+        pairs, matrix = report.tables
+        assert pairs.rows == [('Информатика', 'Математика', 2, 66.7)]
+        assert matrix.rows == [(1, 'Информатика', 4, 2), (2, 'Математика', 2, 3)]
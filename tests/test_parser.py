@@ -72,3 +72,45 @@ class TestParser:
         for key, value in NEEDED_COLUMNS.items():
             assert isinstance(key, str)
             assert isinstance(value, str)
+
+
+class TestExtractTableData:
+    """Тесты для разбора страницы списка поступающих"""
+
+    @staticmethod
+    def load(name: str) -> str:
+        from pathlib import Path
+        return (Path(__file__).parent / 'fixtures' / name).read_text(encoding='utf-8')
+
+    @staticmethod
+    def parser():
+        from parser import Parser
+        return Parser(session=None, base_url='https://abiturient.kpfu.ru')
+
+    def test_rows_extracted(self):
+        """Проверка записей всех таблиц страницы"""
+        df = self.parser().extract_table_data(self.load('listing_with_rows.html'))
+
+        assert df['epgu_id'].tolist() == ['4001', '4002', '4003']
+        assert df['admission_category'].tolist() == ['общий конкурс', 'общий конкурс',
+                                                     'целевая квота']
+        assert df['available_places'].tolist() == [25, 25, 3]
+
+    def test_tables_without_rows_give_empty_frame(self):
+        """Проверка что конкурс без заявлений - пустой DataFrame, а не None"""
+        df = self.parser().extract_table_data(self.load('listing_empty.html'))
+
+        assert df is not None
+        assert df.empty
+        assert {'epgu_id', 'score', 'admission_category'} <= set(df.columns)
+
+    def test_page_without_tables_gives_none(self):
+        """Проверка что страница без таблиц считается сбоем загрузки"""
+        assert self.parser().extract_table_data(self.load('listing_no_tables.html')) is None
+
+    def test_unparsed_tables_give_none(self):
+        """Проверка что таблицы с неизвестными заголовками считаются сбоем, а не пустым конкурсом"""
+        html = self.load('listing_empty.html').replace('Статус', 'Состояние')
+
+        assert self.parser().extract_table_data(html) is None
+
@@ -0,0 +1,108 @@
+from io import BytesIO
+
+
+class TestAnalysisPool:
+    """Тесты для пула построения отчетов"""
+
+    def test_concurrency_cap_and_queue_stats(self):
+        """Проверка ограничения одновременных отчетов и статистики очереди"""
+        import asyncio
+        import threading
+        import time
+        from analyzer import AnalysisPool
+
+        pool = AnalysisPool(workers=2)
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def job(value):
+            with lock:
+                active.append(value)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(value)
+            return value
+
+        async def scenario():
+            return await asyncio.gather(*(pool.submit(job, idx) for idx in range(5)))
+
+        try:
+            assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
+        finally:
+            pool.shutdown()
+
+        stats = pool.stats()
+        assert max(peak) == 2
+        assert stats['completed'] == 5
+        assert stats['max_queued'] == 3
+        assert stats['queued'] == 0 and stats['running'] == 0
+        assert stats['avg_wait_ms'] > 0
+
+    def test_event_loop_not_blocked(self):
+        """Проверка что долгий отчет не задерживает другие обработчики"""
+        import asyncio
+        import threading
+        from analyzer import AnalysisPool
+
+        pool = AnalysisPool(workers=1)
+        release = threading.Event()
+
+        async def scenario():
+            report = asyncio.create_task(pool.submit(release.wait, 5))
+            await asyncio.sleep(0.01)
+            replied = not report.done()
+            release.set()
+            await report
+            return replied
+
+        try:
+            assert asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+
+    def test_process_pool_requires_db(self):
+        """Проверка что пулу процессов нужен экземпляр Database"""
+        import pytest
+        from analyzer import AnalysisPool
+
+        with pytest.raises(ValueError):
+            AnalysisPool(processes=True)
+
+
+class TestAnalyzerPool:
+    """Тесты для построения отчетов DataAnalyzer через пул"""
+
+    class MockDB:
+        def get_current_generation(self):
+            return 1
+
+        def get_rendered_report(self, generation_id, kind, filters_key):
+            return None
+
+    class MockProcessPool:
+        processes = True
+
+        def __init__(self):
+            self.rendered = []
+
+        async def render(self, kind, filters, fmt):
+            self.rendered.append((kind, filters, fmt))
+            return BytesIO(b'report')
+
+    def test_process_pool_result_cached_in_bot_process(self):
+        """Проверка что отчет из процесса-исполнителя попадает в кэш бота"""
+        import asyncio
+        from analyzer import DataAnalyzer, ReportCache
+
+        pool = self.MockProcessPool()
+        analyzer = DataAnalyzer(self.MockDB(), cache=ReportCache(), pool=pool)
+
+        async def scenario():
+            first = await analyzer.run('university', {'level': 1})
+            second = await analyzer.run('university', {'level': 1})
+            return first.read(), second.read()
+
+        assert asyncio.run(scenario()) == (b'report', b'report')
+        assert pool.rendered == [('university', {'level': 1}, 'xlsx')]
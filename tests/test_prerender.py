@@ -0,0 +1,114 @@
+from io import BytesIO
+
+
+class TestReportJobs:
+    """Тесты для списка отчетов предварительного построения"""
+
+    def test_hierarchy_deduplicated(self):
+        """Проверка что университеты и институты строятся по одному разу"""
+        from analyzer.prerender import report_jobs
+        from database.queries import CombinationKey
+
+        combos = [
+            CombinationKey(1, 1, 0, 5, 100, 1, 0),
+            CombinationKey(2, 1, 0, 5, 101, 1, 0),
+            CombinationKey(3, 1, 0, 6, 200, 2, 0),
+        ]
+
+        jobs = report_jobs(combos)
+
+        assert [kind for kind, _ in jobs] == [
+            'university', 'simulation', 'institute', 'overlap', 'institute', 'overlap',
+            'speciality', 'speciality', 'speciality']
+        assert jobs[0][1] == {'level': 1, 'inst': 0, 'category': 0}
+        assert jobs[1][1] == jobs[0][1]
+        assert jobs[5][1] == {'level': 1, 'inst': 0, 'faculty': 6, 'category': 0}
+        assert jobs[6][1] == {'level': 1, 'inst': 0, 'faculty': 5, 'speciality': 100,
+                              'typeofstudy': 1, 'category': 0}
+
+
+class TestReportPrerenderer:
+    """Тесты для предварительного построения отчетов"""
+
+    class MockDB:
+        def __init__(self):
+            self.saved = []
+            self.cleared = False
+            self.primary = False
+
+        def primary_reader(self):
+            self.primary = True
+            return self
+
+        def iter_filter_combinations(self):
+            from database.queries import CombinationKey
+            return iter([CombinationKey(1, 1, 0, 5, 100, 1, 0),
+                         CombinationKey(2, 1, 0, 5, 101, 1, 0)])
+
+        def clear_rendered_reports(self):
+            self.cleared = True
+
+        def save_rendered_reports(self, generation_id, reports):
+            self.saved.extend((generation_id, *report) for report in reports)
+            return len(reports)
+
+    def test_run_saves_files_and_skips_errors(self, monkeypatch):
+        """Проверка что сохраняются только построенные файлы"""
+        from analyzer import DataAnalyzer, ReportPrerenderer
+
+        def render(self, kind, filters, fmt='xlsx'):
+            assert self.db.primary, 'отчеты должны строиться по основному узлу'
+            if filters.get('speciality') == 101:
+                return {'error': 'нет данных'}
+            return BytesIO(kind.encode())
+
+        monkeypatch.setattr(DataAnalyzer, 'render', render)
+        db = self.MockDB()
+
+        saved = ReportPrerenderer(workers=1, batch_size=2).run(db, 7)
+
+        assert saved == 5
+        assert db.cleared
+        assert db.saved[0] == (7, 'university', 'category=0&inst=0&level=1', b'university')
+        assert [kind for _, kind, _, _ in db.saved] == [
+            'university', 'simulation', 'institute', 'overlap', 'speciality']
+
+
+class TestRenderedReportStore:
+    """Тесты для хранилища готовых отчетов"""
+
+    def test_save_get_clear(self):
+        """Проверка сохранения, чтения и очистки готовых отчетов"""
+        from database import Database, RenderedReport
+
+        db = Database('sqlite://')
+        RenderedReport.__table__.create(db.engine)
+
+        assert db.save_rendered_reports(3, [('institute', 'faculty=5', b'xlsx')]) == 1
+        assert db.get_rendered_report(3, 'institute', 'faculty=5') == b'xlsx'
+        assert db.get_rendered_report(4, 'institute', 'faculty=5') is None
+
+        assert db.clear_rendered_reports() == 1
+        assert db.get_rendered_report(3, 'institute', 'faculty=5') is None
+
+    def test_analyzer_serves_stored_report(self):
+        """Проверка что анализатор отдает готовый отчет без построения"""
+        from analyzer import DataAnalyzer, ReportCache
+
+        class MockDB:
+            def get_current_generation(self):
+                return 3
+
+            def get_rendered_report(self, generation_id, kind, filters_key):
+                assert (generation_id, kind, filters_key) == (3, 'institute', 'faculty=5&level=1')
+                return b'stored'
+
+        cache = ReportCache()
+        analyzer = DataAnalyzer(MockDB(), cache=cache)
+
+        def render(kind, filters, fmt):
+            raise AssertionError('отчет не должен строиться')
+
+        analyzer.render = render
+        assert analyzer._cached('institute', {'level': '1', 'faculty': 5}).read() == b'stored'
+        assert cache.size == len(b'stored')
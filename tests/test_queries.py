@@ -0,0 +1,92 @@
+class TestQueries:
+    """Тесты для запросов чтения database.queries"""
+
+    def test_combination_key_to_filters_dict(self):
+        """Проверка словаря фильтров легкой комбинации"""
+        from database.queries import CombinationKey
+
+        key = CombinationKey(7, 1, 0, 5, 166, 1, 0)
+
+        assert key.to_filters_dict() == {
+            'p_level': '1', 'p_inst': '0', 'p_faculty': '5',
+            'p_speciality': '166', 'p_typeofstudy': '1', 'p_category': '0',
+        }
+
+    def test_filter_values_are_bound_parameters(self):
+        """Проверка что разные фильтры дают один и тот же SQL"""
+        from database.queries import find_combination
+
+        first = find_combination({'level': 1, 'inst': 0, 'faculty': 5,
+                                  'speciality': 166, 'typeofstudy': 1, 'category': 0})
+        second = find_combination({'level': '2', 'inst': '0', 'faculty': '6',
+                                   'speciality': '301', 'typeofstudy': '1', 'category': '1'})
+
+        assert str(first) == str(second)
+        assert '166' not in str(first)
+
+    def test_institute_report_uses_conditional_aggregates(self):
+        """Проверка что отчет по институту считается одним проходом с FILTER"""
+        from database.queries import institute_report
+
+        sql = str(institute_report({'level': 1, 'inst': 0, 'faculty': 5, 'category': 0}))
+
+        assert sql.count('FILTER (WHERE') == 2
+        assert 'WITH unique_applicants' in sql
+
+    def test_institute_report_binds_each_call(self):
+        """Проверка что значения фильтров не кэшируются вместе с запросом"""
+        from database.queries import institute_report
+
+        institute_report({'level': 1, 'inst': 0, 'faculty': 5, 'category': 0})
+        stmt = institute_report({'level': 2, 'inst': 0, 'faculty': 7, 'category': 1})
+
+        params = stmt.compile().params
+        assert (params['level_1'], params['faculty_1'], params['category_1']) == (2, 7, 1)
+
+    def test_speciality_report_is_single_statement(self):
+        """Проверка что отчет по направлению собирается одним запросом с LEFT JOIN"""
+        from database.queries import speciality_report
+
+        sql = str(speciality_report({'level': 1, 'inst': 0, 'faculty': 5,
+                                     'speciality': 166, 'typeofstudy': 1, 'category': 0}))
+
+        assert 'LEFT OUTER JOIN combination_summaries' in sql
+        assert 'speciality_name' in sql and 'score_avg' in sql
+
+    def test_combination_scores_pinned_to_report_generation(self):
+        """Проверка что баллы читаются из поколения агрегатов отчета, а не из текущего"""
+        from datetime import date
+        from database.queries import combination_scores, speciality_report
+
+        report_sql = str(speciality_report({'level': 1, 'inst': 0, 'faculty': 5,
+                                            'speciality': 166, 'typeofstudy': 1, 'category': 0}))
+        compiled = combination_scores(7, 3, date(2026, 7, 1)).compile()
+
+        assert 'combination_summaries.generation_id' in report_sql
+        assert 'crawl_runs.crawl_date' in report_sql
+        assert 'crawl_runs' not in str(compiled)
+        assert 3 in compiled.params.values()
+        assert date(2026, 7, 1) in compiled.params.values()
+
+    def test_combination_keys_keyset_page(self):
+        """Проверка keyset-пагинации комбинаций"""
+        from database.queries import combination_keys
+
+        stmt = combination_keys(after_id=500, limit=100)
+        compiled = stmt.compile()
+
+        assert 'filter_combinations.id >' in str(compiled)
+        assert 'LIMIT' in str(compiled)
+        assert 'LIMIT' not in str(combination_keys())
+
+    def test_applicant_positions_binds_identifier(self):
+        """Проверка что абитуриент ищется по обоим идентификаторам связанным параметром"""
+        from database.queries import applicant_positions
+
+        stmt = applicant_positions('1234567')
+        sql = str(stmt)
+
+        assert '1234567' not in sql
+        assert 'applicants.epgu_id' in sql and 'applicants.applicant_id' in sql
+        assert 'agreed_rank' in sql
+        assert '1234567' in stmt.compile().params.values()
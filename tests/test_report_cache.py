@@ -0,0 +1,166 @@
+from io import BytesIO
+
+
+class TestReportCache:
+    """Тесты для кэша готовых отчетов"""
+
+    def test_key_ignores_filter_order_and_types(self):
+        """Проверка что ключ не зависит от порядка и типа значений фильтров"""
+        from analyzer import ReportCache
+
+        first = ReportCache.make_key('speciality', {'level': 1, 'inst': 0}, 5)
+        second = ReportCache.make_key('speciality', {'inst': '0', 'level': '1'}, 5)
+
+        assert first == second
+        assert first != ReportCache.make_key('institute', {'level': 1, 'inst': 0}, 5)
+        assert first != ReportCache.make_key('speciality', {'level': 1, 'inst': 0}, 6)
+
+    def test_lru_eviction_by_bytes(self):
+        """Проверка вытеснения давно не использованных отчетов по размеру"""
+        from analyzer import ReportCache
+
+        cache = ReportCache(max_bytes=10)
+        cache.put((1, 'a'), b'1234')
+        cache.put((1, 'b'), b'1234')
+        cache.get((1, 'a'))
+        cache.put((1, 'c'), b'1234')
+
+        assert cache.get((1, 'b')) is None
+        assert cache.get((1, 'a')) == b'1234'
+        assert cache.size == 8
+
+    def test_oversized_report_not_cached(self):
+        """Проверка что отчет больше бюджета не кэшируется"""
+        from analyzer import ReportCache
+
+        cache = ReportCache(max_bytes=3)
+        cache.put((1, 'a'), b'1234')
+
+        assert cache.size == 0
+
+    def test_hit_ratio(self):
+        """Проверка доли попаданий"""
+        from analyzer import ReportCache
+
+        cache = ReportCache()
+        assert cache.hit_ratio == 0.0
+
+        cache.put((1, 'a'), b'x')
+        cache.get((1, 'a'))
+        cache.get((1, 'b'))
+
+        assert cache.hit_ratio == 0.5
+
+    def test_new_generation_invalidates(self):
+        """Проверка очистки кэша при новом поколении данных"""
+        from analyzer import ReportCache
+
+        cache = ReportCache()
+        cache.put((1, 'a'), b'old')
+        cache.get((2, 'a'))
+        cache.put((1, 'b'), b'late')
+
+        assert cache.size == 0
+        assert cache.get((1, 'a')) is None
+
+
+class TestAnalyzerCache:
+    """Тесты для кэширования отчетов в DataAnalyzer"""
+
+    class MockDB:
+        generation = 1
+
+        def get_current_generation(self):
+            return self.generation
+
+        def get_rendered_report(self, generation_id, kind, filters_key):
+            return None
+
+    def test_report_built_once_per_generation(self):
+        """Проверка что отчет строится один раз для поколения"""
+        from analyzer import DataAnalyzer, ReportCache
+
+        db = self.MockDB()
+        analyzer = DataAnalyzer(db, cache=ReportCache())
+        calls = []
+
+        def render(kind, filters, fmt):
+            calls.append(filters)
+            return BytesIO(b'report')
+
+        analyzer.render = render
+        assert analyzer._cached('speciality', {'level': 1}).read() == b'report'
+        assert analyzer._cached('speciality', {'level': 1}).read() == b'report'
+        db.generation = 2
+        analyzer._cached('speciality', {'level': 1})
+
+        assert len(calls) == 2
+
+    def test_errors_not_cached(self):
+        """Проверка что ошибки не кэшируются"""
+        from analyzer import DataAnalyzer, ReportCache
+
+        analyzer = DataAnalyzer(self.MockDB(), cache=ReportCache())
+        calls = []
+
+        def render(kind, filters, fmt):
+            calls.append(filters)
+            return {'error': 'нет данных'}
+
+        analyzer.render = render
+        analyzer._cached('institute', {})
+        analyzer._cached('institute', {})
+
+        assert len(calls) == 2
+
+
+class TestSingleFlight:
+    """Тесты для объединения одинаковых одновременных запросов"""
+
+    def test_concurrent_identical_requests_share_one_build(self):
+        """Проверка что одновременные одинаковые запросы строят отчет один раз"""
+        import asyncio
+        import threading
+        from analyzer import DataAnalyzer
+
+        analyzer = DataAnalyzer(db=None)
+        calls = []
+        release = threading.Event()
+
+        def build(filters, fmt):
+            calls.append(filters)
+            release.wait(5)
+            return BytesIO(b'report')
+
+        analyzer._analyses['speciality'] = build
+
+        async def scenario():
+            requests = [analyzer.run('speciality', {'level': 1}) for _ in range(5)]
+            tasks = [asyncio.create_task(request) for request in requests]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(scenario())
+
+        assert len(calls) == 1
+        assert [r.read() for r in results] == [b'report'] * 5
+        assert len({id(r) for r in results}) == 5
+        assert analyzer._in_flight == {}
+
+    def test_different_filters_run_separately(self):
+        """Проверка что разные фильтры не объединяются"""
+        import asyncio
+        from analyzer import DataAnalyzer
+
+        analyzer = DataAnalyzer(db=None)
+        calls = []
+        analyzer._analyses['institute'] = lambda filters, fmt: calls.append(filters) or {'error': 'x'}
+
+        async def scenario():
+            return await asyncio.gather(
+                analyzer.run('institute', {'faculty': 1}),
+                analyzer.run('institute', {'faculty': 2}))
+
+        assert asyncio.run(scenario()) == [{'error': 'x'}, {'error': 'x'}]
+        assert len(calls) == 2
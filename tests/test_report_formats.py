@@ -0,0 +1,78 @@
+import pytest
+
+
+@pytest.fixture
+def sample_report():
+    """Отчет с показателями и таблицей"""
+    from analyzer.report_formats import Report, ReportTable
+
+    return Report(
+        "Анализ института", "АНАЛИЗ ИНСТИТУТА",
+        [("Название:", "Институт физики"), ("Специальностей:", 2)],
+        inline_summary=True,
+        tables=[ReportTable(('Специальность', 'Заявления'),
+                            [('Физика', 120), ('Астрономия', 45)])],
+        merge_to='F')
+
+
+class TestReportFormats:
+    """Тесты для форматов отчетов"""
+
+    def test_text_summary(self, sample_report):
+        """Проверка текстовой сводки"""
+        from analyzer.report_formats import render_report
+
+        text = render_report(sample_report, 'text').read().decode('utf-8')
+
+        assert text.splitlines()[0] == "📊 АНАЛИЗ ИНСТИТУТА"
+        assert "Название: Институт физики" in text
+        assert "Физика | 120" in text
+
+    def test_text_truncates_long_tables(self, sample_report):
+        """Проверка что длинная таблица сокращается в сообщении"""
+        from analyzer.report_formats import render_report, TEXT_MAX_ROWS, TEXT_MAX_LENGTH
+
+        sample_report.tables[0].rows = [(f"Направление {idx}", idx) for idx in range(TEXT_MAX_ROWS + 5)]
+        text = render_report(sample_report, 'text').read().decode('utf-8')
+
+        assert "… еще 5 строк" in text
+        assert f"Направление {TEXT_MAX_ROWS}" not in text
+
+        sample_report.tables[0].rows = [("x" * 100, idx) for idx in range(TEXT_MAX_ROWS)]
+        sample_report.summary = [("Показатель:", "y" * 5000)]
+        assert len(render_report(sample_report, 'text').read().decode('utf-8')) == TEXT_MAX_LENGTH
+
+    def test_csv(self, sample_report):
+        """Проверка CSV: показатели, пустая строка и таблица"""
+        import csv
+        import io
+        from analyzer.report_formats import render_report
+
+        text = render_report(sample_report, 'csv').read().decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(text)))
+
+        assert rows == [['Название:', 'Институт физики'], ['Специальностей:', '2'], [],
+                        ['Специальность', 'Заявления'], ['Физика', '120'], ['Астрономия', '45']]
+
+    def test_json(self, sample_report):
+        """Проверка JSON с показателями и таблицей"""
+        import json
+        from analyzer.report_formats import render_report
+
+        data = json.loads(render_report(sample_report, 'json').read())
+
+        assert data['summary'][1] == {'name': 'Специальностей', 'value': 2}
+        assert data['tables'][0]['columns'] == ['Специальность', 'Заявления']
+        assert data['tables'][0]['rows'][0] == ['Физика', 120]
+
+    def test_xlsx_inline_summary(self, sample_report):
+        """Проверка что показатели института записываются в Excel одной ячейкой"""
+        import openpyxl
+        from analyzer.report_formats import render_report
+
+        ws = openpyxl.load_workbook(render_report(sample_report, 'xlsx')).active
+
+        assert ws['A2'].value == "Название: Институт физики"
+        assert ws['B2'].value is None
+        assert ws['A5'].value == 'Специальность'
+        assert [str(r) for r in ws.merged_cells.ranges] == ['A1:F1']
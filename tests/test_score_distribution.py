@@ -0,0 +1,97 @@
+class TestScoreDistribution:
+    """Тесты для распределения баллов направления"""
+
+    @staticmethod
+    def make(rows):
+        from analyzer.score_distribution import ScoreDistribution
+        return ScoreDistribution.from_rows(rows)
+
+    def test_only_general_participants_ranked(self):
+        """Проверка что в рейтинг попадают только конкурсанты общего конкурса"""
+        from database import AdmissionCategory
+
+        distribution = self.make([
+            (200, AdmissionCategory.GENERAL, False),
+            (250, AdmissionCategory.GENERAL, False),
+            (300, AdmissionCategory.TARGET_QUOTA, False),
+            (280, AdmissionCategory.GENERAL, True),
+            (None, AdmissionCategory.GENERAL, False),
+            (150, AdmissionCategory.GENERAL, False),
+        ])
+
+        assert distribution.ranked.tolist() == [250, 200, 150]
+
+    def test_percentiles_and_histogram(self):
+        """Проверка перцентилей и гистограммы"""
+        from database import AdmissionCategory
+
+        distribution = self.make([(score, AdmissionCategory.GENERAL, False)
+                                  for score in range(100, 201)])
+
+        assert distribution.percentiles() == {90: 190.0, 75: 175.0, 50: 150.0,
+                                              25: 125.0, 10: 110.0}
+        counts, edges = distribution.histogram(bins=4)
+        assert counts.sum() == 101
+        assert edges.tolist() == [100, 126, 152, 178, 204]
+
+    def test_histogram_integer_edges(self):
+        """Проверка что границы гистограммы целые и подписи интервалов не повторяются"""
+        from analyzer import DataAnalyzer
+        from analyzer.report_formats import Report
+        from database import AdmissionCategory
+
+        distribution = self.make([(score, AdmissionCategory.GENERAL, False)
+                                  for score in (200, 201, 203, 204.5)])
+        report = Report("Анализ направления", "АНАЛИЗ НАПРАВЛЕНИЯ", [])
+
+        DataAnalyzer(None)._add_score_distribution(report, distribution, 2)
+
+        counts, edges = distribution.histogram()
+        assert edges.tolist() == [200, 201, 202, 203, 204, 205]
+        assert counts.tolist() == [1, 1, 0, 1, 1]
+        labels = [label for label, _ in report.tables[1].rows]
+        assert labels == ['200', '201', '202', '203', '204']
+        assert self.make([(score, AdmissionCategory.GENERAL, False)
+                          for score in (100, 110)]).histogram()[1].tolist() == [
+            100, 102, 104, 106, 108, 110, 112]
+
+    def test_projected_cutoff_and_rank(self):
+        """Проверка прогноза проходного балла и места для балла"""
+        from database import AdmissionCategory
+
+        distribution = self.make([(score, AdmissionCategory.GENERAL, False)
+                                  for score in (300, 280, 280, 250, 200)])
+
+        assert distribution.projected_cutoff(3) == 280
+        assert distribution.projected_cutoff(6) is None
+        assert distribution.projected_cutoff(0) is None
+        assert distribution.rank_for_score(280) == 2
+        assert distribution.rank_for_score(310) == 1
+        assert distribution.rank_for_score([250, 100]).tolist() == [4, 6]
+
+    def test_empty(self):
+        """Проверка направления без конкурсантов"""
+        distribution = self.make([])
+
+        assert distribution.percentiles() == {}
+        assert len(distribution.histogram()[0]) == 0
+        assert distribution.projected_cutoff(10) is None
+        assert distribution.rank_for_score(200) == 1
+
+    def test_report_tables(self):
+        """Проверка разделов распределения в отчете по направлению"""
+        from analyzer import DataAnalyzer
+        from analyzer.report_formats import Report
+        from database import AdmissionCategory
+
+        distribution = self.make([(score, AdmissionCategory.GENERAL, False)
+                                  for score in range(100, 201)])
+        report = Report("Анализ направления", "АНАЛИЗ НАПРАВЛЕНИЯ", [])
+
+        DataAnalyzer(None)._add_score_distribution(report, distribution, 200)
+
+        assert report.summary == [("Медианный балл конкурсантов:", 150.0),
+                                  ("Прогноз проходного балла:", "недобор")]
+        percentiles, histogram = report.tables
+        assert percentiles.rows[0] == ("P90", 190.0, 11)
+        assert sum(count for _, count in histogram.rows) == 101
@@ -66,6 +66,21 @@ class TestConfig:
         assert db_config.port == 5432
         assert db_config.name == 'test_db'
 
+    def test_database_settings_history_disabled_by_default(self):
+        """Проверка что режим истории по умолчанию выключен"""
+        from config.config import DatabaseSettings
+
+        db_config = DatabaseSettings('user', 'pass', 'localhost', 5432, 'db')
+        assert db_config.history_days == 0
+
+    def test_database_settings_read_endpoint_disabled_by_default(self):
+        """Проверка что отдельный узел для чтения по умолчанию не задан"""
+        from config.config import DatabaseSettings
+
+        db_config = DatabaseSettings('user', 'pass', 'localhost', 5432, 'db')
+        assert db_config.read_host == ''
+        assert db_config.read_port == 0
+
     def test_log_settings_creation(self):
         """Проверка создания LogSettings"""
         from config.config import LogSettings
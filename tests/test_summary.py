@@ -0,0 +1,133 @@
+import pytest
+from types import SimpleNamespace
+
+
+def make_row(category, places, score, agreement=True, exams_failed=False):
+    return SimpleNamespace(admission_category=category, available_places=places,
+                           score=score, agreement=agreement, exams_failed=exams_failed)
+
+
+@pytest.fixture
+def sample_rows():
+    """Пример записей одной комбинации"""
+    from database.models import AdmissionCategory
+
+    general = AdmissionCategory.GENERAL
+    target = AdmissionCategory.TARGET_QUOTA
+    bvi = AdmissionCategory.WITHOUT_EXAMS
+    return [
+        make_row(general, 5, 280),
+        make_row(general, 5, 270),
+        make_row(general, 5, 260),
+        make_row(general, 5, 250),
+        make_row(general, 5, 240, agreement=False),
+        make_row(general, 5, 230, exams_failed=True),
+        make_row(target, 2, 200),
+        make_row(target, 2, 190),
+        make_row(target, 2, 180),
+        make_row(bvi, 0, None),
+    ]
+
+
+class TestSummary:
+    """Тесты для агрегатов CombinationSummary"""
+
+    def test_summary_per_category(self, sample_rows):
+        """Проверка что агрегаты считаются по каждой категории"""
+        from database.summary import summarize_combination
+        from database.models import AdmissionCategory
+
+        summaries = {s['admission_category']: s
+                     for s in summarize_combination(sample_rows)}
+
+        assert set(summaries) == {AdmissionCategory.GENERAL,
+                                  AdmissionCategory.TARGET_QUOTA,
+                                  AdmissionCategory.WITHOUT_EXAMS}
+        general = summaries[AdmissionCategory.GENERAL]
+        assert general['total_count'] == 6
+        assert general['participants_count'] == 5
+        assert general['agreed_count'] == 4
+
+    def test_special_categories_limited_by_places(self, sample_rows):
+        """Проверка что специальные категории занимают не больше своих мест"""
+        from database.summary import summarize_combination
+        from database.models import AdmissionCategory
+
+        summaries = {s['admission_category']: s
+                     for s in summarize_combination(sample_rows)}
+
+        target = summaries[AdmissionCategory.TARGET_QUOTA]
+        assert target['admitted_count'] == 2
+        assert target['score_min'] == 190
+        assert target['score_max'] == 200
+
+        bvi = summaries[AdmissionCategory.WITHOUT_EXAMS]
+        assert bvi['available_places'] == 1
+        assert bvi['admitted_count'] == 1
+        assert bvi['score_avg'] is None
+
+    def test_general_uses_remaining_places(self, sample_rows):
+        """Проверка что общий конкурс получает оставшиеся места"""
+        from database.summary import summarize_combination
+
+        general = summarize_combination(sample_rows)[0]
+
+        # 5 мест - 2 целевых - 1 БВИ = 2 места
+        assert general['admitted_count'] == 2
+        assert general['score_min'] == 270
+        assert general['score_max'] == 280
+        assert general['score_avg'] == 275.0
+
+    def test_no_remaining_places(self):
+        """Проверка случая, когда специальные категории заняли все места"""
+        from database.summary import summarize_combination
+        from database.models import AdmissionCategory
+
+        rows = [make_row(AdmissionCategory.GENERAL, 1, 250),
+                make_row(AdmissionCategory.SPECIAL_QUOTA, 3, 200),
+                make_row(AdmissionCategory.SPECIAL_QUOTA, 3, 190)]
+
+        general = summarize_combination(rows)[0]
+
+        assert general['admitted_count'] == 0
+        assert general['score_min'] is None
+
+    def test_empty_rows(self):
+        """Проверка пустого набора записей"""
+        from database.summary import summarize_combination
+
+        assert summarize_combination([]) == []
+
+    def test_agreed_rank(self, sample_rows):
+        """Проверка места среди согласившихся, проставленного при загрузке"""
+        from database.summary import summarize_combination
+
+        summarize_combination(sample_rows)
+
+        general = sample_rows[:6]
+        assert [row.agreed_rank for row in general[:4]] == [1, 2, 3, 4]
+        # Без согласия - место, которое занял бы с согласием
+        assert general[4].agreed_rank == 5
+        assert general[5].agreed_rank is None
+        assert [row.agreed_rank for row in sample_rows[6:]] == [1, 2, 3, 1]
+
+    def test_other_headings_places_summed(self):
+        """Проверка что места разных нераспознанных категорий складываются, а не теряются"""
+        from database.summary import summarize_combination
+        from database.models import AdmissionCategory
+
+        other = AdmissionCategory.OTHER
+        rows = [make_row(other, 2, 250), make_row(other, 2, 240),
+                make_row(other, 3, 230), make_row(AdmissionCategory.GENERAL, 10, 200)]
+        headings = ['Квота для иностранцев', 'квота для иностранцев ',
+                    'Квота Правительства', 'общий конкурс']
+
+        summaries = {s['admission_category']: s
+                     for s in summarize_combination(rows, headings)}
+
+        assert summaries[other]['available_places'] == 5
+        assert summaries[other]['admitted_count'] == 3
+        assert summaries[AdmissionCategory.GENERAL]['available_places'] == 10
+        # Без названий места категории - максимум по записям, как раньше
+        assert {s['admission_category']: s['available_places']
+                for s in summarize_combination(rows)}[other] == 3